@@ -0,0 +1,140 @@
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+import registry
+
+# ---------------------------------------------------------
+# [AI 응답 캐시] 같은 (회원정보, 증상, 운동) 조합은 GPT 호출 없이 즉시 결과 반환
+# - 입력 텍스트를 정규화해서 키 생성 (띄어쓰기/대소문자/구두점/운동 순서 무시)
+# - 리포트의 분석 일시 / 대상 회원 자리는 템플릿으로 바꿔 저장 → 적중 시 다시 채움
+# - 메모리 LRU + TTL, SQLite 파일로 백업 (재시작 후에도 유지)
+# - SQLite 도 TTL 이 지난 행 삭제 + MAX_DISK_ENTRIES 초과분은 오래된 순으로 삭제 (열 때 / PURGE_EVERY 회 저장마다)
+# ---------------------------------------------------------
+DEFAULT_PATH = "map_ai_cache.db"
+MAX_ENTRIES = 1000            # 메모리 LRU 크기
+MAX_DISK_ENTRIES = 20000      # SQLite 보관 최대 건수
+PURGE_EVERY = 100             # 저장 N 회마다 디스크 정리
+TTL = 7 * 24 * 3600           # 7일 지난 응답은 다시 생성
+
+TS_SLOT = "{{TIMESTAMP}}"
+TAG_SLOT = "{{CLIENT_TAG}}"
+TS_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}(?::\d{2})?")
+
+
+def normalize_text(text):
+    """'허리 (Lumbar) 통증/불편감' → '허리lumbar통증불편감'"""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    return re.sub(r"[\W_]+", "", text)
+
+
+def normalize_exercise(text):
+    """'스쿼트, 데드 리프트' 와 '데드리프트/스쿼트' 를 같은 키로"""
+    parts = re.split(r"[,/+·、&]|\s및\s|\s그리고\s", unicodedata.normalize("NFKC", text or ""))
+    return ",".join(sorted({normalize_text(p) for p in parts if normalize_text(p)}))
+
+
+def make_key(prompt, member, symptom, exercise, model="gpt-4o"):
+    """프롬프트가 바뀌면 자동으로 다른 키가 되도록 프롬프트 해시도 포함 (통증 부위는 symptom 문장에 포함)"""
+    raw = "\x1f".join([
+        model,
+        hashlib.sha1(prompt.encode("utf-8")).hexdigest(),
+        normalize_text(member),
+        normalize_text(symptom),
+        normalize_exercise(exercise),
+    ])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def to_template(report, member):
+    """생성된 리포트에서 시간/회원 표기를 슬롯으로 치환"""
+    out = TS_PATTERN.sub(TS_SLOT, report)
+    if member and member.strip(): out = out.replace(member.strip(), TAG_SLOT)
+    return out
+
+
+def render(template, member, timestamp):
+    return template.replace(TS_SLOT, timestamp).replace(TAG_SLOT, (member or "").strip())
+
+
+class ResponseCache:
+    def __init__(self, path=DEFAULT_PATH, max_entries=MAX_ENTRIES, ttl=TTL, max_disk_entries=MAX_DISK_ENTRIES):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl = ttl
+        self._puts = 0
+        self.mem = OrderedDict()  # key -> (created, template)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.db = None
+        try:
+            self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("CREATE TABLE IF NOT EXISTS ai_cache (key TEXT PRIMARY KEY, created REAL, template TEXT)")
+            self.db.execute("CREATE INDEX IF NOT EXISTS idx_ai_cache_created ON ai_cache(created)")
+            self.purge()
+        except Exception:
+            self.db = None  # 디스크 사용 불가 시 메모리 캐시만 사용
+
+    def purge(self):
+        """만료된 행 + 최대 건수를 넘는 오래된 행 삭제 → 삭제 수"""
+        if self.db is None: return 0
+        n = self.db.execute("DELETE FROM ai_cache WHERE created < ?", (time.time() - self.ttl,)).rowcount
+        n += self.db.execute("DELETE FROM ai_cache WHERE key IN (SELECT key FROM ai_cache ORDER BY created DESC "
+                             "LIMIT -1 OFFSET ?)", (self.max_disk_entries,)).rowcount
+        return n
+
+    def _lookup(self, key):
+        now = time.time()
+        item = self.mem.get(key)
+        if item is None and self.db is not None:
+            r = self.db.execute("SELECT created, template FROM ai_cache WHERE key=?", (key,)).fetchone()
+            if r: item = (r[0], r[1])
+        if item is None: return None
+        if now - item[0] > self.ttl:
+            self.mem.pop(key, None)
+            if self.db is not None: self.db.execute("DELETE FROM ai_cache WHERE key=?", (key,))
+            return None
+        self._remember(key, item)
+        return item[1]
+
+    def _remember(self, key, item):
+        self.mem[key] = item
+        self.mem.move_to_end(key)
+        while len(self.mem) > self.max_entries:
+            self.mem.popitem(last=False)
+
+    def get(self, key, member, timestamp):
+        """적중 시 현재 시간/회원으로 다시 채운 리포트, 아니면 None"""
+        with self._lock:
+            template = self._lookup(key)
+            if template is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return render(template, member, timestamp)
+
+    def put(self, key, report, member):
+        item = (time.time(), to_template(report, member))
+        with self._lock:
+            self._remember(key, item)
+            if self.db is not None:
+                self.db.execute("INSERT OR REPLACE INTO ai_cache(key, created, template) VALUES (?, ?, ?)",
+                                (key, item[0], item[1]))
+                self._puts += 1
+                if self._puts % PURGE_EVERY == 0: self.purge()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": (self.hits / total) if total else 0.0,
+                "entries": len(self.mem)}
+
+
+def get_cache(path=DEFAULT_PATH):
+    """경로별 공용 ResponseCache"""
+    return registry.shared("ai_cache", path, lambda: ResponseCache(path))
@@ -0,0 +1,54 @@
+import time
+
+import prompts
+import report_parser
+
+# ---------------------------------------------------------
+# [스트리밍 출력] GPT 응답을 토큰 단위로 받아 화면에 바로 표시
+# - 전체 완료(8~15초)를 기다리지 않고 첫 토큰부터 렌더링
+# - '종합 판정' 줄이 도착하는 즉시 신호등 색상(css)을 결정
+# ---------------------------------------------------------
+RENDER_INTERVAL = 0.05  # 화면 갱신 최소 간격 (초) - 토큰마다 다시 그리면 오히려 느려짐
+
+
+def verdict_css(text):
+    """판정 줄이 완성됐으면 css 클래스, 아직이면 None"""
+    for marker in report_parser.VERDICT_MARKERS:
+        idx = text.find(marker)
+        if idx < 0: continue
+        seg = text[idx + len(marker):]
+        # 판정 줄(또는 선택지 목록 바로 다음 줄)까지 도착해야 확정
+        found = [(seg.find(emoji), css) for emoji, _, css in report_parser.VERDICTS if emoji in seg]
+        if not found: return None
+        pos, css = min(found)
+        if "\n" not in seg[pos:]: return None
+        return css
+    return None
+
+
+def stream_report(client, messages, temperature, on_text, model="gpt-4o", on_usage=None, **kwargs):
+    """스트리밍으로 리포트를 생성. 받는 동안 on_text(누적 텍스트) 호출, 최종 텍스트 반환
+    on_usage 를 주면 완료 후 on_usage(토큰 사용량 dict, 첫 토큰까지 초, 전체 초) 호출"""
+    if on_usage is not None: kwargs.setdefault("stream_options", {"include_usage": True})
+    start = time.perf_counter()
+    stream = client.chat.completions.create(model=model, messages=messages, temperature=temperature,
+                                            stream=True, **kwargs)
+    parts = []
+    last_render = 0
+    ttft = usage = None
+    for chunk in stream:
+        # include_usage: 마지막 청크는 choices 없이 usage 만 담겨 옴
+        if getattr(chunk, "usage", None) is not None: usage = prompts.usage_of(chunk)
+        if not chunk.choices: continue
+        delta = chunk.choices[0].delta.content
+        if not delta: continue
+        if ttft is None: ttft = time.perf_counter() - start
+        parts.append(delta)
+        now = time.time()
+        if now - last_render >= RENDER_INTERVAL:
+            on_text("".join(parts))
+            last_render = now
+    text = "".join(parts)
+    on_text(text)
+    if on_usage is not None: on_usage(usage, ttft, time.perf_counter() - start)
+    return text
@@ -1,12 +1,30 @@
 import streamlit as st
-import gspread
 from oauth2client.service_account import ServiceAccountCredentials
 from datetime import datetime, timedelta
 import openai
-import requests
 import pandas as pd
-import re
-import time  # 안정성을 위한 시간 지연 모듈 추가
+import time
+import map_db  # [업그레이드] 프로세스 공용 DB 연결 (rerun 마다 재인증 X)
+import log_store  # [업그레이드] 대시보드 증분 캐시 (필터 변경 시 재다운로드 X)
+import write_queue  # [업그레이드] 쓰기 지연 큐 (append_rows 일괄 저장)
+import spool  # [업그레이드] 로컬 SQLite(WAL) 스풀 - 시트 장애/재시작에도 기록 유실 없음
+import ai_cache  # [업그레이드] 동일 조합 GPT 응답 캐시 (수 초 → 수 ms)
+import ai_stream  # [업그레이드] 토큰 스트리밍 출력
+import rule_engine  # [업그레이드] 명확한 GO/STOP 은 로컬 규칙으로 즉시 판정
+import kakao  # [업그레이드] 카톡 백그라운드 디스패처
+import pipeline  # [업그레이드] 저장/알림 병렬 실행
+import batch  # [업그레이드] 예약 명단 일괄 스크리닝
+import log_schema  # [업그레이드] 타입 지정 로그 (datetime/category)
+import rollups  # [업그레이드] KPI 사전 집계 (저장 시 카운터 증가)
+import log_query  # [업그레이드] 로그 조회 API (필터/검색/페이지 단위 조회)
+import export  # [업그레이드] 청크 단위 로그 내보내기 (csv/csv.gz/xlsx)
+import shards  # [업그레이드] 월/지점별 워크시트 샤딩
+import blobs  # [업그레이드] 리포트 원문은 로컬 압축 파일, 시트에는 판정/요약/해시만
+import storage  # [업그레이드] 저장소 추상화 (로컬 SQLite 원본 + 구글 시트 미러)
+import prompts  # [업그레이드] 고정 시스템 프롬프트 + 출력 토큰 예산 + 사용량 기록
+import tracing  # [업그레이드] 단계별 소요시간 기록 (관리자 '성능' 패널)
+import shared_state  # [업그레이드] 세션/상태 파일 공유 → 워커 여러 개로 수평 확장
+import submit  # [업그레이드] PT 제출 파이프라인 (분석 → 파싱 → blob → 저장 ∥ 카톡)
 
 # -----------------------------------------------------------------------------
 # 1. 시스템 설정 & 스타일 (Clean & Luxury White)
@@ -64,57 +82,187 @@ st.markdown("""
 def get_korea_timestamp():
     return (datetime.utcnow() + timedelta(hours=9)).strftime("%Y-%m-%d %H:%M:%S")
 
-def extract_kakao_message(full_text):
-    try:
-        match = re.search(r"3\. 💬 카카오톡 전송 템플릿\s*-+\s*(.*?)\s*-+", full_text, re.DOTALL)
-        if match: return match.group(1).strip()
-        return full_text[-200:]
-    except: return full_text[:100]
+def load_credentials():
+    return ServiceAccountCredentials.from_json_keyfile_dict(dict(st.secrets["gcp_service_account"]), map_db.SCOPE)
+
+def get_db():
+    return map_db.get_connection("secrets", load_credentials)
 
 def connect_db():
     try:
+        if STORAGE == "sqlite": return get_storage().get_sheet()
         if "gcp_service_account" not in st.secrets: return None, "Secrets 설정 누락"
-        scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(dict(st.secrets["gcp_service_account"]), scope)
-        client = gspread.authorize(creds)
-        return client.open("MAP_DATABASE").sheet1, "✅ DB 연결됨"
+        return get_db().get_sheet()
     except Exception as e: return None, str(e)
 
-def send_kakao_message(text):
+# [업그레이드] 카톡 전송은 백그라운드 디스패처로 (세션 재사용 + 속도 제한 + 재시도)
+def get_kakao():
+    return kakao.get_dispatcher("app", lambda: st.secrets["KAKAO_TOKEN"],
+                                st.secrets.get("KAKAO_API_URL", kakao.KAKAO_API_URL))
+
+def enqueue_kakao(text, wait=0):
+    """(msg_id, state, detail) - 세션 상태를 건드리지 않으므로 파이프라인 스레드에서 호출 가능"""
     try:
-        if "KAKAO_TOKEN" not in st.secrets: return False, "토큰 없음"
-        url = "https://kapi.kakao.com/v2/api/talk/memo/default/send"
-        headers = {"Authorization": "Bearer " + st.secrets["KAKAO_TOKEN"]}
-        data = {"template_object": str({"object_type": "text", "text": text, "link": {"web_url": "https://streamlit.io"}})}
-        res = requests.post(url, headers=headers, data=data, timeout=5) # 타임아웃 추가
-        return (True, "성공") if res.status_code == 200 else (False, f"실패({res.status_code})")
-    except Exception as e: return False, str(e)
-
-# [업그레이드] 저장 실패 시 3번 재시도하는 로직 추가 (안정성 강화)
-def safe_append_row(sheet, row, retries=3):
-    last_err = None
-    for i in range(retries):
-        try:
-            sheet.append_row(row, value_input_option="USER_ENTERED")
-            return True, None
-        except Exception as e:
-            last_err = str(e)
-            time.sleep(1) # 1초 대기 후 재시도
-    return False, last_err
+        if "KAKAO_TOKEN" not in st.secrets: return None, "failed", "토큰 없음"
+        d = get_kakao()
+        msg_id, err = d.send(text)
+        if msg_id is None: return None, "failed", err
+        state, detail = d.wait(msg_id, wait)
+        return msg_id, state, detail
+    except Exception as e: return None, "failed", str(e)
+
+def track_kakao(msg_id, kind):
+    st.session_state.setdefault("my_kakao", []).append((msg_id, kind, get_korea_timestamp()))
+
+def send_kakao_message(text, kind="PT"):
+    """전송 대기열에 등록하고 (ok, 메시지) 반환. 실제 전송 결과는 사이드바에서 확인"""
+    msg_id, state, detail = enqueue_kakao(text)
+    if msg_id is None: return False, detail
+    track_kakao(msg_id, kind)
+    return True, "전송 대기열 등록"
+
+# [업그레이드] 신호등 박스 렌더링 - 판정 줄이 도착하기 전까지는 중립 색상
+def render_result(area, text, css=None):
+    css = css if css is not None else (ai_stream.verdict_css(text) or "")
+    area.markdown(f"<div class='result-box {css}'>{text}</div>", unsafe_allow_html=True)
+
+# [업그레이드] 동기 append_row + 1초 재시도 → 쓰기 지연 큐로 교체
+# 행은 먼저 로컬 스풀에 fsync 커밋된 뒤, 백그라운드에서 모아서 append_rows 1회로 저장 (백오프/429 대응 포함)
+# 시트 H열(8번째)에 행 UUID 를 함께 기록 → 재전송 시 중복 저장 방지
+WRITE_WAIT = 0     # 화면에서 시트 전송을 기다리지 않음 (스풀 커밋 = 저장 완료)
+ROW_ID_COLUMN = 8
+
+# 앱은 지점별 배포 - 이 배포의 모든 워커가 같은 BRANCH_NAME 으로 기록
+BRANCH_NAME = st.secrets.get("BRANCH_NAME", "킹스짐 1호점 (본점)")
+
+# [업그레이드] 워커(프로세스) 여러 개가 같은 상태를 보도록 SQLite 상태 파일을 STATE_DIR 에 모음
+# (세션 / AI 캐시 / KPI 집계 / 스풀 / 로컬 DB / blob / 추적 로그) → 어느 워커가 요청을 받아도 같은 결과
+# STATE_DIR 을 여러 지점이 같이 써도 지점별 하위 디렉터리로 나뉨 → KPI 집계 / 재집계가 다른 지점 기록과 섞이지 않음
+STATE_DIR = st.secrets.get("STATE_DIR", "")
+
+def state_path(name):
+    return shared_state.path_in(shared_state.scoped_dir(STATE_DIR, BRANCH_NAME), name)
+
+def get_sessions():
+    return shared_state.get_session_store(st.secrets.get("SESSION_PATH", state_path(shared_state.DEFAULT_PATH)))
+
+def shared_sid():
+    """URL ?sid= 의 관리자 세션 토큰 (로그인할 때만 발급)"""
+    return st.query_params.get("sid")
+
+def get_cache():
+    return ai_cache.get_cache(st.secrets.get("AI_CACHE_PATH", state_path(ai_cache.DEFAULT_PATH)))
+
+# [업그레이드] 저장되는 행마다 (날짜, 지점, 유형, 판정) KPI 카운터 증가
+
+def get_rollups():
+    return rollups.get_rollups(st.secrets.get("ROLLUP_PATH", state_path(rollups.DEFAULT_PATH)))
+
+def spool_rollup_keys():
+    """재집계 시 합칠 스풀 대기분 (저장 시 이미 집계됐지만 아직 시트에 없는 행)
+    - STORAGE=sqlite 면 원본 DB 에 이미 있으므로 제외 (스풀은 시트 복제용)"""
+    if get_storage().local: return []
+    pending = get_spool().pending()
+    return [submit.rollup_key(row[0], row[1], submit.row_verdict(row), BRANCH_NAME) for _, row in pending]
+
+# 관리자 로그 뷰어: 필터 이름 → Type 값 (None = 전체)
+LOG_FILTERS = {"전체 보기": None, "PT 리포트만": [log_schema.PT_TYPE], "시설 점검만": [log_schema.FACILITY_TYPE]}
+
+def get_log_index():
+    # app 로그 열 구성: 시설 점검 행의 Detail4 = 점검자 / RawData 는 blob 원문으로 색인 (리포트 내용 검색)
+    return log_query.get_log_index("app_logs", {"staff": "Detail4"}, resolve=get_blobs().resolve)
+
+LOG_COLUMNS = ["Timestamp", "Type", "Detail1", "Detail2", "Detail3", "Detail4", "RawData"]
+
+def get_blobs():
+    return blobs.get_blob_store(st.secrets.get("BLOB_ROOT", state_path(blobs.DEFAULT_ROOT)))
+
+def get_router():
+    # [업그레이드] SHARD_BY = "month" 또는 "month,branch" 설정 시 월(·지점)별 탭으로 나눠 저장 (미설정 = sheet1)
+    by = [p.strip() for p in str(st.secrets.get("SHARD_BY", "")).split(",") if p.strip()]
+    if not by: return None
+    return shards.get_router("app_logs", get_db(), by, header=LOG_COLUMNS + ["RowId"],
+                             branch_of=lambda row: BRANCH_NAME)
+
+# [업그레이드] STORAGE = "sqlite" 이면 로컬 DB 가 원본 (기록/조회 ms 단위, 구글 없이도 동작)
+# 구글 시트는 SHEETS_MIRROR 가 켜져 있을 때만 백그라운드로 복제
+STORAGE = st.secrets.get("STORAGE", "sheets")
+SHEETS_MIRROR = bool(st.secrets.get("SHEETS_MIRROR", "gcp_service_account" in st.secrets))
+
+def get_storage():
+    if STORAGE == "sqlite":
+        return storage.get_sqlite_backend(st.secrets.get("LOCAL_DB_PATH", state_path(storage.DEFAULT_PATH)), "app_logs",
+                                          LOG_COLUMNS + ["RowId"], BRANCH_NAME)
+    return storage.SheetsBackend(get_router() or get_db(), LOG_COLUMNS + ["RowId"], BRANCH_NAME)
+
+def get_spool():
+    return spool.get_spool(st.secrets.get("SPOOL_PATH", state_path(spool.DEFAULT_PATH)))
+
+def get_write_queue():
+    backend = get_storage()
+    spool_db = get_spool()
+    if backend.local:
+        mirror = (get_router() or get_db()).get_sheet if SHEETS_MIRROR else None
+        return write_queue.get_write_queue("app_logs", mirror, on_error=get_db().reset,
+                                           spool=spool_db if mirror else None, id_column=ROW_ID_COLUMN,
+                                           listeners=[submit.rollup_listener(get_rollups(), BRANCH_NAME)], primary=backend)
+    return write_queue.get_write_queue("app_logs", backend.get_sheet, on_error=get_db().reset,
+                                       spool=spool_db, id_column=ROW_ID_COLUMN,
+                                       listeners=[submit.rollup_listener(get_rollups(), BRANCH_NAME)])
+
+def enqueue_row(row, wait=WRITE_WAIT, row_id=None, record=None):
+    """(row_id, state, err) - 세션 상태를 건드리지 않으므로 파이프라인 스레드에서 호출 가능
+    record: 이미 파싱된 리포트 기록 (KPI 집계가 리포트를 다시 파싱하지 않도록 큐 리스너에 전달)"""
+    try:
+        q = get_write_queue()
+        row_id = q.submit(row, row_id, record)
+    except Exception as e:
+        return None, "failed", str(e)
+    state, err = q.wait(row_id, wait)
+    return row_id, state, err
+
+def track_write(row_id, row):
+    st.session_state.setdefault("my_writes", []).append((row_id, row[1], row[0]))
+    # 관리자 세션이면 다른 워커로 재연결돼도 저장 상태를 이어서 볼 수 있게 공유 세션에도 기록 (상태 조회는 공유 스풀)
+    if st.session_state.get("admin_logged_in") and shared_sid():
+        get_sessions().update(shared_sid(), my_writes=st.session_state.my_writes[-10:])
+
+def safe_append_row(row, wait=WRITE_WAIT):
+    """행을 스풀/큐에 넣고 (state, err) 반환. state: sent / queued(로컬 보관됨) / stored(원본만 기록) / failed"""
+    row_id, state, err = enqueue_row(row, wait)
+    if row_id: track_write(row_id, row)
+    return state, err
+
+# [업그레이드] PT 제출 후처리: 저장과 카톡 알림은 서로 독립 → 병렬 실행 (submit.PTSubmitter 의 단계 함수)
+def persist_stage(row, row_id=None, record=None):
+    row_id, state, err = enqueue_row(row, row_id=row_id, record=record)
+    return state != "failed", (row_id, state, err)
+
+def notify_stage(text):
+    msg_id, state, detail = enqueue_kakao(text, wait=submit.NOTIFY_TIMEOUT - 0.5)
+    return state != "failed", (msg_id, state, detail)
 
 # -----------------------------------------------------------------------------
 # 3. 사이드바 (로그인 & 상태)
 # -----------------------------------------------------------------------------
 st.sidebar.title("🔐 관리자 접속")
 
+# [업그레이드] 로그인 상태는 공유 세션 저장소에서 복원 (워커 재시작/다른 워커 연결에도 유지)
 if "admin_logged_in" not in st.session_state:
-    st.session_state.admin_logged_in = False
+    shared = get_sessions().get(shared_sid()) or {}
+    st.session_state.admin_logged_in = bool(shared.get("admin"))
+    if shared.get("admin") and shared.get("my_writes"):
+        st.session_state.my_writes = [tuple(w) for w in shared["my_writes"]]
 
 if not st.session_state.admin_logged_in:
     password = st.sidebar.text_input("비밀번호", type="password")
     if st.sidebar.button("로그인"):
         if password == "1234": 
             st.session_state.admin_logged_in = True
+            # 로그인마다 새 토큰 발급 (URL 에 남아 있던 기존 sid 는 폐기 → 세션 고정 방지)
+            if shared_sid(): get_sessions().delete(shared_sid())
+            st.query_params["sid"] = get_sessions().create(
+                {"admin": True, "my_writes": st.session_state.get("my_writes", [])[-10:]})
             st.rerun()
         else:
             st.sidebar.error("비밀번호 오류")
@@ -122,10 +270,31 @@ else:
     st.sidebar.success("👑 관리자님 환영합니다")
     if st.sidebar.button("로그아웃"):
         st.session_state.admin_logged_in = False
+        if shared_sid(): get_sessions().delete(shared_sid())
+        st.query_params.pop("sid", None)
         st.rerun()
 
+# [업그레이드] 이번 세션에서 보낸 기록의 저장 상태 (행 단위)
+if st.session_state.get("my_writes"):
+    with st.sidebar.expander("💾 저장 상태", expanded=False):
+        q = get_write_queue()
+        for row_id, kind, ts in reversed(st.session_state.my_writes[-10:]):
+            state, err = q.get_status(row_id)
+            icon = {"sent": "✅", "queued": "⏳", "stored": "⚠️", "failed": "❌"}.get(state, "❔")
+            st.caption(f"{icon} {ts} {kind}" + (f" ({err})" if err else ""))
+
+# [업그레이드] 이번 세션에서 보낸 카톡 전송 상태
+if st.session_state.get("my_kakao"):
+    with st.sidebar.expander("💬 카톡 전송 상태", expanded=False):
+        d = get_kakao()
+        for msg_id, kind, ts in reversed(st.session_state.my_kakao[-10:]):
+            state, detail = d.get_status(msg_id)
+            icon = {"sent": "✅", "queued": "⏳", "sending": "📤", "failed": "❌"}.get(state, "❔")
+            st.caption(f"{icon} {ts} {kind}" + (f" ({detail})" if state == "failed" else ""))
+
 sheet, db_msg = connect_db()
-if not sheet: st.error(f"DB 연결 실패: {db_msg}")
+# [업그레이드] 시트가 끊겨도 기록은 로컬 스풀에 보관 → 연결 복구 시 자동 전송
+if not sheet: st.warning(f"DB 연결 실패 (오프라인 모드: 기록은 로컬 보관 후 자동 동기화): {db_msg}")
 
 if "OPENAI_API_KEY" in st.secrets:
     ai_client = openai.OpenAI(api_key=st.secrets["OPENAI_API_KEY"])
@@ -202,6 +371,66 @@ You MUST output the response in the following structured sections using Markdown
 ---
 """
 
+# [업그레이드] 시스템 프롬프트는 모든 호출에서 동일 (프롬프트 캐싱), 요청별 값은 user 메시지로
+# 섹션별 출력 토큰 예산 → max_tokens 상한
+PT_SLOTS = ["Timestamp", "Client_Tag", "Exercise_Summary"]
+PT_BUDGETS = {"1. 현장 안전 리포트": 500, "2. 정밀 분석 로그": 300, "3. 카카오톡 전송 템플릿": 350}
+PT_PREFIX = prompts.static_prefix(MAP_CORE_PROMPT, PT_SLOTS, PT_BUDGETS)
+PT_MAX_TOKENS = prompts.max_tokens_for(PT_BUDGETS)
+
+def build_pt_messages(member, symptom, exercise):
+    return prompts.build_messages(PT_PREFIX, {
+        "Timestamp": get_korea_timestamp(),
+        "Client_Tag": member,
+        "Exercise_Summary": exercise,
+        "Member": member,
+        "Symptom": symptom,
+        "Exercise": exercise,
+    })
+
+def record_usage(source):
+    def record(usage, ttft, elapsed):
+        prompts.get_usage_log().record(source, usage, ttft, elapsed)
+        get_tracer().record("openai.stream", elapsed, ttft_ms=round(ttft * 1000, 1) if ttft else None, **(usage or {}))
+    return record
+
+def get_tracer():
+    return tracing.get_tracer(st.secrets.get("TRACE_PATH", state_path(tracing.TRACE_PATH)))
+
+# 단건 제출 / 일괄 스크리닝이 같은 캐시 항목을 쓰도록 키는 submit.cache_key 로만 생성
+def pt_cache_key(member, symptom, exercise):
+    return submit.cache_key(PT_PREFIX, member, symptom, exercise)
+
+# [업그레이드] 단건 PT 제출 파이프라인 (bench.py 와 같은 코드)
+def get_submitter():
+    return submit.PTSubmitter(PT_PREFIX, build_pt_messages, get_cache(), ai_client, get_blobs(),
+                              persist_stage, notify_stage, now=get_korea_timestamp,
+                              max_tokens=PT_MAX_TOKENS, on_usage=record_usage("pt"), tracer=get_tracer())
+
+# [업그레이드] 일괄 스크리닝용 분석 (규칙 엔진 → 캐시 → GPT 순서, 스트리밍 없음)
+def analyze_case(member, symptom, exercise, limiter=None):
+    rule = rule_engine.classify(member, symptom, exercise)
+    if rule: return rule_engine.render_report(rule, member, symptom, exercise, get_korea_timestamp()), "rule"
+    cache = get_cache()
+    cache_key = pt_cache_key(member, symptom, exercise)
+    report = cache.get(cache_key, member, get_korea_timestamp())
+    if report is not None: return report, "cache"
+    if not ai_client: raise RuntimeError("AI 연결 없음")
+    call = lambda: ai_client.chat.completions.create(
+        model="gpt-4o",
+        messages=build_pt_messages(member, symptom, exercise),
+        temperature=0.3,
+        max_tokens=PT_MAX_TOKENS
+    )
+    start = time.perf_counter()
+    response = limiter(call) if limiter else call()
+    elapsed = time.perf_counter() - start
+    prompts.get_usage_log().record("batch", prompts.usage_of(response), elapsed=elapsed)
+    get_tracer().record("openai.batch", elapsed, **(prompts.usage_of(response) or {}))
+    report = response.choices[0].message.content
+    cache.put(cache_key, report, member)
+    return report, "ai"
+
 # -----------------------------------------------------------------------------
 # 5. 메인 UI (Dashboard Layout)
 # -----------------------------------------------------------------------------
@@ -246,56 +475,92 @@ with tab1:
             btn = st.form_submit_button("🚀 안전 분석 실행 (Click)", use_container_width=True)
 
     if btn:
-        if ai_client and sheet:
+        # [업그레이드] 명확한 케이스는 로컬 규칙 엔진으로 판정 (AI 연결 없이도 동작)
+        rule = rule_engine.classify(member, detail_symptom, exercise)
+        if not ai_client and not rule:
+            st.error("AI 연결이 없어 이 조합은 판정할 수 없습니다. (OPENAI_API_KEY 확인)")
+        else:
             final_symptom = detail_symptom
+            result_area = st.empty()  # [업그레이드] 리포트는 스트리밍으로 이 자리에 실시간 표시
             
             # [업그레이드] st.spinner 대신 더 고급스러운 st.status 사용
             with st.status("🧠 AI 안전 엔진 가동 중...", expanded=True) as status:
                 try:
                     status.write("🔍 1단계: 회원 컨디션 정밀 파악 중...")
-                    final_prompt = MAP_CORE_PROMPT.format(
-                        Timestamp=get_korea_timestamp(),
-                        Client_Tag=member,
-                        Exercise_Summary=exercise
-                    )
-                    final_prompt += f"\n\n[INPUT DATA]\nMember: {member}\nSymptom: {final_symptom}\nExercise: {exercise}\n\nAnalyze now."
-
-                    status.write("⚖️ 2단계: 생체역학적 부상 위험도 계산 중...")
-                    response = ai_client.chat.completions.create(
-                        model="gpt-4o",
-                        messages=[{"role": "system", "content": final_prompt}],
-                        temperature=0.3
-                    )
-                    full_res = response.choices[0].message.content
+                    # [업그레이드] 규칙 엔진 → 캐시(일괄 스크리닝과 같은 키) → 스트리밍 GPT → 리포트 1회 파싱
+                    # → 원문은 blob 저장소, 시트에는 판정 + 요약 + 해시 → 저장 ∥ 카톡 (submit.PTSubmitter)
+                    sub = get_submitter().run(
+                        member, final_symptom, exercise, send_kakao=send_k, rule=rule,
+                        on_step=status.write,
+                        on_text=lambda text: render_result(result_area, text + " ▌"),
+                        on_report=lambda text, record: render_result(result_area, text, record.css))
+                    results = sub.results
+
+                    # 세션 기록(사이드바 상태)은 메인 스레드에서만 갱신
+                    p_res = results["persist"]
+                    if (p_res.value and p_res.value[0]) or p_res.timed_out: track_write(sub.row_id, sub.row)
+                    n_res = results.get("notify")
+                    if n_res and n_res.value and n_res.value[0]: track_kakao(n_res.value[0], "PT")
                     
-                    status.write("💾 3단계: 안전 데이터베이스 암호화 저장 중...")
-                    kakao_msg = extract_kakao_message(full_res)
-                    
-                    # [업그레이드] 재시도 로직이 포함된 함수 사용
-                    ok, err = safe_append_row(sheet, [get_korea_timestamp(), "PT_SAFETY_LOG", member, final_symptom, exercise, "DONE", full_res[:4000]])
-                    
-                    if ok:
-                        status.update(label="✅ 분석 및 저장 완료! 결과를 확인하세요.", state="complete", expanded=False)
-                        
-                        # 시각적 결과 표시 (신호등 로직)
-                        if "⛔" in full_res: css = "res-stop"
-                        elif "⚠️" in full_res: css = "res-mod"
-                        else: css = "res-go"
-                        
-                        st.markdown(f"<div class='result-box {css}'>{full_res}</div>", unsafe_allow_html=True)
-
-                        if send_k:
-                            k_ok, k_err = send_kakao_message(kakao_msg)
-                            if k_ok: st.success("💬 카카오톡 전송 성공")
-                            else: st.warning(f"카톡 전송 실패: {k_err}")
+                    if p_res.ok:
+                        w_state = p_res.value[1]
+                        if w_state == "sent": status.update(label="✅ 분석 및 저장 완료! 결과를 확인하세요.", state="complete", expanded=False)
+                        else: status.update(label="✅ 분석 및 저장 완료! (시트 동기화는 백그라운드 진행 - 사이드바에서 확인)", state="complete", expanded=False)
+                        if w_state == "stored": st.warning(f"원본 저장 완료, {p_res.value[2]} (시트 동기화는 이 서버가 재시작되면 누락될 수 있음)")
+                    elif p_res.timed_out:
+                        # 기다리기만 멈춘 것 → 큐/스풀에 들어갔거나 곧 기록될 수 있음 (실패로 단정하지 않음)
+                        status.update(label="⏳ 분석 완료 · 저장 결과 확인 중", state="complete", expanded=False)
+                        st.warning(f"저장 결과를 {submit.PERSIST_TIMEOUT}초 안에 확인하지 못했습니다. 저장은 계속 진행 중일 수 있으니 "
+                                   "다시 제출하지 말고 사이드바 '💾 저장 상태'에서 확인하세요.")
                     else:
                         status.update(label="❌ DB 저장 실패", state="error")
-                        st.error(f"저장 실패 (재시도 했으나 실패함): {err}")
+                        st.error(f"저장 실패 (로컬 보관 불가): {p_res.error if p_res.value is None else p_res.value[2]}")
+
+                    if n_res:
+                        if n_res.ok and n_res.value[1] == "sent": st.success("💬 카카오톡 전송 성공")
+                        elif n_res.ok: st.info("💬 카카오톡 전송 진행 중 (결과는 사이드바에서 확인)")
+                        else: st.warning(f"카톡 전송 실패: {n_res.error if n_res.value is None else n_res.value[2]}")
+                    st.caption("⏱ " + pipeline.timing_summary(results, submit.STAGE_LABELS))
 
                 except Exception as e: 
                     status.update(label="❌ 치명적 오류 발생", state="error")
                     st.error(f"시스템 에러: {e}")
 
+    # [업그레이드] 하루 예약 명단 일괄 스크리닝 (CSV: 회원, 증상, 운동)
+    with st.expander("📂 예약 명단 일괄 스크리닝 (CSV 업로드)"):
+        st.caption("열 이름: 회원 / 증상 / 운동 (헤더가 없으면 이 순서로 인식). 같은 조합은 1번만 분석합니다.")
+        roster = st.file_uploader("예약 명단 CSV", type=["csv"], key="roster_csv")
+        if roster is not None and st.button("🚀 일괄 분석 실행", key="run_batch"):
+            entries, errors = batch.parse_roster(roster.getvalue())
+            for e in errors: st.warning(e)
+            if entries:
+                progress = st.progress(0.0, text=f"0 / {len(entries)}")
+                table = st.empty()
+                results = [None] * len(entries)
+                done = [0]
+
+                def on_result(idxs, res):
+                    for i in idxs: results[i] = res
+                    done[0] += len(idxs)
+                    progress.progress(done[0] / len(entries), text=f"{done[0]} / {len(entries)}")
+                    table.dataframe(pd.DataFrame(batch.result_rows(entries, results)), use_container_width=True)
+
+                batch.screen(entries, analyze_case, PT_PREFIX, on_result=on_result)
+
+                # 결과 전체를 한 번에 저장 (스풀 1 트랜잭션 → 시트 append_rows 1회)
+                # 원문은 blob 저장소에 전체 보관, 시트에는 판정 + 요약 + 해시만 (단건 제출과 동일)
+                done_pairs = [(e, r) for e, r in zip(entries, results) if r and not r["error"]]
+                rows = [submit.pt_row(get_korea_timestamp(), e["member"], e["symptom"], e["exercise"],
+                                      r["report"], r["record"], get_blobs(), status="BATCH")
+                        for e, r in done_pairs]
+                if rows:
+                    try:
+                        ids = get_write_queue().submit_many(rows, records=[r["record"] for _, r in done_pairs])
+                        for row_id, row in zip(ids, rows): track_write(row_id, row)
+                        st.success(f"✅ {len(rows)}건 분석 및 저장 완료 (오류 {len(entries) - len(rows)}건)")
+                    except Exception as e:
+                        st.error(f"저장 실패 (로컬 보관 불가): {e}")
+
 # === [TAB 2] 시설 관리 ===
 with tab2:
     with st.container():
@@ -314,15 +579,18 @@ with tab2:
             save = st.form_submit_button("📝 점검 기록 저장", use_container_width=True)
 
     if save:
-        if sheet and staff:
+        if staff:
             # [업그레이드] 시설 관리에도 재시도 로직 적용
-            ok, err = safe_append_row(sheet, [get_korea_timestamp(), "FACILITY", task, place, memo, staff])
-            if ok:
-                st.success(f"✅ [{task}] 저장 완료")
+            w_state, err = safe_append_row([get_korea_timestamp(), "FACILITY", task, place, memo, staff])
+            if w_state != "failed":
+                if w_state == "sent": st.success(f"✅ [{task}] 저장 완료")
+                else: st.success(f"✅ [{task}] 저장 완료 (시트 동기화는 백그라운드 진행)")
+                if w_state == "stored": st.warning(f"{err} (시트 동기화는 이 서버가 재시작되면 누락될 수 있음)")
                 if send_k_fac:
                     msg = f"[시설 점검 보고]\n시간: {get_korea_timestamp()}\n점검자: {staff}\n유형: {task}\n특이사항: {memo}"
-                    send_kakao_message(msg)
-            else: st.error(f"저장 실패 (네트워크 불안정): {err}")
+                    k_ok, k_err = send_kakao_message(msg, "FACILITY")
+                    if not k_ok: st.warning(f"카톡 보고 실패: {k_err}")
+            else: st.error(f"저장 실패 (로컬 보관 불가): {err}")
         elif not staff:
             st.warning("⚠️ 점검자 이름을 입력해주세요.")
 
@@ -331,42 +599,111 @@ if tab3 and sheet:
     with tab3:
         st.header("👑 관리자 통합 대시보드")
         
-        if st.button("🔄 데이터 새로고침"): st.rerun()
+        # [업그레이드] 전체 시트를 매번 받지 않고, TTL 캐시 + 새로 추가된 행만 가져옴
+        store = log_store.get_log_store(
+            "app_logs", get_storage().get_sheet, columns=LOG_COLUMNS,
+            ttl=int(st.secrets.get("LOG_CACHE_TTL", log_store.DEFAULT_TTL)),
+            typed=True, listeners=[get_log_index().on_ingest],
+            router=None if STORAGE == "sqlite" else get_router(), since=st.secrets.get("LOG_SINCE"),
+            on_error=None if STORAGE == "sqlite" else get_db().reset)  # 읽기 실패도 시트 연결 재생성
+
+        if st.button("🔄 데이터 새로고침"):
+            store.invalidate()
+            st.rerun()
             
         try:
-            data = sheet.get_all_values()
-            if len(data) > 1:
-                df = pd.DataFrame(data[1:], columns=["Timestamp", "Type", "Detail1", "Detail2", "Detail3", "Detail4", "RawData"])
+            df = store.get()
+            if store.last_error: st.caption(f"⚠️ 최신 데이터 동기화 실패 (캐시 표시 중): {store.last_error}")
+            if len(df) > 0:
                 
                 # 통계
                 st.markdown("#### 📊 실시간 현황")
                 m1, m2, m3, m4 = st.columns(4)
                 
-                total = len(df)
-                today_cnt = len(df[df['Timestamp'].str.contains(get_korea_timestamp()[:10], na=False)])
-                pt_cnt = len(df[df['Type'].str.contains("PT", na=False)])
-                fac_cnt = len(df[df['Type'].str.contains("FACILITY", na=False)])
+                # [업그레이드] 사전 집계 테이블에서 바로 조회 (최초 1회 또는 수동 재집계 시에만 전체 로그로 계산)
+                agg = get_rollups()
+                if not agg.is_built() or st.session_state.pop("rebuild_rollups", False):
+                    raw = store.raw.reindex(df.index) if store.raw is not None else pd.Series("", index=df.index)
+                    keys = [submit.rollup_key(ts, t, rollups.verdict_label(r) if t == log_schema.PT_TYPE else "", BRANCH_NAME)
+                            for ts, t, r in zip(df["Timestamp"].dt.strftime("%Y-%m-%d"), df["Type"].astype(str), raw)]
+                    agg.rebuild(keys + spool_rollup_keys())
+                today = get_korea_timestamp()[:10]
                 
-                m1.metric("총 데이터", f"{total}건")
-                m2.metric("오늘 기록", f"{today_cnt}건", "+New")
-                m3.metric("PT 리포트", f"{pt_cnt}건")
-                m4.metric("시설 점검", f"{fac_cnt}건")
+                m1.metric("총 데이터", f"{agg.total()}건")
+                m2.metric("오늘 기록", f"{agg.total(day=today)}건", "+New")
+                m3.metric("PT 리포트", f"{agg.total(type=log_schema.PT_TYPE)}건")
+                m4.metric("시설 점검", f"{agg.total(type=log_schema.FACILITY_TYPE)}건")
+                v = agg.by("verdict", type=log_schema.PT_TYPE)
+                st.caption(f"판정별 PT 리포트: ⛔ {v.get('⛔', 0)}건 / ⚠️ {v.get('⚠️', 0)}건 / ✅ {v.get('✅', 0)}건")
+                if st.button("🔁 KPI 재집계 (전체 로그 기준)"):
+                    st.session_state.rebuild_rollups = True
+                    st.rerun()
+                
+                c_stats = get_cache().stats()
+                st.caption(f"⚡ AI 응답 캐시: 적중 {c_stats['hits']}건 / 미적중 {c_stats['misses']}건 (적중률 {c_stats['hit_rate']:.0%}, 보관 {c_stats['entries']}건)")
+                u = prompts.get_usage_log().summary()
+                if u["calls"]:
+                    ttft = f"{u['ttft']:.2f}초" if u["ttft"] is not None else "-"
+                    st.caption(f"🧮 GPT 호출 {u['calls']}건 평균: 입력 {u['prompt']:.0f} / 출력 {u['completion']:.0f} 토큰, "
+                               f"프롬프트 캐시 {u['cached_rate']:.0%}, 첫 토큰 {ttft}")
+                
+                # [업그레이드] 성능 패널: 단계별 p50/p95/p99 (시트 / OpenAI / 카톡 중 병목 확인)
+                with st.expander("⏱️ 성능 (단계별 소요시간)"):
+                    tracer = get_tracer()
+                    perf_day = st.date_input("기준일", value=datetime.strptime(get_korea_timestamp()[:10], "%Y-%m-%d").date(), key="perf_day")
+                    perf = tracer.stats(perf_day)
+                    if perf:
+                        st.dataframe(pd.DataFrame.from_dict(perf, orient="index")
+                                     .rename(columns={"count": "건수", "errors": "실패", "p50": "p50(ms)", "p95": "p95(ms)", "p99": "p99(ms)"}),
+                                     use_container_width=True)
+                        if st.button("📤 추적 기록 내보내기 (JSON Lines)"):
+                            st.download_button("📥 다운로드", tracer.export(perf_day).encode("utf-8"), f"map_traces_{perf_day}.jsonl", "application/x-ndjson")
+                    else:
+                        st.caption("해당 날짜의 추적 기록이 없습니다. (최근 기록은 메모리에만 보관, TRACE_PATH 파일에 누적)")
                 
                 st.divider()
                 
                 # 로그 뷰어
                 st.markdown("#### 📋 전체 로그 데이터")
-                filter_opt = st.selectbox("필터링 옵션", ["전체 보기", "PT 리포트만", "시설 점검만"])
-                
-                view_df = df
-                if filter_opt == "PT 리포트만": view_df = df[df['Type'].str.contains("PT", na=False)]
-                elif filter_opt == "시설 점검만": view_df = df[df['Type'].str.contains("FACILITY", na=False)]
+                ix = get_log_index()
+                f1, f2, f3 = st.columns([1, 1, 2])
+                filter_opt = f1.selectbox("필터링 옵션", list(LOG_FILTERS))
+                staff_q = f2.text_input("점검자")
+                text_q = f3.text_input("🔍 검색 (회원명, 증상, 리포트 내용 등)")
+                d1, d2, d3 = st.columns([2, 1, 1])
+                period = d1.date_input("기간", value=())
+                page_size = d2.selectbox("페이지당 건수", [25, 50, 100, 200], index=1)
                 
-                view_df = view_df.sort_values(by="Timestamp", ascending=False)
-                st.dataframe(view_df, use_container_width=True)
+                # [업그레이드] 조건에 맞는 한 페이지만 조회 → 전체 로그를 화면으로 보내지 않음
+                cond = dict(types=LOG_FILTERS[filter_opt], staff=staff_q.strip() or None, text=text_q,
+                            start=period[0] if len(period) > 0 else None,
+                            end=period[-1] if len(period) > 0 else None)
+                _, total = ix.query(page_size=1, **cond)
+                pages = max((total + page_size - 1) // page_size, 1)
+                page = d3.number_input(f"페이지 (총 {pages})", min_value=1, max_value=pages, step=1)
+                ids, total = ix.query(page=int(page), page_size=page_size, **cond)
+                st.caption(f"검색 결과 {total}건 중 {len(ids)}건 표시")
+                st.dataframe(df.loc[ids], use_container_width=True)
+
+                # 리포트 원문(RawData)은 표에서 분리 → 선택한 기록만 표시
+                raw_idx = st.number_input("🔎 리포트 원문 보기 (행 번호)", min_value=0, max_value=max(len(df) - 1, 0), step=1)
+                if st.button("원문 열기"):
+                    st.markdown(get_blobs().resolve(store.get_raw(int(raw_idx))) or "(원문 없음)")
                 
-                csv = view_df.to_csv(index=False).encode('utf-8-sig')
-                st.download_button("📥 엑셀(CSV) 다운로드", csv, "map_logs.csv", "text/csv")
+                # [업그레이드] 내보내기 파일은 버튼을 눌렀을 때만 청크 단위로 생성 (같은 조건이면 최근 파일 재사용)
+                e1, e2 = st.columns([1, 3])
+                fmt = e1.selectbox("내보내기 형식", list(export.FORMATS))
+                exporter = export.get_exporter()
+                key = export.filter_key(fmt, source="app_logs", total=total, **cond)
+                art = exporter.get(key)
+                if art is None and e2.button(f"📦 내보내기 파일 만들기 ({total}건)"):
+                    with st.spinner("파일 생성 중..."):
+                        art = exporter.export(key, fmt, export.frame_chunks(store, ix.iter_ids(export.CHUNK_ROWS, **cond),
+                                                                        resolve=get_blobs().resolve))
+                if art:
+                    mime, ext = export.FORMATS[fmt]
+                    with open(art[0], "rb") as f:
+                        e2.download_button(f"📥 다운로드 ({art[1]}건)", f, f"map_logs.{ext}", mime)
             else:
                 st.info("데이터가 없습니다.")
         except Exception as e:
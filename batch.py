@@ -0,0 +1,125 @@
+import csv
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import ai_cache
+import report_parser
+from ratelimit import TokenBucket
+from write_queue import backoff_delay, status_code_of
+
+# ---------------------------------------------------------
+# [일괄 스크리닝] 하루 예약 명단(CSV)을 한 번에 분석
+# - 같은 입력(정규화 기준)은 1번만 분석 후 결과 공유
+# - 동시 실행 수 제한 + 분당 요청 수 제한, 429 는 백오프 후 재시도
+# - 결과는 호출한 스레드에서 완료 순서대로 콜백 → 진행 표 갱신
+# ---------------------------------------------------------
+MAX_WORKERS = 4
+REQUESTS_PER_MINUTE = 60
+MAX_ATTEMPTS = 5
+MAX_ROWS = 500
+
+# CSV 헤더 별칭 (한글/영문 모두 허용)
+COLUMNS = {
+    "member": ["member", "회원", "회원정보", "회원 정보", "회원 특이사항", "특이사항"],
+    "symptom": ["symptom", "증상", "현재 증상", "통증", "통증 부위"],
+    "exercise": ["exercise", "운동", "예정 운동", "수행 예정 운동", "운동 계획"],
+}
+
+
+def parse_roster(data):
+    """CSV(bytes 또는 str) → ([{member, symptom, exercise}], [오류 메시지])"""
+    if isinstance(data, bytes): data = data.decode("utf-8-sig", errors="replace")
+    reader = csv.reader(io.StringIO(data))
+    rows = [r for r in reader if any(c.strip() for c in r)]
+    if not rows: return [], ["빈 파일입니다."]
+
+    header = [c.strip().lower() for c in rows[0]]
+    index = {}
+    for field, aliases in COLUMNS.items():
+        for a in aliases:
+            if a.lower() in header:
+                index[field] = header.index(a.lower())
+                break
+    if not index:
+        # 헤더가 없으면 (회원, 증상, 운동) 순서로 간주
+        index = {"member": 0, "symptom": 1, "exercise": 2}
+    else:
+        # 별칭이 하나라도 맞으면 헤더 행 (회원 정보로 분석하지 않음)
+        rows = rows[1:]
+        if "exercise" not in index:
+            return [], [f"운동 열을 찾을 수 없습니다. (헤더: {', '.join(COLUMNS['exercise'][:3])} 중 하나)"]
+
+    entries, errors = [], []
+    for n, r in enumerate(rows[:MAX_ROWS], start=1):
+        e = {f: (r[index[f]].strip() if f in index and index[f] < len(r) else "") for f in COLUMNS}
+        if not e["exercise"]:
+            errors.append(f"{n}행: 운동 항목 누락")
+            continue
+        if not e["symptom"]: e["symptom"] = "특이사항 없음"
+        entries.append(e)
+    if len(rows) > MAX_ROWS: errors.append(f"최대 {MAX_ROWS}행까지만 처리합니다.")
+    return entries, errors
+
+
+def call_with_retry(fn, bucket=None):
+    """OpenAI 호출: 속도 제한 토큰을 얻은 뒤 실행, 429/5xx 는 백오프 재시도"""
+    for attempt in range(MAX_ATTEMPTS):
+        if bucket: bucket.acquire()
+        try:
+            return fn()
+        except Exception as e:
+            code = status_code_of(e)
+            if attempt == MAX_ATTEMPTS - 1 or (code and code < 500 and code != 429): raise
+            time.sleep(backoff_delay(attempt, e))
+
+
+def screen(entries, analyze, prompt, max_workers=MAX_WORKERS, rpm=REQUESTS_PER_MINUTE, on_result=None):
+    """entries 를 분석해서 입력 순서대로 결과 목록 반환
+
+    analyze(member, symptom, exercise, limiter) -> (report, source)
+    on_result(index_list, result) 는 완료될 때마다 호출 스레드에서 실행됨"""
+    groups = {}
+    for i, e in enumerate(entries):
+        key = ai_cache.make_key(prompt, e["member"], e["symptom"], e["exercise"])
+        groups.setdefault(key, []).append(i)
+
+    bucket = TokenBucket(rate=rpm / 60.0, burst=max_workers)
+    limiter = lambda fn: call_with_retry(fn, bucket)
+    results = [None] * len(entries)
+
+    def run(idx):
+        e = entries[idx]
+        start = time.perf_counter()
+        try:
+            report, source = analyze(e["member"], e["symptom"], e["exercise"], limiter)
+            err = None
+        except Exception as ex:
+            report, source, err = "", "error", str(ex)
+        # 판정 기록은 작업 스레드에서 한 번만 파싱 → 진행 표 / 저장(blob 요약)이 같이 사용
+        record = report_parser.parse(report) if report else None
+        return {"report": report, "record": record, "source": source, "error": err,
+                "elapsed": time.perf_counter() - start}
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="map-batch") as pool:
+        futures = {pool.submit(run, idxs[0]): idxs for idxs in groups.values()}
+        for fut in as_completed(futures):
+            idxs = futures[fut]
+            res = fut.result()
+            for i in idxs: results[i] = res
+            if on_result: on_result(idxs, res)
+    return results
+
+
+def result_rows(entries, results):
+    """진행 표 / 저장용 요약 행 목록"""
+    out = []
+    for e, r in zip(entries, results):
+        if r is None:
+            out.append({**e, "판정": "⏳", "처리": "대기", "소요(ms)": ""})
+            continue
+        icon = "❌" if r["error"] else (r["record"].icon if r.get("record") else "") or "❔"
+        out.append({**e, "판정": icon, "처리": r["source"] if not r["error"] else f"오류: {r['error'][:60]}",
+                    "소요(ms)": int(r["elapsed"] * 1000)})
+    return out
+
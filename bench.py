@@ -0,0 +1,228 @@
+"""MAP 오프라인 벤치마크 - OpenAI / 구글 시트 / 카카오를 로컬 대역(fakes.py)으로 바꿔 처리량과 지연 측정
+
+    python bench.py submit --submissions 200 --concurrency 8 --openai-ttft 0.4
+    python bench.py dashboard --rows 100000 --concurrency 4
+    python bench.py all --json bench_result.json
+
+결과: 초당 제출 수, 제출 지연 p50/p95/p99, 단계별 p50/p95/p99 (tracing), 최대 RSS
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import ai_cache
+import blobs
+import fakes
+import prompts
+import rollups
+import spool
+import submit
+import tracing
+import write_queue
+
+BENCH_PROMPT = "# MAP BENCH PROMPT\n**[분석 일시 : {Timestamp}]**\n**대상 회원:** {Client_Tag}\n" + "- 안전 규칙\n" * 400
+BUDGETS = {"1. 현장 안전 리포트": 500, "2. 정밀 분석 로그": 300, "3. 카카오톡 전송 템플릿": 350}
+MEMBERS = ["남/50대/디스크", "여/30대/초보", "남/20대/선수", "여/60대/고혈압", "남/40대/무릎수술"]
+SYMPTOMS = ["허리 통증", "특이사항 없음", "어깨 불편감", "무릎 시큰거림", "손목 저림", "컨디션 저하"]
+EXERCISES = ["데드리프트", "스쿼트", "벤치프레스", "랫풀다운", "레그프레스", "러닝머신"]
+ROW_ID_COLUMN = 8  # app.py 와 같은 행 구성 (LOG_COLUMNS 7칸 + 행 UUID)
+BRANCH = "벤치 지점"
+
+
+def peak_rss_mb():
+    # 리눅스: KB 단위 / macOS: 바이트 단위
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def latency_summary(values):
+    ms = sorted(v * 1000 for v in values)
+    return {f"p{q}": round(tracing.percentile(ms, q), 1) for q in (50, 95, 99)} if ms else {}
+
+
+def make_cases(n, unique, seed=0):
+    """unique 비율만큼 새 조합, 나머지는 앞서 나온 조합 반복 (캐시 적중 시나리오)"""
+    rand = random.Random(seed)
+    cases = []
+    for i in range(n):
+        if cases and rand.random() > unique:
+            cases.append(rand.choice(cases))
+        else:
+            cases.append((f"{rand.choice(MEMBERS)}#{i}", rand.choice(SYMPTOMS), rand.choice(EXERCISES)))
+    return cases
+
+
+# --- 제출 시나리오: app.py 와 같은 submit.PTSubmitter (규칙 → 캐시 → 스트리밍 GPT → 파싱 → blob → 저장 ∥ 카톡) ---
+def bench_submit(args, workdir):
+    client = fakes.FakeOpenAI(ttft=args.openai_ttft, token_delay=args.token_delay, tokens=args.tokens)
+    prefix = prompts.static_prefix(BENCH_PROMPT, ["Timestamp", "Client_Tag"], BUDGETS)
+    cache = ai_cache.ResponseCache(os.path.join(workdir, "cache.db"))
+    sheet = fakes.FakeWorksheet(latency=args.sheet_latency, fail_rate=args.sheet_fail_rate)
+    agg = rollups.Rollups(os.path.join(workdir, "rollups.db"))
+    queue = write_queue.WriteQueue(lambda: (sheet, "ok"), spool=spool.Spool(os.path.join(workdir, "spool.db")),
+                                   id_column=ROW_ID_COLUMN, listeners=[submit.rollup_listener(agg, BRANCH)])
+    queue.flush_delay = args.flush_delay
+
+    kakao_server = dispatcher = None
+    try:
+        import kakao
+        kakao_server = fakes.FakeKakaoServer(latency=args.kakao_latency)
+        url = kakao_server.__enter__()
+        dispatcher = kakao.KakaoDispatcher(lambda: "bench-token", url, rate=args.kakao_rate, burst=args.kakao_rate)
+    except ImportError as e:
+        print(f"(카카오 단계 생략: {e})")
+
+    # app.py persist_stage / notify_stage 와 같은 동작 (큐 등록 후 WRITE_WAIT=0, 카톡은 결과를 잠시 기다림)
+    def persist(row, row_id, record=None):
+        row_ids.append(queue.submit(row, row_id, record))
+        state, err = queue.wait(row_id, 0)
+        return state != "failed", (row_id, state, err)
+
+    def notify(text):
+        msg_id, err = dispatcher.send(text)
+        if msg_id is None: return False, (None, "failed", err)
+        state, detail = dispatcher.wait(msg_id, submit.NOTIFY_TIMEOUT - 0.5)
+        return state != "failed", (msg_id, state, detail)
+
+    tracer = tracing.get_tracer()
+    messages = lambda member, symptom, exercise: prompts.build_messages(prefix, {
+        "Timestamp": time.strftime("%Y-%m-%d %H:%M:%S"), "Client_Tag": member, "Symptom": symptom, "Exercise": exercise})
+    submitter = submit.PTSubmitter(
+        prefix, messages, cache, client, blobs.BlobStore(os.path.join(workdir, "blobs")), persist,
+        notify if dispatcher else None, max_tokens=prompts.max_tokens_for(BUDGETS), tracer=tracer,
+        on_usage=lambda u, ttft, el: (prompts.get_usage_log().record("bench", u, ttft, el),
+                                      tracer.record("openai.stream", el, **(u or {}))))
+
+    def run(case):
+        start = time.perf_counter()
+        submitter.run(*case)
+        return time.perf_counter() - start
+
+    cases = make_cases(args.submissions, args.unique)
+    row_ids = []
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        latencies = list(pool.map(run, cases))
+    wall = time.perf_counter() - start
+
+    # 백그라운드 시트 전송 / 카톡 전송이 끝날 때까지 대기
+    deadline = time.time() + args.drain_timeout
+    for row_id in row_ids: queue.wait(row_id, max(deadline - time.time(), 0))
+    if dispatcher:
+        while dispatcher.queue.unfinished_tasks and time.time() < deadline: time.sleep(0.05)
+    drain = time.perf_counter() - start
+    if kakao_server: kakao_server.__exit__(None, None, None)
+
+    return {
+        "submissions": len(cases),
+        "concurrency": args.concurrency,
+        "submissions_per_sec": round(len(cases) / wall, 2),
+        "latency_ms": latency_summary(latencies),
+        "drain_sec": round(drain, 2),
+        "openai_calls": client.calls,
+        "sheet_api_calls": sheet.calls,
+        "sheet_rows": len(sheet.rows),
+        "rollup_total": agg.total(),
+        "kakao_sent": kakao_server.received if kakao_server else None,
+        "openai_usage": prompts.get_usage_log().summary(),
+    }
+
+
+# --- 대시보드 시나리오: 합성 시트 전체 로딩 → 증분 수집 → 동시 조회 ---
+def bench_dashboard(args, workdir):
+    import branch_index
+    import log_query
+    import log_schema
+    import log_store
+    import rollups
+
+    rows = fakes.synthetic_rows(args.rows)
+    sheet = fakes.FakeWorksheet(header=log_schema.HQ_COLUMNS, rows=rows, latency=args.sheet_latency)
+    conn = fakes.FakeConnection(fakes.FakeSpreadsheet(sheet))
+    index, logs, agg = branch_index.BranchIndex(), log_query.LogIndex(), rollups.Rollups(":memory:")
+
+    def rollup_ingest(chunk, full, raw=None):
+        keys = list(zip(chunk["Timestamp"].dt.strftime("%Y-%m-%d"), chunk["Branch"].astype(str),
+                        chunk["Type"].astype(str), [""] * len(chunk)))
+        agg.rebuild(keys) if full else agg.record(keys)
+
+    store = log_store.LogStore(conn.get_sheet, ttl=0, typed=True,
+                               listeners=[index.on_ingest, logs.on_ingest, rollup_ingest])
+    start = time.perf_counter()
+    store.get()
+    full = time.perf_counter() - start
+
+    sheet.rows.extend(fakes.synthetic_rows(args.new_rows, seed=1))
+    start = time.perf_counter()
+    store.get(force=True)
+    incremental = time.perf_counter() - start
+
+    def load(i):
+        # 화면 1회 = 캐시 조회 + KPI + 지점 현황 + 로그 1페이지
+        start = time.perf_counter()
+        store.ttl = 3600
+        df = store.get()
+        agg.total(); agg.by("branch")
+        [index.status(b, df["Timestamp"].max()) for b in index.branches()]
+        logs.query(page=1 + i % 5, text="ZONE" if i % 2 else None)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        latencies = list(pool.map(load, range(args.loads)))
+    wall = time.perf_counter() - start
+    return {
+        "rows": len(sheet.rows) - 1,
+        "full_load_sec": round(full, 3),
+        "incremental_sec": round(incremental, 3),
+        "loads_per_sec": round(args.loads / wall, 2),
+        "load_latency_ms": latency_summary(latencies),
+    }
+
+
+def main(argv=None):
+    p = argparse.ArgumentParser(description="MAP 오프라인 벤치마크")
+    p.add_argument("scenario", choices=["submit", "dashboard", "all"])
+    p.add_argument("--submissions", type=int, default=200)
+    p.add_argument("--concurrency", type=int, default=8)
+    p.add_argument("--unique", type=float, default=0.6, help="새 입력 조합 비율 (나머지는 캐시 적중)")
+    p.add_argument("--openai-ttft", type=float, default=0.4)
+    p.add_argument("--token-delay", type=float, default=0.005)
+    p.add_argument("--tokens", type=int, default=300)
+    p.add_argument("--sheet-latency", type=float, default=0.2)
+    p.add_argument("--sheet-fail-rate", type=float, default=0.0)
+    p.add_argument("--flush-delay", type=float, default=write_queue.FLUSH_DELAY)
+    p.add_argument("--kakao-latency", type=float, default=0.1)
+    p.add_argument("--kakao-rate", type=float, default=20)
+    p.add_argument("--drain-timeout", type=float, default=120)
+    p.add_argument("--rows", type=int, default=10000)
+    p.add_argument("--new-rows", type=int, default=500)
+    p.add_argument("--loads", type=int, default=100)
+    p.add_argument("--json", help="결과를 JSON 파일로 저장")
+    args = p.parse_args(argv)
+
+    result = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        if args.scenario in ("submit", "all"): result["submit"] = bench_submit(args, workdir)
+        if args.scenario in ("dashboard", "all"): result["dashboard"] = bench_dashboard(args, workdir)
+    result["stages_ms"] = tracing.get_tracer().stats()
+    result["peak_rss_mb"] = round(peak_rss_mb(), 1)
+
+    for section, values in result.items():
+        print(f"\n[{section}]")
+        if isinstance(values, dict):
+            for k, v in values.items(): print(f"  {k:<22} {v}")
+        else:
+            print(f"  {values}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f: json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
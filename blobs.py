@@ -0,0 +1,120 @@
+import gzip
+import hashlib
+import json
+import os
+import re
+import tempfile
+
+import registry
+import report_parser
+
+# ---------------------------------------------------------
+# [리포트 원문 저장소] 긴 AI 리포트는 시트 대신 로컬 파일(내용 해시 → 압축 파일)에 보관
+# - 시트 RawData 칸에는 '판정 + 요약 + blob:해시' 만 기록 → 시트 다운로드 용량 대폭 감소
+# - 같은 내용은 같은 해시 → 중복 저장 없음 (캐시 적중 리포트도 파일 1개)
+# - 원문은 관리자가 특정 기록을 열 때만 읽음, 4000자 잘림 없이 전체 보존
+# - 파싱된 판정 기록(report_parser.Report)은 원문 옆 '{해시}.json' 에 함께 저장 → 다시 파싱하지 않음
+# - zstandard 가 설치되어 있으면 zstd, 없으면 gzip 으로 압축
+# ---------------------------------------------------------
+DEFAULT_ROOT = "map_blobs"
+SUMMARY_CHARS = 200
+REF_PATTERN = re.compile(r"blob:([0-9a-f]{64})")
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def summary_of(report, record=None):
+    """판정 줄(없으면 첫 줄) 한 줄 요약"""
+    return (record or report_parser.parse(report)).summary[:SUMMARY_CHARS]
+
+
+def stub(report, digest, record=None):
+    """시트 RawData 칸에 들어갈 값: '판정: ⛔' 줄 + 요약 + 원문 참조 (rollups.verdict_label 로 판정 인식 가능)"""
+    record = record or report_parser.parse(report)
+    return f"판정: {record.icon}\n{summary_of(report, record)}\nblob:{digest}"
+
+
+def ref_of(value):
+    """RawData 값 → 원문 해시 (참조가 아니면 None)"""
+    m = REF_PATTERN.search(str(value or ""))
+    return m.group(1) if m else None
+
+
+class BlobStore:
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, digest, ext):
+        return os.path.join(self.root, digest[:2], f"{digest}.{ext}")
+
+    def put(self, text):
+        """원문 저장 → sha256 해시 (이미 있으면 쓰지 않음)"""
+        data = (text or "").encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        if self.exists(digest): return digest
+        ext = "zst" if zstandard else "gz"
+        path = self._path(digest, ext)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        packed = zstandard.ZstdCompressor().compress(data) if zstandard else gzip.compress(data)
+        # 임시 파일에 쓴 뒤 교체 → 읽는 쪽은 항상 완성된 파일만 봄
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "wb") as f:
+            f.write(packed)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        return digest
+
+    def exists(self, digest):
+        return any(os.path.exists(self._path(digest, ext)) for ext in ("zst", "gz"))
+
+    def get(self, digest):
+        """해시 → 원문 (없으면 None)"""
+        path = self._path(digest, "gz")
+        if os.path.exists(path):
+            with open(path, "rb") as f: return gzip.decompress(f.read()).decode("utf-8")
+        path = self._path(digest, "zst")
+        if os.path.exists(path):
+            if zstandard is None: raise RuntimeError("zstandard 패키지가 없어 원문을 열 수 없습니다")
+            with open(path, "rb") as f: return zstandard.ZstdDecompressor().decompress(f.read()).decode("utf-8")
+        return None
+
+    def put_record(self, digest, record):
+        """파싱된 판정 기록을 원문 옆에 저장"""
+        path = self._path(digest, "json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(record.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def get_record(self, digest):
+        """해시 → Report (기록 파일이 없는 예전 원문은 파싱, 원문도 없으면 None)"""
+        path = self._path(digest, "json")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f: return report_parser.Report.from_dict(json.load(f))
+        text = self.get(digest)
+        return None if text is None else report_parser.parse(text)
+
+    def offload(self, report, record=None):
+        """리포트 → 시트에 기록할 RawData 값 (record: 이미 파싱한 Report 가 있으면 재사용)"""
+        record = record or report_parser.parse(report)
+        digest = self.put(report)
+        if not os.path.exists(self._path(digest, "json")): self.put_record(digest, record)
+        return stub(report, digest, record)
+
+    def resolve(self, value):
+        """RawData 값 → 원문 (참조가 아니거나 파일이 없으면 값 그대로 - 예전 행 호환)"""
+        digest = ref_of(value)
+        if digest is None: return value
+        text = self.get(digest)
+        return value if text is None else text
+
+
+def get_blob_store(root=DEFAULT_ROOT):
+    """경로별 공용 BlobStore"""
+    return registry.shared("blobs", root, lambda: BlobStore(root))
@@ -0,0 +1,62 @@
+import threading
+
+import pandas as pd
+
+import registry
+
+# ---------------------------------------------------------
+# [지점별 최신 점검 인덱스] 지점 → 가장 최근 기록 1건
+# - 새로 수집된 행(청크)만 보고 갱신 → 전체 로그 정렬 불필요
+# - 지점 목록은 데이터에서 자동 발견 (하드코딩 X)
+# ---------------------------------------------------------
+OVERDUE_HOURS = 3
+
+
+class BranchIndex:
+    def __init__(self, branch_col="Branch", time_col="Timestamp"):
+        self.branch_col = branch_col
+        self.time_col = time_col
+        self.latest = {}  # branch -> dict(row)
+        self._lock = threading.Lock()
+
+    def reset(self):
+        with self._lock:
+            self.latest = {}
+
+    def update(self, chunk):
+        """새로 들어온 행들로 인덱스 갱신 - O(청크 크기)"""
+        if chunk is None or chunk.empty or self.branch_col not in chunk.columns: return
+        chunk = chunk[chunk[self.time_col].notna() & (chunk[self.branch_col].astype(str) != "")]
+        if chunk.empty: return
+        # 청크 안에서 지점별 최신 1건만 추림
+        idx = chunk.groupby(chunk[self.branch_col].astype(str), observed=True)[self.time_col].idxmax()
+        with self._lock:
+            for branch, i in idx.items():
+                row = chunk.loc[i].to_dict()
+                cur = self.latest.get(branch)
+                if cur is None or row[self.time_col] >= cur[self.time_col]:
+                    self.latest[branch] = row
+
+    def on_ingest(self, chunk, full, raw=None):
+        """LogStore 리스너: 전체 재로딩이면 초기화 후 다시 구성"""
+        if full: self.reset()
+        self.update(chunk)
+
+    def branches(self):
+        with self._lock:
+            return sorted(self.latest)
+
+    def last(self, branch):
+        with self._lock:
+            return self.latest.get(branch)
+
+    def status(self, branch, now, overdue_hours=OVERDUE_HOURS):
+        """(상태, 마지막 기록 dict 또는 None, 경과 timedelta 또는 None) - 상태: missing / overdue / ok"""
+        row = self.last(branch)
+        if row is None: return "missing", None, None
+        diff = pd.Timestamp(now) - row[self.time_col]
+        return ("overdue" if diff > pd.Timedelta(hours=overdue_hours) else "ok"), row, diff
+
+
+def get_branch_index(key):
+    return registry.shared("branch_index", key, BranchIndex)
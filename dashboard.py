@@ -1,84 +1,240 @@
+import io
 import streamlit as st
-import pandas as pd
-import gspread
 from oauth2client.service_account import ServiceAccountCredentials
-from datetime import datetime, timedelta
+from datetime import datetime
+import map_db
+import log_store
+import rollups
+import branch_index
+import log_query
+import export
+import shards
+import storage
+import log_schema
+import shared_state
+import facility_log
 
 # ---------------------------------------------------------
 # [구글 시트 데이터 로드]
 # ---------------------------------------------------------
+def load_credentials():
+    return ServiceAccountCredentials.from_json_keyfile_name("service_account.json", map_db.SCOPE)
+
+def get_db():
+    # [업그레이드] 인증/시트 열기는 프로세스당 1회 (map_db 공용 연결)
+    return map_db.get_connection("service_account.json", load_credentials)
+
+def get_store():
+    # [업그레이드] 헤더 기준 증분 캐시 → TTL 이 지나면 새로 추가된 행만 다운로드
+    # typed=True: Timestamp 는 수집 시 1회만 datetime 으로 변환 (매 로드마다 to_datetime X)
+    # 새로 수집된 행은 지점별 최신 점검 인덱스에도 바로 반영
+    # SHARD_BY 설정 시 매니페스트의 샤드 중 LOG_SINCE 이후 것만 병렬로 읽음
+    # 로컬 DB 원본이면 KPI/상세 조회는 DB 에서 바로 하므로 조회 인덱스·집계는 시트 원본일 때만 구성
+    listeners = [get_index().on_ingest] + ([] if STORAGE == "sqlite" else [get_log_index().on_ingest, rollup_ingest])
+    return log_store.get_log_store("dashboard_logs", get_storage().get_sheet, ttl=log_store.DEFAULT_TTL, typed=True,
+                                   listeners=listeners,
+                                   router=None if STORAGE == "sqlite" else get_router(),
+                                   since=st.secrets.get("LOG_SINCE"),
+                                   on_error=None if STORAGE == "sqlite" else get_db().reset)
+
+# [업그레이드] STORAGE = "sqlite" 이면 streamlit_app.py 가 기록하는 로컬 DB 를 직접 읽음 (구글 시트 불필요)
+STORAGE = st.secrets.get("STORAGE", "sheets")
+STATE_DIR = st.secrets.get("STATE_DIR", "")  # 앱 워커들과 같은 공유 상태 디렉터리
+
+def get_storage():
+    if STORAGE == "sqlite":
+        return storage.get_sqlite_backend(st.secrets.get("LOCAL_DB_PATH", shared_state.path_in(STATE_DIR, storage.DEFAULT_PATH)), "hq_logs",
+                                          log_schema.HQ_COLUMNS)
+    return storage.SheetsBackend(get_db(), log_schema.HQ_COLUMNS)
+
+def get_router():
+    by = [p.strip() for p in str(st.secrets.get("SHARD_BY", "")).split(",") if p.strip()]
+    if not by: return None
+    return shards.get_router("dashboard", get_db(), by)
+
+def get_index():
+    return branch_index.get_branch_index("dashboard")
+
+def get_log_index():
+    # 상세 로그 조회용 (필터/검색/페이지 단위)
+    return log_query.get_log_index("dashboard")
+
+def get_agg():
+    # HQ 화면 전용 KPI 집계 (수집되는 행 기준, 프로세스 시작 시 전체 로딩에서 재구성)
+    return rollups.get_rollups(":memory:")
+
+def rollup_ingest(chunk, full, raw=None):
+    n = len(chunk)
+    keys = zip(chunk["Timestamp"].dt.strftime("%Y-%m-%d"),
+               chunk["Branch"].astype(str) if "Branch" in chunk.columns else [""] * n,
+               chunk["Type"].astype(str) if "Type" in chunk.columns else [""] * n,
+               [""] * n)
+    if full: get_agg().rebuild(keys)
+    else: get_agg().record(keys)
+
 def load_data():
-    scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
-    creds = ServiceAccountCredentials.from_json_keyfile_name("service_account.json", scope)
-    client = gspread.authorize(creds)
-    sheet = client.open("MAP_DATABASE").sheet1
-    data = sheet.get_all_records()
-    return pd.DataFrame(data)
+    return get_store().get()
+
+# [라이브 모드] 백그라운드 폴러가 새 행만 수집하고, 화면은 fragment 만 주기적으로 다시 그림
+LIVE_INTERVAL = min(int(st.secrets.get("LIVE_INTERVAL", 15)), log_store.DEFAULT_TTL - 1)  # 초
 
 # 1. 페이지 설정
 st.set_page_config(page_title="MAP HQ DASHBOARD", page_icon="🏢", layout="wide")
 st.title("🏢 MAP ENTERPRISE : 통합 관제 센터")
 
-# 2. 데이터 불러오기 (새로고침 버튼)
-if st.button("🔄 데이터 최신화"):
+# 2. 데이터 불러오기 (새로고침 버튼 / 라이브 모드)
+c_live, c_btn = st.columns([3, 1])
+live = c_live.toggle(f"🔴 라이브 모드 ({LIVE_INTERVAL}초마다 자동 갱신)", value=True)
+if c_btn.button("🔄 데이터 최신화"):
+    get_store().invalidate(full=False)
     st.rerun()
 
-try:
+
+def render_board():
     df = load_data()
     
     # 데이터가 비어있을 경우 방지
     if df.empty:
         st.warning("아직 데이터가 없습니다.")
-        st.stop()
-
-    # 날짜 형식 변환
-    df['Timestamp'] = pd.to_datetime(df['Timestamp'])
+        return
 
-    # 3. KPI 지표
-    total_logs = len(df)
-    today_logs = len(df[df['Timestamp'].dt.date == datetime.now().date()])
+    # 3. KPI 지표 - 로컬 DB 원본이면 DB 인덱스로 바로 집계, 시트 원본이면 수집 시 갱신되는 집계 테이블 조회
+    backend = get_storage()
+    today = datetime.now().strftime("%Y-%m-%d")
+    if backend.local:
+        by_day = backend.aggregate("day")
+        total_logs, today_logs = sum(by_day.values()), by_day.get(today, 0)
+        live_branches = backend.aggregate("branch")
+    else:
+        agg = get_agg()
+        total_logs, today_logs = agg.total(), agg.total(day=today)
+        live_branches = agg.by("branch")
     
     col1, col2, col3 = st.columns(3)
     col1.metric("총 누적 데이터", f"{total_logs}건")
     col2.metric("오늘 점검 횟수", f"{today_logs}건", "실시간 집계")
-    col3.metric("가동 지점", f"{df['Branch'].nunique()}곳")
+    col3.metric("가동 지점", f"{len([b for b in live_branches if b])}곳")
 
     st.markdown("---")
 
     # 4. 지점별 최신 상태 (신호등 로직)
     st.subheader("📡 지점별 실시간 안전 신호등")
+    store = get_store()
+    st.caption(f"마지막 동기화: {datetime.fromtimestamp(store.fetched_at).strftime('%H:%M:%S')}"
+               + (f" (⚠️ 동기화 오류: {store.last_error})" if store.last_error else ""))
     
-    branches = ["킹스짐 1호점 (본점)", "킹스짐 2호점", "킹스짐 3호점"]
-    cols = st.columns(3)
-
-    for i, branch in enumerate(branches):
-        with cols[i]:
-            # 해당 지점의 가장 최근 로그 가져오기
-            branch_logs = df[df['Branch'] == branch].sort_values(by='Timestamp', ascending=False)
-            
-            if branch_logs.empty:
-                st.error(f"🚨 {branch}")
-                st.caption("데이터 없음 (즉시 확인 요망)")
-            else:
-                last_log = branch_logs.iloc[0]
-                last_time = last_log['Timestamp']
-                time_diff = datetime.now() - last_time
+    # [업그레이드] 지점 목록은 데이터에서 자동 발견 (+ secrets 의 BRANCHES 로 미가동 지점도 표시)
+    index = get_index()
+    branches = sorted(set(index.branches()) | set(st.secrets.get("BRANCHES", [])))
+    per_row = 4
+
+    for start in range(0, len(branches), per_row):
+        cols = st.columns(per_row)
+        for col, branch in zip(cols, branches[start:start + per_row]):
+            with col:
+                # 지점별 최신 기록 1건을 인덱스에서 바로 조회 (전체 정렬 X)
+                # 라이브 모드에서는 매 갱신마다 현재 시각 기준으로 다시 판정 → 3시간 경과 시 자동으로 🚨
+                state, last_log, time_diff = index.status(branch, datetime.now(), branch_index.OVERDUE_HOURS)
                 
-                # 3시간 이내 점검 없으면 빨간불
-                if time_diff > timedelta(hours=3):
+                if state == "missing":
                     st.error(f"🚨 {branch}")
-                    st.markdown(f"**상태: 위험 (점검 누락)**")
-                    st.caption(f"마지막 점검: {last_time.strftime('%H:%M')} ({int(time_diff.total_seconds()/60)}분 전)")
+                    st.caption("데이터 없음 (즉시 확인 요망)")
                 else:
-                    st.success(f"✅ {branch}")
-                    st.markdown(f"**상태: 정상 가동 중**")
-                    st.caption(f"마지막 점검: {last_time.strftime('%H:%M')} ({int(time_diff.total_seconds()/60)}분 전)")
-                    st.text(f"담당자: {last_log['Staff']}")
+                    last_time = last_log['Timestamp']
+                    
+                    # 3시간 이내 점검 없으면 빨간불
+                    if state == "overdue":
+                        st.error(f"🚨 {branch}")
+                        st.markdown(f"**상태: 위험 (점검 누락)**")
+                        st.caption(f"마지막 점검: {last_time.strftime('%H:%M')} ({int(time_diff.total_seconds()/60)}분 전)")
+                    else:
+                        st.success(f"✅ {branch}")
+                        st.markdown(f"**상태: 정상 가동 중**")
+                        st.caption(f"마지막 점검: {last_time.strftime('%H:%M')} ({int(time_diff.total_seconds()/60)}분 전)")
+                        st.text(f"담당자: {last_log.get('Staff', '')}")
+
+
+@st.fragment(run_every=LIVE_INTERVAL)
+def live_board():
+    # 갱신마다 폴러 연장 → 라이브 화면이 모두 닫히면 폴러도 스스로 종료
+    get_store().start_poller(LIVE_INTERVAL)
+    render_board()
+
+
+try:
+    if live:
+        # 폴러가 LIVE_INTERVAL(< TTL) 마다 새 행만 가져오므로 fragment 갱신은 캐시만 읽음
+        live_board()
+    else:
+        get_store().stop_poller()
+        render_board()
 
     # 5. 상세 데이터
     with st.expander("📜 전체 로그 데이터 확인"):
-        st.dataframe(df.sort_values(by='Timestamp', ascending=False), use_container_width=True)
+        # 로컬 DB 원본이면 DB 에서 바로 필터/페이지 조회, 시트 원본이면 수집된 행의 조회 인덱스 사용
+        backend = get_storage()
+        ix = None if backend.local else get_log_index()
+        f1, f2, f3 = st.columns([1, 1, 2])
+        branch_q = f1.selectbox("지점", ["전체"] + (sorted(b for b in backend.aggregate("branch") if b) if ix is None else ix.distinct("branch")))
+        type_q = f2.selectbox("유형", ["전체"] + (sorted(t for t in backend.aggregate("type") if t) if ix is None else ix.distinct("type")))
+        text_q = f3.text_input("🔍 검색")
+        d1, d2, d3 = st.columns([2, 1, 1])
+        period = d1.date_input("기간", value=())
+        page_size = d2.selectbox("페이지당 건수", [25, 50, 100, 200], index=1)
+
+        # [업그레이드] 조건에 맞는 한 페이지만 조회 → 전체 로그 정렬/전송 X
+        cond = dict(branch=None if branch_q == "전체" else branch_q,
+                    types=None if type_q == "전체" else [type_q], text=text_q,
+                    start=period[0] if len(period) > 0 else None,
+                    end=period[-1] if len(period) > 0 else None)
+        total = sum(backend.aggregate("type", **cond).values()) if ix is None else ix.query(page_size=1, **cond)[1]
+        pages = max((total + page_size - 1) // page_size, 1)
+        page = d3.number_input(f"페이지 (총 {pages})", min_value=1, max_value=pages, step=1)
+        if ix is None:
+            rows = backend.query(limit=page_size, offset=(int(page) - 1) * page_size, ascending=False, **cond)
+            st.caption(f"검색 결과 {total}건 중 {len(rows)}건 표시")
+            st.dataframe([dict(zip(backend.columns, r)) for r in rows], use_container_width=True)
+        else:
+            ids, total = ix.query(page=int(page), page_size=page_size, **cond)
+            st.caption(f"검색 결과 {total}건 중 {len(ids)}건 표시")
+            st.dataframe(load_data().loc[ids], use_container_width=True)
+
+        # [업그레이드] 내보내기 파일은 버튼을 눌렀을 때만 청크 단위로 생성 (같은 조건이면 최근 파일 재사용)
+        e1, e2 = st.columns([1, 3])
+        fmt = e1.selectbox("내보내기 형식", list(export.FORMATS))
+        exporter = export.get_exporter()
+        key = export.filter_key(fmt, source="dashboard", total=total, **cond)
+        art = exporter.get(key)
+        if art is None and e2.button(f"📦 내보내기 파일 만들기 ({total}건)"):
+            with st.spinner("파일 생성 중..."):
+                chunks = export.query_chunks(backend, export.CHUNK_ROWS, **cond) if ix is None \
+                    else export.frame_chunks(get_store(), ix.iter_ids(export.CHUNK_ROWS, **cond))
+                art = exporter.export(key, fmt, chunks)
+        if art:
+            mime, ext = export.FORMATS[fmt]
+            with open(art[0], "rb") as f:
+                e2.download_button(f"📥 다운로드 ({art[1]}건)", f, f"map_logs.{ext}", mime)
+
+    # [업그레이드] 단톡방에 공유됐던 [MAP ENTERPRISE LOG] 기록을 일괄 가져와 과거 데이터 채우기
+    with st.expander("📥 과거 단톡방 로그 가져오기"):
+        # 같은 기록을 한 번만 저장하려면 row_id 중복 확인이 되는 로컬 DB 원본이 필요 → 시트 원본에서는 가져오기 미지원
+        if not get_storage().local:
+            st.info("과거 로그 가져오기는 로컬 DB 원본(STORAGE = \"sqlite\")에서만 사용할 수 있습니다. "
+                    "시트 원본은 중복 확인이 없어 같은 기록이 여러 번 저장될 수 있습니다.")
+        else:
+            st.caption("단톡방 대화 내보내기(.txt)를 올리면 점검 로그 블록만 골라 저장합니다. 같은 기록은 한 번만 저장됩니다.")
+            files = st.file_uploader("대화 파일", type=["txt"], accept_multiple_files=True)
+            if files and st.button(f"가져오기 ({len(files)}개 파일)"):
+                rejected, events, stored = [], 0, 0
+                with st.spinner("로그 해석 및 저장 중..."):
+                    for f in files:
+                        lines = io.TextIOWrapper(f, encoding="utf-8-sig", errors="replace")
+                        result = facility_log.import_logs(lines, get_storage(), rejected=rejected)
+                        events, stored = events + result["events"], stored + result["stored"]
+                get_store().invalidate(full=False)
+                st.success(f"✅ 점검 기록 {stored}건 새로 저장 (해석 {events}건 중 {events - stored}건은 이미 있음)"
+                           + (f" (해석 실패 {len(rejected)}건)" if rejected else ""))
 
 except Exception as e:
     st.error(f"데이터 로드 실패: {e}")
-    st.info("구글 시트 설정(service_account.json)을 확인해주세요.")
\ No newline at end of file
+    st.info("구글 시트 설정(service_account.json)을 확인해주세요.")
@@ -0,0 +1,127 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+import registry
+
+# ---------------------------------------------------------
+# [로그 내보내기] 요청할 때만 파일 생성 + 청크 단위 스트리밍 기록
+# - 조회 조건(필터 키)별로 최근 생성 파일을 디스크에 보관 → 같은 조건 재요청 시 즉시 재사용
+# - 전체 로그를 한 번에 DataFrame/문자열로 만들지 않고 CHUNK_ROWS 행씩 파일에 이어 씀
+# - 형식: csv / csv.gz / xlsx (openpyxl 이 설치된 경우에만, write-only 모드)
+# ---------------------------------------------------------
+CHUNK_ROWS = 5000
+MAX_ARTIFACTS = 4
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), "map_exports")
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "csv.gz": ("application/gzip", "csv.gz"),
+}
+if openpyxl:
+    FORMATS["xlsx"] = ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx")
+
+
+def filter_key(fmt, **cond):
+    """조회 조건 + 형식 → 캐시 키 (조건 값은 문자열로 정규화)"""
+    blob = json.dumps({"fmt": fmt, **{k: str(v) for k, v in cond.items()}}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()[:16]
+
+
+def frame_chunks(store, id_chunks, resolve=None):
+    """LogStore + 행 번호 묶음들 → DataFrame 청크 (RawData 원문 포함, resolve 로 blob 참조를 원문으로)"""
+    for ids in id_chunks:
+        frame = store.df
+        chunk = frame.loc[[i for i in ids if i < len(frame)]]
+        if store.raw is not None:
+            raw = store.raw.reindex(chunk.index)
+            chunk = chunk.assign(RawData=raw.map(resolve) if resolve else raw)
+        yield chunk
+
+
+def query_chunks(backend, chunk_rows=CHUNK_ROWS, **cond):
+    """storage 백엔드 조회 결과 → DataFrame 청크 (최신순, chunk_rows 행씩 DB 에서 가져옴)"""
+    offset = 0
+    while True:
+        rows = backend.query(limit=chunk_rows, offset=offset, ascending=False, **cond)
+        if not rows: return
+        yield pd.DataFrame([r[:len(backend.columns)] for r in rows], columns=backend.columns)
+        if len(rows) < chunk_rows: return
+        offset += chunk_rows
+
+
+def write_csv(path, chunks, compress=False):
+    # utf-8-sig: 엑셀에서 한글이 깨지지 않도록 BOM 포함
+    opener = gzip.open if compress else open
+    rows = 0
+    with opener(path, "wt", encoding="utf-8-sig", newline="") as f:
+        for chunk in chunks:
+            chunk.to_csv(f, index=False, header=rows == 0)
+            rows += len(chunk)
+    return rows
+
+
+def write_xlsx(path, chunks):
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("logs")
+    rows = 0
+    for chunk in chunks:
+        if rows == 0: ws.append([str(c) for c in chunk.columns])
+        for rec in chunk.astype(object).where(chunk.notna(), "").itertuples(index=False):
+            ws.append([v if isinstance(v, (int, float)) else str(v) for v in rec])
+        rows += len(chunk)
+    wb.save(path)
+    return rows
+
+
+class Exporter:
+    def __init__(self, directory=EXPORT_DIR, max_artifacts=MAX_ARTIFACTS):
+        self.directory = directory
+        self.max_artifacts = max_artifacts
+        self.artifacts = OrderedDict()  # key -> (경로, 행 수)
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def get(self, key):
+        """이미 만들어 둔 파일 (경로, 행 수) 또는 None"""
+        with self._lock:
+            art = self.artifacts.get(key)
+            if art and os.path.exists(art[0]):
+                self.artifacts.move_to_end(key)
+                return art
+            self.artifacts.pop(key, None)
+            return None
+
+    def export(self, key, fmt, chunks):
+        """chunks: DataFrame 을 차례로 내놓는 iterable → 파일 경로, 행 수"""
+        art = self.get(key)
+        if art: return art
+        _, ext = FORMATS[fmt]
+        path = os.path.join(self.directory, f"map_logs_{key}.{ext}")
+        tmp = f"{path}.{threading.get_ident()}.part"
+        # 같은 키를 동시에 요청해도 완성된 파일만 보이도록 임시 파일에 쓰고 교체
+        rows = write_xlsx(tmp, chunks) if fmt == "xlsx" else write_csv(tmp, chunks, compress=fmt == "csv.gz")
+        os.replace(tmp, path)
+        with self._lock:
+            self.artifacts[key] = (path, rows)
+            self.artifacts.move_to_end(key)
+            while len(self.artifacts) > self.max_artifacts:
+                old, _ = self.artifacts.popitem(last=False)[1]
+                try: os.remove(old)
+                except OSError: pass
+        return path, rows
+
+
+def get_exporter():
+    return registry.shared("export", None, Exporter)
@@ -0,0 +1,192 @@
+"""MAP 시설 점검 기록 - 점검 폼 → 구조화된 이벤트, 단톡방 로그 일괄 가져오기
+
+    python facility_log.py chat_2025.txt chat_2026.txt --db map_logs.db
+
+단톡방에 붙여 넣었던 [MAP ENTERPRISE LOG] 블록을 한 줄씩 훑어 로컬 DB 의 hq_logs 에 일괄 저장 (같은 기록은 한 번만)
+"""
+import argparse
+import hashlib
+import re
+import sys
+import time
+from datetime import datetime
+
+import log_schema
+
+# ---------------------------------------------------------
+# [시설 점검 이벤트] 지점 / 점검 코드 / 구역 / 체크 항목 / 점검자를 구조화해서 기록
+# - 폼 입력과 단톡방 로그 모두 같은 FacilityEvent → log_schema.HQ_COLUMNS 순서의 행
+# - 행 id 는 내용 해시 → 같은 로그를 여러 번 가져와도(중복 붙여넣기, 재실행) 한 번만 저장
+# - 가져오기는 파일을 줄 단위로 흘려 읽고 IMPORT_BATCH 건씩 로컬 DB 에 한 트랜잭션으로 기록
+#   (row_id 중복 확인은 SQLiteBackend 만 가능 → 시트 원본에는 가져오지 않음)
+# ---------------------------------------------------------
+MARKER = "[MAP ENTERPRISE LOG]"
+FIELDS = {"BRANCH": "branch", "EVENT": "event", "TIMESTAMP": "ts", "LOCATION": "zone", "ACTION": "action",
+          "STAFF": "staff"}
+# 폼의 점검 유형 → (이벤트 코드, 체크박스 순서별 (항목, 값))
+TASKS = {
+    "정기 순찰": ("Routine Patrol", (("MACHINE_STATUS", "OK"), ("ENV_CLEAR", "OK"))),
+    "신규/안전 교육": ("Safety OT", (("USER_WARNING", "DONE"), ("DEMO_CHECK", "DONE"))),
+    "기구 정비": ("Maintenance", (("REPAIR_ACTION", "DONE"), ("TEST_RUN", "OK"))),
+}
+TS_FORMATS = (log_schema.TS_FORMAT, "%Y-%m-%d %H:%M", "%Y.%m.%d %H:%M:%S", "%Y.%m.%d %H:%M", "%Y/%m/%d %H:%M:%S")
+CANONICAL_TS = re.compile(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}")
+IMPORT_BATCH = 2000
+
+
+def normalize_ts(value):
+    """여러 날짜 표기 → 'YYYY-MM-DD HH:MM:SS' (해석 불가면 None)"""
+    value = (value or "").strip()
+    if CANONICAL_TS.fullmatch(value): return value  # 앱이 만든 로그는 이미 표준 형식 → strptime 생략
+    for fmt in TS_FORMATS:
+        try: return datetime.strptime(value, fmt).strftime(log_schema.TS_FORMAT)
+        except ValueError: continue
+    return None
+
+
+def parse_checks(action):
+    """'MACHINE_STATUS: OK / ENV_CLEAR: OK' → {'MACHINE_STATUS': 'OK', 'ENV_CLEAR': 'OK'}"""
+    checks = {}
+    for part in (action or "").split("/"):
+        flag, _, value = part.partition(":")
+        if flag.strip(): checks[flag.strip()] = value.strip()
+    return checks
+
+
+class FacilityEvent:
+    def __init__(self, ts, branch, event, zone="", checks=None, staff=""):
+        self.ts = ts                    # 'YYYY-MM-DD HH:MM:SS'
+        self.branch = branch
+        self.event = event              # Routine Patrol / Safety OT / Maintenance
+        self.zone = zone                # 'ZONE A' 등 (괄호 설명 제외)
+        self.checks = checks or {}      # 항목 → OK / DONE (입력 순서 유지)
+        self.staff = staff
+
+    @classmethod
+    def from_form(cls, ts, branch, task_type, zone_label, flags, staff):
+        """점검 폼 입력 → 이벤트 (flags: 체크박스 값 순서대로)"""
+        label = next((k for k in TASKS if k in task_type), None)
+        event, items = TASKS[label] if label else (task_type.split(" (")[-1].rstrip(")"), ())
+        checks = {flag: value for (flag, value), on in zip(items, flags) if on}
+        return cls(ts, branch, event, zone_label.split(" (")[0], checks, staff.strip())
+
+    @property
+    def action(self):
+        return " / ".join(f"{flag}: {value}" for flag, value in self.checks.items())
+
+    def event_id(self):
+        """내용 해시 → 저장소 row_id (같은 점검 기록은 같은 id, 체크 항목이 다르면 다른 기록)"""
+        raw = "\x1f".join(self.to_row())
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def to_row(self):
+        """log_schema.HQ_COLUMNS 순서의 행"""
+        return [self.ts, log_schema.FACILITY_TYPE, self.branch, self.zone, self.event, self.staff, self.action]
+
+    def to_log_text(self):
+        """단톡방 공유용 [MAP ENTERPRISE LOG] 블록 (parse_logs 로 다시 읽을 수 있는 형식)"""
+        return "\n".join([
+            MARKER,
+            "-----------------------------------------",
+            f"BRANCH     : {self.branch}",
+            f"EVENT      : {self.event}",
+            f"TIMESTAMP  : {self.ts}",
+            f"LOCATION   : {self.zone}",
+            f"ACTION     : {self.action}",
+            f"STAFF      : {self.staff}",
+            "-----------------------------------------",
+        ])
+
+    def __repr__(self):
+        return f"FacilityEvent({self.ts}, {self.branch}, {self.event}, {self.zone}, {self.staff})"
+
+
+def _event_of(fields, start, rejected):
+    """블록 필드 → FacilityEvent (필수 항목이 없으면 rejected 에 기록하고 None)"""
+    ts = normalize_ts(fields.get("ts"))
+    if ts is None or not fields.get("branch") or not fields.get("event"):
+        if rejected is not None: rejected.append((start, "필수 항목(BRANCH/EVENT/TIMESTAMP) 누락 또는 날짜 형식 오류"))
+        return None
+    return FacilityEvent(ts, fields["branch"], fields["event"], fields.get("zone", ""),
+                         parse_checks(fields.get("action")), fields.get("staff", ""))
+
+
+def parse_logs(lines, rejected=None):
+    """텍스트 줄(파일 객체 등) → FacilityEvent 를 차례로 반환 (한 번의 순회, 파일 전체를 메모리에 올리지 않음)
+    rejected: 리스트를 주면 해석하지 못한 블록의 (시작 줄 번호, 사유) 를 추가"""
+    fields, start = None, 0
+    for no, line in enumerate(lines, 1):
+        if MARKER in line:
+            # 단톡방 내보내기의 '[이름] [오후 3:04]' 접두어가 있어도 마커 위치로 블록 시작 인식
+            event = _event_of(fields, start, rejected) if fields else None
+            if event: yield event
+            fields, start = {}, no
+            continue
+        if fields is None: continue
+        text = line.strip()
+        if text.startswith("---"):
+            if fields:  # 닫는 구분선 → 블록 끝
+                event = _event_of(fields, start, rejected)
+                if event: yield event
+                fields = None
+            continue
+        key, sep, value = text.partition(":")
+        name = FIELDS.get(key.strip().upper()) if sep else None
+        if name: fields[name] = value.strip()
+    event = _event_of(fields, start, rejected) if fields else None
+    if event: yield event
+
+
+def import_logs(lines, backend, batch_size=IMPORT_BATCH, rejected=None):
+    """단톡방 로그 → backend(storage.SQLiteBackend) 에 batch_size 건씩 일괄 기록
+    → {'events': 해석한 블록 수, 'stored': 새로 저장된 행 수, 'batches'}"""
+    if not backend.local:
+        raise ValueError("단톡방 로그 가져오기는 로컬 DB 원본(STORAGE=sqlite)에서만 가능 (시트는 중복 확인 없음)")
+    batch, events, batches, stored = [], 0, 0, 0
+
+    def flush():
+        return backend.append_items([(e.event_id(), e.to_row()) for e in batch])
+
+    for event in parse_logs(lines, rejected):
+        batch.append(event)
+        if len(batch) >= batch_size:
+            stored += flush()
+            events, batches, batch = events + len(batch), batches + 1, []
+    if batch:
+        stored += flush()
+        events, batches = events + len(batch), batches + 1
+    return {"events": events, "stored": stored, "batches": batches}
+
+
+def main(argv=None):
+    import storage
+
+    p = argparse.ArgumentParser(description="단톡방 [MAP ENTERPRISE LOG] 일괄 가져오기")
+    p.add_argument("files", nargs="+", help="단톡방 내보내기 텍스트 파일 ('-' = 표준 입력)")
+    p.add_argument("--db", default=storage.DEFAULT_PATH, help="로컬 DB 경로 (dashboard.py 의 LOCAL_DB_PATH)")
+    p.add_argument("--table", default="hq_logs")
+    p.add_argument("--batch", type=int, default=IMPORT_BATCH)
+    args = p.parse_args(argv)
+
+    backend = storage.get_sqlite_backend(args.db, args.table, log_schema.HQ_COLUMNS)
+    rejected, total, stored, batches = [], 0, 0, 0
+    start = time.perf_counter()
+    for path in args.files:
+        f = sys.stdin if path == "-" else open(path, encoding="utf-8-sig", errors="replace")
+        try:
+            n = len(rejected)
+            result = import_logs(f, backend, args.batch, rejected)
+        finally:
+            if f is not sys.stdin: f.close()
+        total, stored, batches = total + result["events"], stored + result["stored"], batches + result["batches"]
+        print(f"{path}: 블록 {result['events']}건 해석 (새로 저장 {result['stored']}건), 실패 {len(rejected) - n}건")
+    elapsed = time.perf_counter() - start
+    # 이미 저장된 기록(같은 row_id)은 저장소가 건너뜀 → 새로 저장된 건수를 따로 보고
+    print(f"{total}건 처리 → {stored}건 저장, {total - stored}건은 이미 있음 ({batches}회 일괄 기록), "
+          f"{elapsed:.2f}초 ({total / elapsed if elapsed else 0:.0f}건/초)")
+    for line_no, reason in rejected[:20]:
+        print(f"  - {line_no}번째 줄 블록: {reason}")
+
+
+if __name__ == "__main__":
+    main()
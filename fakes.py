@@ -0,0 +1,228 @@
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+# ---------------------------------------------------------
+# [로컬 대역] 유료/외부 서비스 없이 성능 측정·테스트용
+# - FakeOpenAI: chat.completions.create (스트리밍/비스트리밍, 첫 토큰 지연 + 토큰 간격, usage 포함)
+# - FakeWorksheet / FakeSpreadsheet: gspread 워크시트 흉내 (호출당 지연, 합성 행 1만~100만 개)
+# - FakeKakaoServer: 카카오 '나에게 보내기' 엔드포인트를 흉내 내는 로컬 HTTP 서버
+# ---------------------------------------------------------
+REPORT = """### 1. 📋 현장 안전 리포트 (Trainer View)
+---
+**[분석 일시 : {ts}]**
+**대상 회원:** {member}
+
+**1. 종합 판정:**
+- {verdict}
+
+**2. 위험 요인 (Risk):**
+- 통증 부위와 운동 관절이 겹쳐 부상 위험이 있습니다.
+
+**3. 현장 가이드:**
+- ⛔ **제한:** 고중량 반복
+- ✅ **대체:** 머신 위주 저강도 운동
+- ⚠️ **주의:** 통증 발생 시 즉시 중단
+---
+
+### 3. 💬 카카오톡 전송 템플릿 (Member View)
+---
+안녕하세요, {member}님! 오늘은 안전하게 강도를 조절해서 진행하겠습니다. 💪
+---
+"""
+VERDICTS = ["⛔ **[즉시 중단]** (위험함)", "⚠️ **[조절 필요]** (주의 요망)", "✅ **[진행 가능]** (안전함)"]
+
+
+def _ns(**kw):
+    return SimpleNamespace(**kw)
+
+
+class FakeOpenAI:
+    """openai.OpenAI 대역 - client.chat.completions.create(...) 만 지원"""
+
+    def __init__(self, ttft=0.4, token_delay=0.01, tokens=300, cached_ratio=0.9, seed=0):
+        self.ttft = ttft                  # 첫 토큰까지 지연 (초)
+        self.token_delay = token_delay    # 토큰 간격 (초)
+        self.tokens = tokens              # 응답 토큰 수 (리포트를 이 개수로 나눠 전송)
+        self.cached_ratio = cached_ratio  # 두 번째 호출부터 프롬프트 캐시 적중 비율
+        self.calls = 0
+        self._seen = set()
+        self._rand = random.Random(seed)
+        self._lock = threading.Lock()
+        self.chat = _ns(completions=_ns(create=self.create))
+
+    def _usage(self, messages, completion):
+        prompt = sum(len(m["content"]) for m in messages) // 2
+        system = messages[0]["content"] if messages else ""
+        with self._lock:
+            cached = int(prompt * self.cached_ratio) if system in self._seen else 0
+            self._seen.add(system)
+        return _ns(prompt_tokens=prompt, completion_tokens=completion,
+                   prompt_tokens_details=_ns(cached_tokens=cached))
+
+    def _report(self, messages):
+        user = messages[-1]["content"] if messages else ""
+        m = re.search(r"Client_Tag: (.*)", user) or re.search(r"Member: (.*)", user)
+        with self._lock:
+            verdict = self._rand.choice(VERDICTS)
+        return REPORT.format(ts=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                             member=m.group(1) if m else "회원", verdict=verdict)
+
+    def create(self, model=None, messages=(), temperature=None, stream=False, max_tokens=None,
+               stream_options=None, **kw):
+        with self._lock: self.calls += 1
+        text = self._report(messages)
+        n = max(1, min(self.tokens, max_tokens or self.tokens))
+        size = max(1, len(text) // n)
+        pieces = [text[i:i + size] for i in range(0, len(text), size)]
+        usage = self._usage(messages, len(pieces))
+        if not stream:
+            time.sleep(self.ttft + self.token_delay * len(pieces))
+            return _ns(choices=[_ns(message=_ns(content=text))], usage=usage)
+        return self._stream(pieces, usage if (stream_options or {}).get("include_usage") else None)
+
+    def _stream(self, pieces, usage):
+        time.sleep(self.ttft)
+        for i, p in enumerate(pieces):
+            if i: time.sleep(self.token_delay)
+            yield _ns(choices=[_ns(delta=_ns(content=p))], usage=None)
+        if usage is not None:
+            yield _ns(choices=[], usage=usage)
+
+
+def synthetic_rows(n, start=None, branches=("킹스짐 1호점 (본점)", "킹스짐 2호점", "킹스짐 3호점"), seed=0):
+    """HQ 로그 형식(log_schema.HQ_COLUMNS) 합성 행 n 개 (시간순)"""
+    rand = random.Random(seed)
+    start = start or datetime(2025, 1, 1)
+    step = timedelta(days=365) / max(n, 1)
+    zones, events = ["ZONE A", "ZONE B", "ZONE C", "ZONE D"], ["Routine Patrol", "Safety OT", "Maintenance"]
+    rows = []
+    for i in range(n):
+        ts = (start + step * i).strftime("%Y-%m-%d %H:%M:%S")
+        if rand.random() < 0.3:
+            rows.append([ts, "PT_SAFETY_LOG", rand.choice(branches), "", "", f"트레이너{rand.randint(1, 30)}",
+                         "판정: " + rand.choice(["⛔", "⚠️", "✅"]) + "\n요약\n"])
+        else:
+            rows.append([ts, "FACILITY", rand.choice(branches), rand.choice(zones), rand.choice(events),
+                         f"직원{rand.randint(1, 50)}", "MACHINE_STATUS: OK / ENV_CLEAR: OK"])
+    return rows
+
+
+class FakeWorksheet:
+    """gspread.Worksheet 대역 - 호출마다 latency 초 지연 (+ 1천 행당 per_1k_rows 초)"""
+
+    def __init__(self, title="sheet1", header=None, rows=None, latency=0.2, per_1k_rows=0.01, fail_rate=0.0, seed=0):
+        self.title = title
+        self.rows = ([list(header)] if header else []) + [list(r) for r in (rows or [])]
+        self.latency = latency
+        self.per_1k_rows = per_1k_rows
+        self.fail_rate = fail_rate   # 무작위 실패 비율 (재시도 경로 측정용)
+        self.calls = 0
+        self._rand = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _call(self, n_rows=0):
+        with self._lock:
+            self.calls += 1
+            fail = self._rand.random() < self.fail_rate
+        time.sleep(self.latency + self.per_1k_rows * n_rows / 1000)
+        if fail: raise RuntimeError("fake sheet error (503)")
+
+    def append_row(self, row, **kw):
+        self.append_rows([row])
+
+    def append_rows(self, rows, **kw):
+        self._call(len(rows))
+        with self._lock: self.rows.extend(list(r) for r in rows)
+
+    def get_all_values(self):
+        self._call(len(self.rows))
+        with self._lock: return [list(r) for r in self.rows]
+
+    def get_values(self, rng):
+        start = int(re.match(r"A(\d+)", rng).group(1))
+        with self._lock: out = [list(r) for r in self.rows[start - 1:]]
+        self._call(len(out))
+        return out
+
+    def col_values(self, col):
+        self._call(len(self.rows))
+        with self._lock: return [(r + [""] * col)[col - 1] for r in self.rows]
+
+
+class FakeSpreadsheet:
+    """gspread.Spreadsheet 대역 (ShardRouter 용 add_worksheet / worksheet)"""
+
+    def __init__(self, sheet1=None, latency=0.2):
+        self.latency = latency
+        self.sheet1 = sheet1 or FakeWorksheet(latency=latency)
+        self.tabs = {self.sheet1.title: self.sheet1}
+
+    def worksheet(self, title):
+        if title not in self.tabs: raise KeyError(title)
+        return self.tabs[title]
+
+    def add_worksheet(self, title, rows=1000, cols=26):
+        if title in self.tabs: raise RuntimeError(f"{title} already exists")
+        self.tabs[title] = FakeWorksheet(title, latency=self.latency)
+        return self.tabs[title]
+
+
+class FakeConnection:
+    """map_db.SheetConnection 대역 - get_sheet / worksheet / reset"""
+
+    def __init__(self, spreadsheet):
+        self.spreadsheet = spreadsheet
+        self.sheet = spreadsheet.sheet1
+
+    def get_sheet(self):
+        return self.sheet, "✅ DB 연결됨 (fake)"
+
+    def worksheet(self, title):
+        try: return self.spreadsheet.worksheet(title)
+        except KeyError: return None
+
+    def reset(self, err=None):
+        pass
+
+
+class FakeKakaoServer:
+    """카카오 메모 API 흉내 - with FakeKakaoServer(latency=0.1) as url: KakaoDispatcher(..., base_url=url)"""
+
+    def __init__(self, latency=0.1, status=200):
+        self.latency = latency
+        self.status = status
+        self.received = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                time.sleep(server.latency)
+                server.received += 1
+                body = json.dumps({"result_code": 0 if server.status == 200 else -1}).encode()
+                self.send_response(server.status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-kakao", daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self.url
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,123 @@
+import json
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import requests
+
+import registry
+import tracing
+from ratelimit import TokenBucket
+from write_queue import backoff_delay, status_code_of
+
+# ---------------------------------------------------------
+# [카카오 알림 디스패처] 요청 스레드는 메시지를 큐에 넣고 바로 반환
+# - requests.Session 재사용 → 매번 새 TLS 연결을 맺지 않음
+# - 토큰 버킷으로 초당 전송량 제한 (카카오 쿼터 초과 방지)
+# - 실패 시 백오프 재시도, 메시지별 전송 상태를 UI 에서 조회
+# - base_url 을 바꾸면 로컬 스텁 서버로 테스트 가능
+# ---------------------------------------------------------
+KAKAO_API_URL = "https://kapi.kakao.com"
+MEMO_PATH = "/v2/api/talk/memo/default/send"
+QUEUE_SIZE = 200      # 대기열 최대 길이 (넘치면 즉시 실패 처리)
+RATE = 5.0            # 초당 전송 수
+BURST = 10            # 순간 최대 전송 수
+MAX_ATTEMPTS = 4
+TIMEOUT = 5
+STATUS_KEEP = 1000
+
+
+def build_payload(text, web_url="https://streamlit.io"):
+    return {"template_object": json.dumps({"object_type": "text", "text": text, "link": {"web_url": web_url}},
+                                          ensure_ascii=False)}
+
+
+class KakaoDispatcher:
+    def __init__(self, token_getter, base_url=KAKAO_API_URL, rate=RATE, burst=BURST, queue_size=QUEUE_SIZE):
+        self.token_getter = token_getter  # () -> 액세스 토큰 문자열
+        self.url = base_url.rstrip("/") + MEMO_PATH
+        self.session = requests.Session()
+        self.bucket = TokenBucket(rate, burst)
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.status = OrderedDict()       # msg_id -> (state, detail)
+        self._cond = threading.Condition()
+        self._worker = None
+
+    def send(self, text):
+        """(msg_id, None) 또는 대기열이 가득 찼으면 (None, 사유)"""
+        msg_id = uuid.uuid4().hex
+        try:
+            self.queue.put_nowait((msg_id, text))
+        except queue.Full:
+            return None, "전송 대기열 초과"
+        self._set_status(msg_id, "queued", None)
+        self._ensure_worker()
+        return msg_id, None
+
+    def get_status(self, msg_id):
+        with self._cond:
+            return self.status.get(msg_id, ("unknown", None))
+
+    def wait(self, msg_id, timeout):
+        deadline = time.time() + timeout
+        with self._cond:
+            while True:
+                state, detail = self.status.get(msg_id, ("unknown", None))
+                remaining = deadline - time.time()
+                if state in ("sent", "failed") or remaining <= 0:
+                    return state, detail
+                self._cond.wait(remaining)
+
+    def _set_status(self, msg_id, state, detail):
+        with self._cond:
+            self.status[msg_id] = (state, detail)
+            self.status.move_to_end(msg_id)
+            while len(self.status) > STATUS_KEEP:
+                self.status.popitem(last=False)
+            self._cond.notify_all()
+
+    def _ensure_worker(self):
+        if self._worker and self._worker.is_alive(): return
+        self._worker = threading.Thread(target=self._run, name="map-kakao", daemon=True)
+        self._worker.start()
+
+    def _post(self, text):
+        headers = {"Authorization": "Bearer " + self.token_getter()}
+        res = self.session.post(self.url, headers=headers, data=build_payload(text), timeout=TIMEOUT)
+        if res.status_code != 200:
+            err = requests.HTTPError(f"실패({res.status_code})")
+            err.response = res
+            raise err
+
+    def _run(self):
+        while True:
+            msg_id, text = self.queue.get()
+            self._set_status(msg_id, "sending", None)
+            last_err = None
+            start = time.perf_counter()
+            retries = 0
+            for attempt in range(MAX_ATTEMPTS):
+                retries = attempt
+                self.bucket.acquire()
+                try:
+                    self._post(text)
+                    last_err = None
+                    break
+                except Exception as e:
+                    last_err = e
+                    code = status_code_of(e)
+                    # 인증/요청 오류(4xx, 429 제외)는 재시도해도 같은 결과
+                    if code and 400 <= code < 500 and code != 429: break
+                    time.sleep(backoff_delay(attempt, e))
+            tracing.get_tracer().record("kakao.send", time.perf_counter() - start, ok=last_err is None,
+                                        error=last_err, retries=retries)
+            if last_err is None: self._set_status(msg_id, "sent", "성공")
+            else: self._set_status(msg_id, "failed", str(last_err))
+            self.queue.task_done()
+
+
+def get_dispatcher(key, token_getter, base_url=KAKAO_API_URL):
+    """key 별 공용 KakaoDispatcher (token_getter 는 처음 호출 때 것을 계속 사용)"""
+    return registry.shared("kakao", key, lambda: KakaoDispatcher(token_getter, base_url), base_url=base_url)
@@ -0,0 +1,130 @@
+import sqlite3
+import threading
+
+import pandas as pd
+
+import registry
+
+# ---------------------------------------------------------
+# [로그 조회 API] 서버 측 필터 + 페이지네이션 + 전문 검색
+# - LogStore 가 수집한 행을 SQLite(메모리) 인덱스에 함께 적재
+# - 검색은 FTS5(trigram) 인덱스 사용 → 한글 부분 문자열도 검색 가능
+# - resolve 를 주면 RawData 의 blob 참조를 원문으로 바꿔 색인 (시트에는 판정/요약/해시만 있으므로)
+# - 조회 결과는 행 번호만 반환 → 화면에는 한 페이지 분량만 DataFrame 으로 꺼냄
+# ---------------------------------------------------------
+PAGE_SIZE = 50
+
+
+def _fts_tokenizer(db):
+    """trigram 토크나이저(SQLite 3.34+)가 있으면 사용, 없으면 기본 토크나이저"""
+    try:
+        db.execute("CREATE VIRTUAL TABLE temp._probe USING fts5(x, tokenize='trigram')")
+        db.execute("DROP TABLE temp._probe")
+        return "trigram"
+    except sqlite3.OperationalError:
+        return "unicode61"
+
+
+class LogIndex:
+    def __init__(self, field_map=None, resolve=None):
+        # 조회 필드 → DataFrame 열 이름 (예: {"staff": "Detail4"})
+        self.field_map = {"time": "Timestamp", "type": "Type", "branch": "Branch", "staff": "Staff"}
+        self.field_map.update(field_map or {})
+        self.resolve = resolve  # RawData 값 → 색인할 본문 (예: BlobStore.resolve)
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(":memory:", check_same_thread=False, isolation_level=None)
+        self.tokenizer = _fts_tokenizer(self.db)
+        self._create()
+
+    def _create(self):
+        self.db.executescript(f"""
+            DROP TABLE IF EXISTS logs_fts;
+            DROP TABLE IF EXISTS logs;
+            CREATE TABLE logs (id INTEGER PRIMARY KEY, ts TEXT, type TEXT, branch TEXT, staff TEXT, body TEXT);
+            CREATE INDEX idx_logs_ts ON logs(ts);
+            CREATE INDEX idx_logs_type_ts ON logs(type, ts);
+            CREATE INDEX idx_logs_branch_ts ON logs(branch, ts);
+            CREATE VIRTUAL TABLE logs_fts USING fts5(body, content='logs', content_rowid='id',
+                                                     tokenize='{self.tokenizer}');
+        """)
+
+    def _col(self, chunk, field):
+        col = self.field_map.get(field)
+        if col and col in chunk.columns: return chunk[col].astype(str).where(chunk[col].notna(), "")
+        return pd.Series("", index=chunk.index)
+
+    def on_ingest(self, chunk, full, raw=None):
+        """LogStore 리스너: 새 행을 인덱스에 추가 (전체 재로딩이면 처음부터)"""
+        if chunk is None: return
+        ts_col = self.field_map["time"]
+        ts = chunk[ts_col].dt.strftime("%Y-%m-%d %H:%M:%S").fillna("") if ts_col in chunk.columns \
+            else pd.Series("", index=chunk.index)
+        text_cols = [c for c in chunk.columns if c != ts_col]
+        body = chunk[text_cols].astype(str).agg(" ".join, axis=1) if text_cols else pd.Series("", index=chunk.index)
+        if raw is not None:
+            raw = raw.reindex(chunk.index).fillna("").astype(str)
+            if self.resolve: raw = raw.map(lambda v: self.resolve(v) or v)
+            body = body + " " + raw
+        rows = list(zip(chunk.index.astype(int), ts, self._col(chunk, "type"), self._col(chunk, "branch"),
+                        self._col(chunk, "staff"), body))
+        with self._lock:
+            if full: self._create()
+            self.db.execute("BEGIN")
+            try:
+                self.db.executemany("INSERT INTO logs VALUES (?, ?, ?, ?, ?, ?)", rows)
+                self.db.executemany("INSERT INTO logs_fts(rowid, body) VALUES (?, ?)", [(r[0], r[5]) for r in rows])
+                self.db.execute("COMMIT")
+            except Exception:
+                self.db.execute("ROLLBACK")
+                raise
+
+    def query(self, page=1, page_size=PAGE_SIZE, start=None, end=None, types=None, branch=None, staff=None,
+              text=None, ascending=False):
+        """(행 번호 목록, 전체 건수) - start/end 는 'YYYY-MM-DD' 또는 datetime (end 는 그 날 포함)"""
+        where, args = [], []
+        if start is not None:
+            where.append("l.ts >= ?"); args.append(str(pd.Timestamp(start).strftime("%Y-%m-%d")))
+        if end is not None:
+            where.append("l.ts < ?"); args.append(str((pd.Timestamp(end) + pd.Timedelta(days=1)).strftime("%Y-%m-%d")))
+        if types:
+            where.append(f"l.type IN ({','.join('?' * len(types))})"); args.extend(types)
+        if branch:
+            where.append("l.branch = ?"); args.append(branch)
+        if staff:
+            where.append("instr(l.staff, ?) > 0"); args.append(staff)
+        join = ""
+        text = (text or "").strip()
+        if text:
+            if self.tokenizer == "trigram" and len(text) >= 3:
+                join = "JOIN logs_fts f ON f.rowid = l.id"
+                where.append("logs_fts MATCH ?"); args.append('"' + text.replace('"', '""') + '"')
+            else:
+                where.append("instr(l.body, ?) > 0"); args.append(text)
+        cond = (" WHERE " + " AND ".join(where)) if where else ""
+        order = "ASC" if ascending else "DESC"
+        with self._lock:
+            total = self.db.execute(f"SELECT COUNT(*) FROM logs l {join}{cond}", args).fetchone()[0]
+            ids = [r[0] for r in self.db.execute(
+                f"SELECT l.id FROM logs l {join}{cond} ORDER BY l.ts {order}, l.id {order} LIMIT ? OFFSET ?",
+                args + [page_size, max(page - 1, 0) * page_size])]
+        return ids, total
+
+    def iter_ids(self, chunk_size=5000, **cond):
+        """내보내기용: 조건에 맞는 행 번호를 chunk_size 개씩 차례로 (전체 목록을 한 번에 만들지 않음)"""
+        page = 1
+        while True:
+            ids, _ = self.query(page=page, page_size=chunk_size, **cond)
+            if not ids: return
+            yield ids
+            if len(ids) < chunk_size: return
+            page += 1
+
+    def distinct(self, field):
+        """필터 선택지용 (예: 지점 목록)"""
+        assert field in ("type", "branch", "staff")
+        with self._lock:
+            return [r[0] for r in self.db.execute(f"SELECT DISTINCT {field} FROM logs WHERE {field} != '' ORDER BY 1")]
+
+
+def get_log_index(key, field_map=None, resolve=None):
+    return registry.shared("log_query", key, lambda: LogIndex(field_map, resolve), field_map=field_map)
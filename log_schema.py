@@ -0,0 +1,56 @@
+import pandas as pd
+
+# ---------------------------------------------------------
+# [타입 지정 로그 스키마] 시트에서 읽은 문자열 행을 수집 시 1회만 변환
+# - Timestamp → datetime64, Type/Branch/Zone 등 → category (메모리 절감 + 빠른 비교)
+# - RawData(최대 4000자 리포트)는 본 테이블에서 분리 → 필요할 때만 조회
+# - pyarrow 가 설치되어 있으면 자유 텍스트 열은 Arrow 문자열로 보관
+# ---------------------------------------------------------
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+CATEGORY_COLUMNS = ["Type", "Branch", "Zone", "Event", "Staff"]
+PAYLOAD_COLUMN = "RawData"
+# 본사 관제(dashboard.py)용 시설 점검 로그 열 순서 (streamlit_app.py 가 이 순서로 기록)
+HQ_COLUMNS = ["Timestamp", "Type", "Branch", "Zone", "Event", "Staff", "RawData"]
+
+PT_TYPE = "PT_SAFETY_LOG"
+FACILITY_TYPE = "FACILITY"
+
+try:
+    import pyarrow  # noqa: F401
+    TEXT_DTYPE = "string[pyarrow]"
+except ImportError:
+    TEXT_DTYPE = None
+
+
+def parse_timestamps(values):
+    ts = pd.to_datetime(values, format=TS_FORMAT, errors="coerce")
+    if ts.isna().any():
+        # 형식이 다른 과거 데이터(예: '2026-01-05 9:03')는 느린 경로로 한 번 더 시도
+        ts = ts.fillna(pd.to_datetime(values[ts.isna()], errors="coerce"))
+    return ts
+
+
+def type_frame(df):
+    """문자열 DataFrame → (타입 지정된 DataFrame, RawData Series 또는 None)"""
+    raw = df.pop(PAYLOAD_COLUMN) if PAYLOAD_COLUMN in df.columns else None
+    if "Timestamp" in df.columns:
+        df["Timestamp"] = parse_timestamps(df["Timestamp"])
+    for col in df.columns:
+        if col == "Timestamp": continue
+        if col in CATEGORY_COLUMNS: df[col] = df[col].astype("category")
+        elif TEXT_DTYPE: df[col] = df[col].astype(TEXT_DTYPE)
+    return df, raw
+
+
+def align_categories(df, chunk):
+    """concat 전에 category 열의 dtype 을 맞춤 (같은 dtype 이면 concat 후에도 category 유지)
+    - 새 값이 있을 때만 df 쪽 카테고리를 넓힘 (기존 코드는 그대로, 전체 재변환 X)"""
+    for col in CATEGORY_COLUMNS:
+        if col not in df.columns or col not in chunk.columns: continue
+        if not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype("category")  # 빈 시트에서 시작한 경우 1회만
+        known = df[col].cat.categories
+        new = pd.Index(chunk[col].dropna().unique()).difference(known)
+        if len(new): df[col] = df[col].cat.add_categories(new)
+        chunk[col] = pd.Categorical(chunk[col], dtype=df[col].dtype)
+
@@ -0,0 +1,194 @@
+import threading
+import time
+
+import pandas as pd
+
+import log_schema
+import registry
+import tracing
+from write_queue import status_code_of
+
+# ---------------------------------------------------------
+# [증분 로그 캐시] 대시보드용 로컬 DataFrame 보관
+# - 처음 1회만 전체를 읽고, 이후에는 마지막으로 읽은 행 다음부터 새로 추가된 행만 가져옴
+# - TTL 안에서는 네트워크 호출 없이 캐시된 DataFrame 을 그대로 반환
+# - typed=True 면 새로 읽은 행만 log_schema 로 변환 (datetime/category), RawData 는 별도 보관
+# - start_poller() 로 백그라운드 증분 수집 (화면은 캐시만 읽음), stop_poller() 또는 갱신 요청이 끊기면 종료
+# - router(shards.ShardRouter) 를 주면 since 이후 샤드만 병렬로 읽고, 이후에는 최근 샤드의 새 행만 수집
+# ---------------------------------------------------------
+DEFAULT_TTL = 30  # 초
+POLL_LEASE = 4     # start_poller 재호출 없이 poll_interval 의 이 배수만큼 지나면 폴러 종료 (보는 화면이 없음)
+
+
+def col_letter(n):
+    """1 → A, 27 → AA"""
+    s = ""
+    while n > 0:
+        n, r = divmod(n - 1, 26)
+        s = chr(65 + r) + s
+    return s
+
+
+class LogStore:
+    def __init__(self, sheet_getter, columns=None, ttl=DEFAULT_TTL, typed=False, listeners=None,
+                 router=None, since=None, on_error=None):
+        self.sheet_getter = sheet_getter  # () -> (sheet, msg), 보통 SheetConnection.get_sheet
+        self.on_error = on_error          # 429 이외 읽기 오류 시 호출 (예: SheetConnection.reset → 다음 읽기에서 재연결)
+        self.router = router   # 샤드 모드: 시트 대신 매니페스트의 샤드들을 읽음
+        self.since = since     # 샤드 모드에서 읽을 시작 월/날짜 (None = 전체)
+        self.next_rows = {}    # 샤드 모드: 샤드 제목 → 다음에 읽을 행 번호
+        self.fixed_columns = list(columns) if columns else None
+        self.columns = self.fixed_columns
+        self.ttl = ttl
+        self.typed = typed
+        self.df = None
+        self.raw = None        # typed=True 일 때 RawData (df 와 같은 인덱스)
+        self.listeners = list(listeners or [])  # 수집 직후 호출: fn(새 행 DataFrame, 전체재로딩 여부, RawData)
+        self.next_row = 1      # 다음에 읽을 시트 행 번호 (1부터 시작, 1행은 헤더)
+        self.fetched_at = 0
+        self.last_error = None
+        self.listener_error = None
+        self._lock = threading.Lock()
+        self._poller = None
+        self._poll_stop = threading.Event()
+        self._poll_until = 0
+
+    def _sheet(self):
+        sheet, msg = self.sheet_getter()
+        if sheet is None: raise RuntimeError(msg)
+        return sheet
+
+    def _frame(self, rows):
+        width = len(self.columns)
+        # 시설 로그(6칸)처럼 짧은 행은 빈칸으로 채워 열 개수를 맞춤
+        rows = [(r + [""] * width)[:width] for r in rows]
+        df = pd.DataFrame(rows, columns=self.columns)
+        if not self.typed: return df, None
+        return log_schema.type_frame(df)
+
+    def _read_shards(self):
+        """since 이후 샤드 전체를 병렬로 읽어 [헤더] + 행들로 합침"""
+        self._sheet()  # 연결 확인
+        titles = self.router.shards(start=self.since, refresh=True)
+        parts = self.router.fetch(lambda ws, t: ws.get_all_values(), titles)
+        self.next_rows = {t: len(parts[t]) + 1 for t in titles}
+        header = next((parts[t][0] for t in titles if parts[t]), None)
+        if header is None: return []
+        return [header] + [r for t in titles for r in parts[t][1:]]
+
+    def _read_new_shard_rows(self, last_col):
+        """최근 샤드들에서 마지막으로 읽은 행 다음부터만 병렬 조회"""
+        self._sheet()
+        active = self.router.active(refresh=True)
+        in_range = set(self.router.shards(start=self.since))
+        titles = [t for t in active if t in in_range]
+        parts = self.router.fetch(lambda ws, t: ws.get_values(f"A{self.next_rows.get(t, 2)}:{last_col}"), titles)
+        rows = []
+        for t in titles:
+            self.next_rows[t] = self.next_rows.get(t, 2) + len(parts[t])  # 빈 행 포함 (행 번호 기준)
+            rows += [r for r in parts[t] if any(r)]
+        return rows
+
+    def _full_load(self):
+        with tracing.get_tracer().span("sheets.read_all") as s:
+            data = self._read_shards() if self.router else self._sheet().get_all_values()
+            s["rows"] = len(data)
+        if not data:
+            self.columns = self.fixed_columns or []
+            self.df, self.raw = self._frame([])
+            self.next_row = 1
+            return
+        self.columns = self.fixed_columns or [c for c in data[0] if c]
+        self.df, self.raw = self._frame(data[1:])
+        self.next_row = len(data) + 1
+        self._notify(self.df, True, self.raw)
+
+    def _incremental_load(self):
+        with tracing.get_tracer().span("sheets.read_new") as s:
+            if self.router:
+                rows = self._read_new_shard_rows(col_letter(len(self.columns)))
+            else:
+                rng = f"A{self.next_row}:{col_letter(len(self.columns))}"
+                fetched = self._sheet().get_values(rng)
+                self.next_row += len(fetched)  # 중간의 빈 행도 시트 행이므로 그대로 건너뜀
+                rows = [r for r in fetched if any(r)]
+            s["rows"] = len(rows)
+        if rows:
+            df, raw = self._frame(rows)
+            df.index = range(len(self.df), len(self.df) + len(df))  # concat 후 인덱스와 일치시킴
+            if self.typed: log_schema.align_categories(self.df, df)
+            self.df = pd.concat([self.df, df])
+            if raw is not None:
+                raw.index = df.index
+                self.raw = pd.concat([self.raw, raw])
+            self._notify(df, False, raw)
+        return len(rows)
+
+    def _notify(self, chunk, full, raw=None):
+        for fn in self.listeners:
+            try: fn(chunk, full, raw)
+            except Exception as e: self.listener_error = str(e)
+
+    def get_raw(self, idx):
+        """typed=True 일 때 특정 행의 RawData (리포트 원문)"""
+        if self.raw is None or idx not in self.raw.index: return ""
+        return self.raw.loc[idx]
+
+    def get(self, force=False):
+        """캐시된 전체 DataFrame 반환 (TTL 이 지났으면 새 행만 추가로 가져옴)"""
+        with self._lock:
+            if self.df is not None and not force and time.time() - self.fetched_at < self.ttl:
+                return self.df
+            try:
+                if self.df is None or not self.columns:
+                    self._full_load()
+                else:
+                    self._incremental_load()
+                self.fetched_at = time.time()
+                self.last_error = None
+            except Exception as e:
+                self.last_error = str(e)
+                if self.on_error and status_code_of(e) != 429: self.on_error(e)
+                if self.df is None: raise
+                # 네트워크 오류 시 마지막 캐시로 계속 서비스
+            return self.df
+
+    # --- [라이브 모드] 백그라운드 폴러: interval 초마다 새로 추가된 행만 수집 ---
+    def start_poller(self, interval):
+        """폴러 시작 또는 연장 - 라이브 화면이 갱신될 때마다 호출"""
+        self.poll_interval = interval
+        self._poll_until = time.time() + interval * POLL_LEASE
+        self._poll_stop.clear()
+        if self._poller and self._poller.is_alive(): return
+        self._poller = threading.Thread(target=self._poll_loop, name="map-log-poller", daemon=True)
+        self._poller.start()
+
+    def stop_poller(self):
+        self._poll_stop.set()
+
+    def _poll_loop(self):
+        while not self._poll_stop.wait(self.poll_interval):
+            if time.time() > self._poll_until: break  # 라이브 화면이 모두 닫힘
+            try: self.get(force=True)
+            except Exception as e: self.last_error = str(e)
+
+    def invalidate(self, full=True):
+        """수동 새로고침: full=True 면 다음 get() 에서 시트 전체를 다시 읽음 (수정/삭제 반영)"""
+        with self._lock:
+            self.fetched_at = 0
+            if full:
+                self.df = self.raw = None
+                self.columns = self.fixed_columns
+                self.next_row = 1
+                self.next_rows = {}
+
+
+def get_log_store(key, sheet_getter, columns=None, ttl=DEFAULT_TTL, typed=False, listeners=None,
+                  router=None, since=None, on_error=None):
+    """key 별 공용 LogStore (모든 세션이 같은 캐시를 봄). ttl 은 호출마다 갱신 가능"""
+    store = registry.shared("log_store", key,
+                            lambda: LogStore(sheet_getter, columns, ttl, typed, listeners, router, since, on_error),
+                            columns=list(columns) if columns else None, typed=typed, since=since,
+                            sharded=router is not None)
+    store.ttl = ttl
+    return store
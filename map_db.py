@@ -0,0 +1,107 @@
+import threading
+import time
+
+import gspread
+
+import tracing
+import registry
+
+# ---------------------------------------------------------
+# [공용 DB 연결 레이어] 프로세스 단위로 구글 시트 연결을 1회만 생성
+# - Streamlit 은 위젯 클릭마다 스크립트를 재실행하지만, import 된 모듈은 유지됨
+# - 따라서 여기 보관한 client / worksheet 핸들은 모든 세션이 공유함
+# - 읽기/쓰기 API 가 429 이외의 오류로 실패하면 reset() → 다음 호출에서 재연결 (WriteQueue / LogStore / ShardRouter)
+# ---------------------------------------------------------
+SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+DB_NAME = "MAP_DATABASE"
+
+TOKEN_LIFETIME = 3600   # 구글 access token 유효시간 (초)
+REFRESH_MARGIN = 600    # 만료 10분 전에 백그라운드 갱신
+RECONNECT_COOLDOWN = 5  # 연결 실패 후 재시도 최소 간격 (초)
+
+
+class SheetConnection:
+    """인증된 gspread client 와 워크시트 핸들을 보관하고, 토큰 갱신/재연결을 담당합니다."""
+
+    def __init__(self, creds_loader, db_name=DB_NAME):
+        self.creds_loader = creds_loader  # 호출 시 ServiceAccountCredentials 를 반환하는 함수
+        self.db_name = db_name
+        self.client = None
+        self.spreadsheet = None
+        self.sheet = None
+        self.authorized_at = 0
+        self.last_error = None
+        self.last_attempt = 0
+        self._lock = threading.RLock()
+        self._refresher = None
+
+    # --- 연결 ---
+    def _connect(self):
+        creds = self.creds_loader()
+        client = gspread.authorize(creds)
+        spreadsheet = client.open(self.db_name)
+        self.client, self.spreadsheet, self.sheet = client, spreadsheet, spreadsheet.sheet1
+        self.authorized_at = time.time()
+        self.last_error = None
+
+    def get_sheet(self):
+        """(sheet, 메시지) 반환. 이미 연결되어 있으면 네트워크 호출 없이 바로 반환합니다."""
+        if self.sheet is not None:
+            return self.sheet, "✅ DB 연결됨"
+        with self._lock:
+            if self.sheet is None:
+                # 연결 실패가 반복될 때 매 rerun 마다 인증을 두드리지 않도록 쿨다운
+                if self.last_error and time.time() - self.last_attempt < RECONNECT_COOLDOWN:
+                    return None, self.last_error
+                self.last_attempt = time.time()
+                try:
+                    with tracing.get_tracer().span("sheets.connect"):
+                        self._connect()
+                except Exception as e:
+                    self.last_error = str(e)
+                    return None, self.last_error
+            self._start_refresher()
+        return self.sheet, "✅ DB 연결됨"
+
+    def worksheet(self, title):
+        """같은 스프레드시트의 다른 탭 핸들 (없으면 None)"""
+        sheet, _ = self.get_sheet()
+        if sheet is None: return None
+        try: return self.spreadsheet.worksheet(title)
+        except Exception: return None
+
+    def reset(self, err=None):
+        """API 호출이 실패했을 때 호출 → 다음 get_sheet() 에서 재연결"""
+        with self._lock:
+            self.client = self.spreadsheet = self.sheet = None
+            if err is not None:
+                self.last_error = str(err)
+
+    # --- 백그라운드 토큰 갱신 ---
+    def _start_refresher(self):
+        if self._refresher and self._refresher.is_alive(): return
+        self._refresher = threading.Thread(target=self._refresh_loop, name="map-db-refresh", daemon=True)
+        self._refresher.start()
+
+    def _refresh_loop(self):
+        while True:
+            wait = self.authorized_at + TOKEN_LIFETIME - REFRESH_MARGIN - time.time()
+            time.sleep(max(wait, 30))
+            if time.time() < self.authorized_at + TOKEN_LIFETIME - REFRESH_MARGIN: continue
+            try:
+                # 새 client 를 먼저 만든 뒤 교체 → 요청 스레드는 갱신을 기다리지 않음
+                creds = self.creds_loader()
+                client = gspread.authorize(creds)
+                spreadsheet = client.open(self.db_name)
+                with self._lock:
+                    self.client, self.spreadsheet, self.sheet = client, spreadsheet, spreadsheet.sheet1
+                    self.authorized_at = time.time()
+            except Exception as e:
+                # 실패 시 기존 핸들은 유지 (토큰이 아직 남아있음), 1분 뒤 재시도
+                self.last_error = str(e)
+                self.authorized_at = time.time() - TOKEN_LIFETIME + REFRESH_MARGIN + 60
+
+
+def get_connection(key, creds_loader, db_name=DB_NAME):
+    """key 별 공용 SheetConnection (인증/시트 열기는 프로세스당 1회)"""
+    return registry.shared("map_db", key, lambda: SheetConnection(creds_loader, db_name), db_name=db_name)
@@ -0,0 +1,64 @@
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+import tracing
+
+# ---------------------------------------------------------
+# [병렬 파이프라인] 리포트가 나온 뒤의 서로 독립적인 단계(저장, 알림)를 동시에 실행
+# - 단계별 타임아웃: 느린 단계가 있어도 화면은 해당 시간까지만 기다림 (작업 자체는 계속 진행)
+# - 단계별 소요시간 기록 → 전체 지연 = 각 단계의 합이 아니라 최댓값
+# ---------------------------------------------------------
+MAX_WORKERS = 8
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="map-pipeline")
+
+
+class StageResult:
+    def __init__(self, name, ok, value=None, error=None, elapsed=0.0, timed_out=False):
+        self.name = name
+        self.ok = ok
+        self.value = value
+        self.error = error
+        self.elapsed = elapsed  # 초
+        self.timed_out = timed_out  # 결과를 기다리다 포기함 (실패가 아니라 결과 미확인 - 작업은 계속 진행 중일 수 있음)
+
+    def __repr__(self):
+        return f"StageResult({self.name}, ok={self.ok}, {self.elapsed * 1000:.0f}ms)"
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - start
+
+
+def run_stages(stages):
+    """stages: [(이름, 함수, 타임아웃초)] → OrderedDict(이름 → StageResult)
+
+    함수가 (ok, value) 튜플을 반환하면 ok 를 그대로 사용하고, 예외는 실패로 기록합니다."""
+    start = time.perf_counter()
+    # 단계 스레드에서도 같은 trace id 로 기록되도록 현재 컨텍스트를 넘김
+    futures = [(name, _executor.submit(tracing.run_in_context(_timed), fn), timeout) for name, fn, timeout in stages]
+    results = OrderedDict()
+    for name, fut, timeout in futures:
+        remaining = start + timeout - time.perf_counter()
+        try:
+            value, elapsed = fut.result(timeout=max(remaining, 0))
+            ok = True
+            if isinstance(value, tuple) and len(value) == 2 and isinstance(value[0], bool):
+                ok, value = value
+            results[name] = StageResult(name, ok, value, None if ok else value, elapsed)
+        except FutureTimeout:
+            results[name] = StageResult(name, False, None, f"시간 초과 ({timeout}s)", timeout, timed_out=True)
+        except Exception as e:
+            results[name] = StageResult(name, False, None, str(e), time.perf_counter() - start)
+    for r in results.values():
+        tracing.get_tracer().record(f"stage.{r.name}", r.elapsed, ok=r.ok, error=r.error)
+    return results
+
+
+def timing_summary(results, labels=None):
+    """'저장 3ms · 알림 420ms' 형태의 한 줄 요약"""
+    labels = labels or {}
+    return " · ".join(f"{labels.get(r.name, r.name)} {r.elapsed * 1000:.0f}ms" for r in results.values())
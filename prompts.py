@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import deque
+
+# ---------------------------------------------------------
+# [프롬프트 빌더] 시스템 프롬프트는 매 호출 바이트 단위로 동일하게 유지
+# - 분석 일시 / 회원 태그 / 증상 등 요청마다 바뀌는 값은 user 메시지로 이동
+#   → 시스템 프롬프트 앞부분이 매번 같아 OpenAI 프롬프트 캐싱이 적용됨 (첫 토큰 지연/비용 감소)
+# - 섹션별 출력 길이 예산을 프롬프트에 명시하고 max_tokens 로 상한 고정
+# - 호출마다 prompt / completion / cached 토큰 수와 첫 토큰 지연(TTFT) 기록
+# ---------------------------------------------------------
+MAX_TOKENS_MARGIN = 100   # 섹션 예산 합계 위 여유분 (마크다운 구분선 등)
+USAGE_KEEP = 500          # 최근 호출 기록 보관 수
+
+
+def static_prefix(template, slots, budgets=None):
+    """템플릿의 {Slot} 자리를 <Slot> 로 바꾸고, 값은 user 메시지에서 옮겨 적도록 지시 → 고정 시스템 프롬프트"""
+    text = template
+    for name in slots:
+        text = text.replace("{" + name + "}", f"<{name}>")
+    rules = [f"**[INPUT SLOTS]** {', '.join(f'<{n}>' for n in slots)}: "
+             "copy the exact values given in the user message [INPUT DATA]."]
+    if budgets:
+        rules.append("**[LENGTH LIMITS]** " + " / ".join(f"{sec}: max {n} tokens" for sec, n in budgets.items()))
+    return text.rstrip() + "\n\n" + "\n".join(rules) + "\n"
+
+
+def user_message(fields):
+    """요청별 값 → user 메시지 (필드 순서 고정)"""
+    lines = [f"{k}: {v}" for k, v in fields.items()]
+    return "[INPUT DATA]\n" + "\n".join(lines) + "\n\nAnalyze now."
+
+
+def build_messages(prefix, fields):
+    return [{"role": "system", "content": prefix}, {"role": "user", "content": user_message(fields)}]
+
+
+def max_tokens_for(budgets):
+    return sum(budgets.values()) + MAX_TOKENS_MARGIN
+
+
+def usage_of(obj):
+    """OpenAI 응답/스트림 마지막 청크의 usage → dict (없으면 None)"""
+    u = getattr(obj, "usage", None)
+    if u is None: return None
+    details = getattr(u, "prompt_tokens_details", None)
+    return {
+        "prompt": getattr(u, "prompt_tokens", 0) or 0,
+        "completion": getattr(u, "completion_tokens", 0) or 0,
+        "cached": getattr(details, "cached_tokens", 0) or 0,
+    }
+
+
+class UsageLog:
+    def __init__(self, keep=USAGE_KEEP):
+        self.calls = deque(maxlen=keep)
+        self._lock = threading.Lock()
+
+    def record(self, source, usage, ttft=None, elapsed=None):
+        """source: 'pt' / 'batch' / 'lite' 등 호출 위치"""
+        if usage is None: return
+        with self._lock:
+            self.calls.append(dict(usage, source=source, ttft=ttft, elapsed=elapsed, at=time.time()))
+
+    def summary(self):
+        """평균 토큰 수 / 캐시 비율 / 평균 TTFT"""
+        with self._lock:
+            calls = list(self.calls)
+        if not calls: return {"calls": 0, "prompt": 0, "completion": 0, "cached_rate": 0.0, "ttft": None}
+        prompt = sum(c["prompt"] for c in calls)
+        ttfts = [c["ttft"] for c in calls if c["ttft"] is not None]
+        return {
+            "calls": len(calls),
+            "prompt": prompt / len(calls),
+            "completion": sum(c["completion"] for c in calls) / len(calls),
+            "cached_rate": sum(c["cached"] for c in calls) / prompt if prompt else 0.0,
+            "ttft": sum(ttfts) / len(ttfts) if ttfts else None,
+        }
+
+
+_usage = UsageLog()
+
+
+def get_usage_log():
+    """프로세스 전체에서 하나의 UsageLog 를 공유합니다."""
+    return _usage
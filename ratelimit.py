@@ -0,0 +1,29 @@
+import threading
+import time
+
+# ---------------------------------------------------------
+# [속도 제한] 토큰 버킷 - 초당 rate 개, 순간 최대 burst 개까지 허용
+# 카카오 알림 / 일괄 스크리닝의 OpenAI 호출 등에서 공용으로 사용
+# ---------------------------------------------------------
+
+
+class TokenBucket:
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """토큰 1개를 얻을 때까지 대기"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
@@ -0,0 +1,22 @@
+import threading
+
+# ---------------------------------------------------------
+# [프로세스 공용 인스턴스] get_xxx(key, ...) 들이 같이 쓰는 등록부
+# - (종류, key) 별로 인스턴스를 한 번만 만들고 모든 세션/스레드가 공유 (rerun 마다 재연결/재생성 X)
+# - 설정값(config)은 처음 만든 값과 비교 → 같은 key 에 다른 설정을 넘기면 조용히 무시하지 않고 ValueError
+# - 콜백/핸들 인자(sheet_getter, listeners 등)는 rerun 마다 새로 만들어지므로 비교 대상에서 제외
+# ---------------------------------------------------------
+_instances = {}   # (kind, key) -> (instance, config)
+_lock = threading.RLock()  # factory 안에서 다른 get_xxx 를 불러도 교착 없음
+
+
+def shared(kind, key, factory, **config):
+    """(kind, key) 의 공용 인스턴스 - 없으면 factory() 로 생성. config 가 처음 생성 때와 다르면 ValueError"""
+    with _lock:
+        entry = _instances.get((kind, key))
+        if entry is None:
+            entry = _instances[(kind, key)] = (factory(), config)
+        elif entry[1] != config:
+            changed = sorted(k for k in set(entry[1]) | set(config) if entry[1].get(k) != config.get(k))
+            raise ValueError(f"{kind}[{key!r}] 는 이미 다른 설정으로 생성됨: {', '.join(changed)}")
+        return entry[0]
@@ -0,0 +1,128 @@
+import re
+
+# ---------------------------------------------------------
+# [리포트 파서] AI/규칙 엔진 리포트를 한 번만 훑어 구조화된 기록으로 변환
+# - 판정(⛔/⚠️/✅), 위험 요인, 제한 / 대체 / 주의(큐잉), 카톡 본문, 한 줄 요약
+# - 화면 색상, 판정별 KPI, 카톡 전송, blob 저장이 모두 이 기록을 사용 → 리포트를 다시 검색하지 않음
+# - MAP_CORE_PROMPT(app.py), SMART-LITE(streamlit_app.py), 규칙 엔진, blob 요약(stub) 형식 모두 지원
+# ---------------------------------------------------------
+VERDICTS = (("⛔", "STOP", "res-stop"), ("⚠️", "MODIFY", "res-mod"), ("✅", "GO", "res-go"))
+VERDICT_MARKERS = ("종합 판정", "판정:")
+
+SECTION_RE = re.compile(r"^#{2,4}\s*(\d)\.")
+ITEM_RE = re.compile(r"^\**\s*(\d)\.\s*\**\s*([^:*]+?)\s*\**\s*:\s*\**\s*(.*)$")
+BULLET_RE = re.compile(r"^\s*[-•]\s*(.*)$")
+GUIDE_LABELS = (("limits", ("제한",)), ("alternatives", ("대체",)), ("cues", ("주의", "큐잉")))
+
+
+def _clean(text):
+    """마크다운 강조/앞쪽 이모지 제거"""
+    text = text.replace("**", "").strip()
+    for emoji, _, _ in VERDICTS:
+        if text.startswith(emoji): text = text[len(emoji):].strip()
+    return text
+
+
+def _find_verdict(text):
+    found = [(text.find(e), e) for e, _, _ in VERDICTS if e in text]
+    return min(found)[1] if found else None
+
+
+class Report:
+    def __init__(self, verdict="", risks=None, limits=None, alternatives=None, cues=None, kakao="", summary=""):
+        self.verdict = verdict            # STOP / MODIFY / GO / "" (판정 없음)
+        self.risks = risks or []
+        self.limits = limits or []
+        self.alternatives = alternatives or []
+        self.cues = cues or []
+        self.kakao = kakao                # 3번 섹션 카톡 본문 (없으면 "")
+        self.summary = summary            # 판정 줄 (없으면 첫 줄)
+
+    @property
+    def icon(self):
+        return next((e for e, v, _ in VERDICTS if v == self.verdict), "")
+
+    @property
+    def css(self):
+        return next((c for _, v, c in VERDICTS if v == self.verdict), "")
+
+    def to_dict(self):
+        return {"verdict": self.verdict, "risks": self.risks, "limits": self.limits,
+                "alternatives": self.alternatives, "cues": self.cues, "kakao": self.kakao, "summary": self.summary}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(**{k: d.get(k) for k in ("verdict", "risks", "limits", "alternatives", "cues", "kakao", "summary")
+                      if d.get(k) is not None})
+
+    def __repr__(self):
+        return f"Report({self.verdict or '-'}, risks={len(self.risks)}, kakao={len(self.kakao)}자)"
+
+
+def parse(text):
+    """리포트 문자열 → Report (한 번의 줄 단위 순회)"""
+    rep = Report()
+    section = None       # '### N.' 섹션 번호
+    item = None          # 'N. 제목:' 항목 종류: verdict / risks / guide
+    kakao, in_kakao = [], None
+    first_line = ""
+
+    for raw in (text or "").splitlines():
+        line = raw.strip()
+        if not line:
+            if in_kakao: kakao.append("")
+            continue
+        if not first_line and not line.startswith("#"): first_line = line
+
+        m = SECTION_RE.match(line)
+        if m:
+            section, item = m.group(1), None
+            in_kakao = False if section == "3" else None
+            continue
+
+        # 3번 섹션: 첫 '---' 다음부터 다음 '---' 전까지가 카톡 본문
+        if in_kakao is not None:
+            if line.startswith("---"):
+                if in_kakao: in_kakao = None
+                else: in_kakao = True
+            elif in_kakao:
+                kakao.append(raw.rstrip())
+            continue
+        if section == "2": continue  # 정밀 분석 로그는 구조화 대상 아님
+
+        m = ITEM_RE.match(line)
+        if m:
+            title, rest = m.group(2), m.group(3)
+            item = ("verdict" if "판정" in title else "risks" if ("위험" in title or "리스크" in title)
+                    else "guide" if ("가이드" in title or "액션" in title or "프로토콜" in title) else None)
+            line = rest
+            if item == "verdict" and not rep.summary: rep.summary = _clean(f"{title}: {rest}")
+        elif not rep.verdict and any(mk in line for mk in VERDICT_MARKERS):
+            item = "verdict"  # 번호 없는 '판정: ⛔' 줄 (blob 요약 등)
+            if not rep.summary: rep.summary = _clean(line)
+        if not line: continue
+
+        if item == "verdict" and not rep.verdict:
+            emoji = _find_verdict(line)
+            if emoji:
+                rep.verdict = next(v for e, v, _ in VERDICTS if e == emoji)
+                # '종합 판정:' 다음 줄에 선택지가 오는 형식 → 요약에 선택된 줄을 붙임
+                if rep.summary.endswith(":"):
+                    b = BULLET_RE.match(line)
+                    rep.summary = f"{rep.summary} {emoji} {_clean(b.group(1) if b else line)}"
+        elif item == "risks":
+            b = BULLET_RE.match(line)
+            if b and _clean(b.group(1)): rep.risks.append(_clean(b.group(1)))
+            elif not b and line != "---": rep.risks.append(_clean(line))
+        elif item == "guide":
+            b = BULLET_RE.match(line)
+            body = _clean(b.group(1) if b else line)
+            for field, labels in GUIDE_LABELS:
+                label = next((l for l in labels if body.startswith(l)), None)
+                if label:
+                    getattr(rep, field).append(body[len(label):].lstrip(" :").strip())
+                    break
+
+    rep.kakao = "\n".join(kakao).strip()
+    if not rep.summary: rep.summary = _clean(first_line)
+    return rep
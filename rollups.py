@@ -0,0 +1,87 @@
+import sqlite3
+import threading
+from collections import Counter
+
+import registry
+import report_parser
+
+# ---------------------------------------------------------
+# [KPI 사전 집계] 행이 저장될 때마다 (날짜, 지점, 유형, 판정) 카운터를 1씩 증가
+# - 대시보드 지표는 원본 로그 전체를 다시 세지 않고 작은 요약 테이블만 조회
+# - 요약 테이블 크기는 '날짜 × 지점 × 유형 × 판정' 조합 수 → 로그가 몇 년 쌓여도 일정
+# - 전체 로그로 재집계를 마친 적이 있는지 meta 테이블에 표시 (저장 카운터만 있고 과거 로그가 빠진 상태와 구분)
+# ---------------------------------------------------------
+DEFAULT_PATH = "map_rollups.db"
+
+
+def verdict_label(report):
+    """리포트 본문 → ⛔ / ⚠️ / ✅ (판정 줄이 없으면 빈 문자열)"""
+    return report_parser.parse(report).icon
+
+
+class Rollups:
+    def __init__(self, path=DEFAULT_PATH):
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS rollup (
+                day     TEXT NOT NULL,
+                branch  TEXT NOT NULL,
+                type    TEXT NOT NULL,
+                verdict TEXT NOT NULL,
+                count   INTEGER NOT NULL,
+                PRIMARY KEY (day, branch, type, verdict)
+            )""")
+        self.db.execute("CREATE TABLE IF NOT EXISTS rollup_meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def record(self, keys, replace=False):
+        """keys: [(day, branch, type, verdict)] → 한 트랜잭션으로 카운터 증가 (replace: 기존 집계를 지우고 새로)"""
+        counts = Counter(tuple("" if v is None else str(v) for v in k) for k in keys)
+        if not counts and not replace: return
+        with self._lock:
+            # IMMEDIATE: 같은 파일을 쓰는 다른 워커와 동시에 갱신해도 카운트 유실/교착 없음
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                if replace:
+                    self.db.execute("DELETE FROM rollup")
+                    self.db.execute("INSERT OR REPLACE INTO rollup_meta(key, value) VALUES ('built', datetime('now'))")
+                self.db.executemany("""
+                    INSERT INTO rollup(day, branch, type, verdict, count) VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(day, branch, type, verdict) DO UPDATE SET count = count + excluded.count
+                """, [(*k, n) for k, n in counts.items()])
+                self.db.execute("COMMIT")
+            except Exception:
+                self.db.execute("ROLLBACK")
+                raise
+
+    def rebuild(self, keys):
+        """과거 로그로 처음부터 다시 집계 (최초 1회 또는 수동 재집계) - 삭제·재집계·완료 표시를 한 트랜잭션으로"""
+        self.record(keys, replace=True)
+
+    def is_built(self):
+        """전체 로그 기준 재집계를 한 번이라도 마쳤는지 (저장 시 카운터만 쌓인 상태는 False)"""
+        with self._lock:
+            return self.db.execute("SELECT 1 FROM rollup_meta WHERE key = 'built'").fetchone() is not None
+
+    def total(self, **where):
+        """total(day='2026-10-18', type='FACILITY') 처럼 조건별 합계"""
+        cols = [c for c in ("day", "branch", "type", "verdict") if c in where]
+        sql = "SELECT COALESCE(SUM(count), 0) FROM rollup"
+        if cols: sql += " WHERE " + " AND ".join(f"{c} = ?" for c in cols)
+        with self._lock:
+            return self.db.execute(sql, [where[c] for c in cols]).fetchone()[0]
+
+    def by(self, dim, **where):
+        """dim 별 합계 dict (예: by('verdict', type='PT_SAFETY_LOG'))"""
+        assert dim in ("day", "branch", "type", "verdict")
+        cols = [c for c in ("day", "branch", "type", "verdict") if c in where]
+        sql = f"SELECT {dim}, SUM(count) FROM rollup"
+        if cols: sql += " WHERE " + " AND ".join(f"{c} = ?" for c in cols)
+        sql += f" GROUP BY {dim}"
+        with self._lock:
+            return dict(self.db.execute(sql, [where[c] for c in cols]).fetchall())
+
+
+def get_rollups(path=DEFAULT_PATH):
+    return registry.shared("rollups", path, lambda: Rollups(path))
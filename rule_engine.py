@@ -0,0 +1,218 @@
+import re
+import unicodedata
+
+# ---------------------------------------------------------
+# [로컬 룰 엔진] SYSTEM_PROMPT 의 결정 규칙을 파이썬으로 먼저 판정
+# 1. 레드 플래그 키워드 → 응급 (즉시 중단)
+# 2. 통증 부위 == 운동 사용 관절 → STOP
+# 3. 통증 부위가 상체/하체로 운동과 완전히 분리 → GO (ANATOMICAL SEPARATION)
+# 4. 그 외(간접 충돌, 모르는 운동, 자유 서술 증상) → None = AI 에게 넘김
+# ---------------------------------------------------------
+
+# 부위 코드 → (상체/하체/코어, 인식 키워드)
+BODY_PARTS = {
+    "neck":     ("upper", ["목", "경추", "neck"]),
+    "shoulder": ("upper", ["어깨", "회전근", "오십견", "shoulder"]),
+    "elbow":    ("upper", ["팔꿈치", "엘보", "elbow"]),
+    "wrist":    ("upper", ["손목", "wrist"]),
+    # '디스크' 단독은 부위가 아님 ('목디스크' = 목, '허리디스크' = 허리)
+    "lumbar":   ("core",  ["허리", "요추", "lumbar", "lowback"]),
+    "hip":      ("lower", ["고관절", "골반", "엉덩", "hip"]),
+    "knee":     ("lower", ["무릎", "슬개", "반월", "knee"]),
+    "ankle":    ("lower", ["발목", "아킬레스", "ankle"]),
+}
+
+# 운동 키워드 → (주 사용 관절, 간접 부하 관절)
+EXERCISES = {
+    "데드리프트": ({"lumbar", "hip"}, {"knee", "wrist"}),
+    "루마니안": ({"lumbar", "hip"}, {"knee"}),
+    "굿모닝": ({"lumbar", "hip"}, set()),
+    "스쿼트": ({"knee", "hip", "lumbar"}, {"ankle"}),
+    "런지": ({"knee", "hip"}, {"ankle", "lumbar"}),
+    "레그프레스": ({"knee", "hip"}, {"lumbar"}),
+    "레그익스텐션": ({"knee"}, set()),
+    "레그컬": ({"knee"}, {"hip"}),
+    "카프레이즈": ({"ankle"}, {"knee"}),
+    "힙쓰러스트": ({"hip"}, {"lumbar", "knee"}),
+    "점프": ({"knee", "ankle"}, {"hip", "lumbar"}),
+    "런닝": ({"knee", "ankle"}, {"hip"}),
+    "벤치프레스": ({"shoulder", "elbow"}, {"wrist"}),
+    "푸시업": ({"shoulder", "elbow"}, {"wrist", "lumbar"}),
+    "팔굽혀": ({"shoulder", "elbow"}, {"wrist", "lumbar"}),
+    "숄더프레스": ({"shoulder", "elbow"}, {"wrist", "neck", "lumbar"}),
+    "오버헤드": ({"shoulder", "elbow"}, {"wrist", "neck", "lumbar"}),
+    "사이드레터럴": ({"shoulder"}, {"neck"}),
+    "풀업": ({"shoulder", "elbow"}, {"wrist"}),
+    "턱걸이": ({"shoulder", "elbow"}, {"wrist"}),
+    "랫풀다운": ({"shoulder", "elbow"}, {"wrist"}),
+    "시티드로우": ({"shoulder", "elbow"}, {"lumbar"}),
+    "바벨로우": ({"shoulder", "lumbar"}, {"elbow", "hip"}),
+    "덤벨로우": ({"shoulder", "elbow"}, {"lumbar"}),
+    "컬": ({"elbow"}, {"wrist"}),
+    "트라이셉": ({"elbow"}, {"shoulder", "wrist"}),
+    "딥스": ({"shoulder", "elbow"}, {"wrist"}),
+    "체스트프레스": ({"shoulder", "elbow"}, {"wrist"}),
+    "플라이": ({"shoulder"}, {"elbow"}),
+    "슈러그": ({"neck", "shoulder"}, set()),
+    "크런치": ({"lumbar"}, {"neck"}),
+    "플랭크": ({"lumbar"}, {"shoulder"}),
+}
+
+RED_FLAGS = ["흉통", "가슴통증", "가슴이아", "방사통", "저림", "실신", "어지러", "호흡곤란", "숨이차",
+             "마비", "감각이상", "식은땀", "chestpain", "radiating", "faint"]
+
+NO_SYMPTOM = ["없음", "특이사항없음", "양호", "none"]
+
+# 부위 없이 적힌 병력 (예: '남/50대/디스크') → 어느 관절인지 모르므로 규칙으로 판정하지 않음
+HISTORY_TERMS = ["디스크", "협착", "수술", "골절", "탈구", "파열", "disc", "surgery"]
+
+
+def _norm(text):
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    return re.sub(r"[\W_]+", "", text)
+
+
+def find_parts(text):
+    t = _norm(text)
+    found = set()
+    # 긴 키워드부터 매칭 후 제거 ('손목', '발목' 이 '목' 으로 중복 인식되지 않도록)
+    for word, code in sorted(((w, c) for c, (_, ws) in BODY_PARTS.items() for w in ws), key=lambda x: -len(x[0])):
+        if word in t:
+            found.add(code)
+            t = t.replace(word, " ")
+    return found
+
+
+def find_exercises(text):
+    """(주 관절, 간접 관절, 인식 못한 운동 목록)"""
+    primary, secondary, unknown = set(), set(), []
+    for raw in re.split(r"[,/+·、&]", unicodedata.normalize("NFKC", text or "")):
+        t = _norm(raw)
+        if not t: continue
+        hits = []
+        # 긴 키워드부터 매칭 후 제거 ('레그컬' 이 '컬' 로 중복 인식되지 않도록)
+        for k in sorted(EXERCISES, key=len, reverse=True):
+            if k in t:
+                hits.append(EXERCISES[k])
+                t = t.replace(k, " ")
+        if not hits:
+            unknown.append(raw.strip())
+            continue
+        for p, s in hits:
+            primary |= p
+            secondary |= s
+    return primary, secondary - primary, unknown
+
+
+def region_of(parts):
+    return {BODY_PARTS[p][0] for p in parts}
+
+
+def classify(member, symptom, exercise):
+    """명확한 케이스면 {'verdict': STOP/GO/EMERGENCY, 'reason', ...}, 애매하면 None"""
+    s = _norm(symptom) + _norm(member)
+    flags = [w for w in RED_FLAGS if w in s]
+    if flags:
+        return {"verdict": "EMERGENCY", "reason": "레드 플래그 증상", "parts": [], "flags": flags}
+
+    # 판정은 현재 증상에 적힌 부위로만 - 회원 특이사항(병력, 예: '목디스크')에만 있는 부위는
+    # 오늘 상태로 확인되지 않았으므로 규칙으로 GO/STOP 을 내리지 않고 AI 에게 넘김
+    pain = find_parts(symptom)
+    history = find_parts(member)
+    if history - pain: return None
+    if not history and any(w in _norm(member) for w in HISTORY_TERMS): return None
+    primary, secondary, unknown = find_exercises(exercise)
+    if unknown or not primary: return None  # 모르는 운동이 섞여 있으면 AI 판단
+
+    if not pain:
+        # 증상 없음이 명시된 경우만 GO, 자유 서술 증상은 AI 에게
+        if any(w in _norm(symptom) for w in NO_SYMPTOM):
+            return {"verdict": "GO", "reason": "특이 통증 없음", "parts": [], "flags": []}
+        return None
+
+    direct = pain & primary
+    if direct:
+        return {"verdict": "STOP", "reason": "통증 부위와 운동 사용 관절 일치", "parts": sorted(direct), "flags": []}
+    if pain & secondary: return None  # 간접 충돌 (MODIFICATION) → AI 가 세부 조절안 작성
+
+    pain_region, ex_region = region_of(pain), region_of(primary | secondary)
+    if "core" in pain_region or "core" in ex_region: return None
+    if pain_region.isdisjoint(ex_region):
+        return {"verdict": "GO", "reason": "상체/하체 분리 원칙 적용", "parts": sorted(pain), "flags": []}
+    return None
+
+
+PART_NAMES = {"neck": "목", "shoulder": "어깨", "elbow": "팔꿈치", "wrist": "손목", "lumbar": "허리",
+              "hip": "고관절", "knee": "무릎", "ankle": "발목"}
+
+TEMPLATES = {
+    "EMERGENCY": ("⛔ **[즉시 중단]** (응급 확인 필요)",
+                  "{flags} 관련 증상은 운동으로 해결할 문제가 아닌 응급 신호일 수 있습니다.",
+                  "모든 운동 즉시 중단", "휴식 후 의료기관 확인", "증상이 계속되면 119 또는 의료진 연락",
+                  "위험"),
+    "STOP": ("⛔ **[즉시 중단]** (위험함)",
+             "{parts} 통증이 있는 상태에서 같은 부위를 쓰는 {exercise} 동작은 부상 위험이 큽니다.",
+             "{exercise} (오늘은 제외)", "{parts}에 부담이 없는 다른 부위 운동", "통증이 커지면 즉시 중단하고 알려주세요",
+             "주의"),
+    "GO": ("✅ **[진행 가능]** (안전함)",
+           "{reason} - 오늘 계획한 {exercise} 동작은 불편 부위와 직접 충돌하지 않습니다.",
+           "불편 부위에 직접 하중이 실리는 보조 동작", "계획대로 진행", "{parts_or_none} 불편감이 생기면 바로 알려주세요",
+           "통과"),
+}
+
+
+def render_report(result, member, symptom, exercise, timestamp):
+    """MAP_CORE_PROMPT 출력 형식과 같은 구조의 템플릿 리포트"""
+    decision, risk, limit, alt, cue, flag_state = TEMPLATES[result["verdict"]]
+    parts = ", ".join(PART_NAMES[p] for p in result["parts"]) or "해당 없음"
+    fmt = {"parts": parts, "exercise": exercise, "reason": result["reason"],
+           "flags": ", ".join(result["flags"]), "parts_or_none": parts if result["parts"] else "운동 중"}
+    risk, limit, alt, cue = (x.format(**fmt) for x in (risk, limit, alt, cue))
+    if result["verdict"] == "GO":
+        suggestion = "계획한 운동을 바른 자세로 안전하게"
+    elif result["verdict"] == "STOP":
+        suggestion = f"{parts}에 부담 없는 동작으로 바꿔서"
+    else:
+        suggestion = "운동을 쉬고 몸 상태를 먼저 확인하는 방향으로"
+    return f"""### 1. 📋 현장 안전 리포트 (Trainer View)
+---
+**[분석 일시 : {timestamp}]**
+**대상 회원:** {member}
+**운동 계획:** {exercise}
+
+**1. 종합 판정:**
+{decision}
+
+**2. 위험 요인 (Risk):**
+- {risk}
+
+**3. 현장 가이드:**
+- ⛔ **제한:** {limit}
+- ✅ **대체:** {alt}
+- ⚠️ **주의:** {cue}
+---
+
+### 2. 🔬 정밀 분석 로그 (Admin Record)
+---
+**🚩 레드 플래그 점검:** {flag_state}
+**⚙️ 생체역학 원인 분석:** 로컬 규칙 엔진 판정 ({result['reason']}, 증상: {symptom})
+**🔒 개인정보 처리:** (마스킹 완료)
+---
+
+### 3. 💬 카카오톡 전송 템플릿 (Member View)
+---
+안녕하세요, **{member}**님! 👋
+**킹스짐(King's Gym) 안전관리팀**입니다.
+
+오늘 컨디션을 확인해보니 **{exercise}** 진행을 위해 가이드를 준비했어요. 🧐
+
+회원님의 소중한 몸을 보호하기 위해, 오늘은
+👉 **{suggestion}**
+진행하는 것으로 가이드를 잡았습니다.
+
+작은 불편함도 놓치지 않고, 가장 안전하고 효율적인 길로 안내하겠습니다.
+현장에서 트레이너 선생님의 안내를 잘 따라주세요! 💪
+
+(본 알림은 회원님의 안전을 위한 행정적 가이드입니다.)
+---
+"""
@@ -0,0 +1,179 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import registry
+from write_queue import status_code_of
+
+# ---------------------------------------------------------
+# [샤드 라우터] 로그를 월별(및 지점별) 워크시트로 나눠 저장
+# - 시트 하나가 커질수록 느려지고 셀 한도(스프레드시트당 1천만 셀)에 가까워지는 문제 해결
+# - 매니페스트 탭(_shards)에 샤드 목록 보관: 제목 / 월 / 지점 / 생성 시각
+# - 쓰기: 행의 Timestamp(+지점)로 샤드를 골라 append (없으면 탭 생성 + 매니페스트 등록)
+# - 읽기: 조회 구간과 겹치는 샤드만 골라 병렬로 읽음
+# - 매니페스트를 처음 만들 때 기존 sheet1 을 '월' 을 비운 레거시 샤드로 등록 → 샤딩 이전 데이터도 모든 조회에 포함
+# ---------------------------------------------------------
+MANIFEST_TITLE = "_shards"
+MANIFEST_HEADER = ["Title", "Month", "Branch", "Created"]
+SHARD_ROWS = 1000     # 새 탭 초기 행 수 (append 시 자동 확장)
+ACTIVE_MONTHS = 2     # 새 행이 들어올 수 있는 최근 월 수 (월말 지연 저장분 포함)
+MAX_WORKERS = 8
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="map-shards")
+
+
+def korea_now():
+    return datetime.utcnow() + timedelta(hours=9)
+
+
+def month_of(value):
+    """'2026-10-18 09:00:00' / date / datetime → '2026-10'"""
+    return str(value)[:7]
+
+
+def shard_title(month="", branch=""):
+    return "logs_" + "_".join(p for p in (month, branch) if p)
+
+
+class ShardedSheet:
+    """WriteQueue 용 시트 대역: append_rows 를 행별 샤드로 나눠 기록합니다."""
+
+    def __init__(self, router):
+        self.router = router
+
+    def append_rows(self, rows, **kw):
+        groups = {}
+        for row in rows:
+            groups.setdefault(self.router.route(row), []).append(row)
+        # 일부 샤드만 기록되고 실패해도 WriteQueue 가 UUID 열(col_values)로 중복을 걸러 재전송
+        for (title, month, branch), part in groups.items():
+            self.router.ensure(title, month, branch).append_rows(part, **kw)
+
+    def col_values(self, col):
+        parts = self.router.fetch(lambda ws, t: ws.col_values(col), self.router.active())
+        return [v for vals in parts.values() for v in vals]
+
+
+class ShardRouter:
+    def __init__(self, conn, by=("month",), header=None, branch_of=None):
+        self.conn = conn                  # map_db.SheetConnection
+        self.by = set(by)                 # {"month"}, {"branch"}, {"month", "branch"}
+        self.header = list(header or [])  # 새 샤드 1행에 기록할 헤더
+        self.branch_of = branch_of or (lambda row: "")
+        self.manifest = None              # title -> (month, branch)
+        self.handles = {}                 # title -> worksheet
+        self._spreadsheet = None
+        self._lock = threading.RLock()
+
+    def get_sheet(self):
+        """SheetConnection.get_sheet 와 같은 형태: (샤드 분배 시트, 메시지)"""
+        sheet, msg = self.conn.get_sheet()
+        if sheet is None: return None, msg
+        return ShardedSheet(self), msg
+
+    # --- 매니페스트 ---
+    def _check_handles(self):
+        # 재연결/토큰 갱신으로 스프레드시트 핸들이 바뀌면 캐시한 탭 핸들도 버림
+        if self.conn.spreadsheet is not self._spreadsheet:
+            self._spreadsheet = self.conn.spreadsheet
+            self.handles = {}
+
+    def _manifest_sheet(self):
+        ws = self.conn.worksheet(MANIFEST_TITLE)
+        if ws is None:
+            ws = self.conn.spreadsheet.add_worksheet(MANIFEST_TITLE, rows=100, cols=len(MANIFEST_HEADER))
+            ws.append_row(MANIFEST_HEADER)
+            legacy, _ = self.conn.get_sheet()
+            if legacy is not None:
+                ws.append_row([legacy.title, "", "", korea_now().strftime("%Y-%m-%d %H:%M:%S")])
+        return ws
+
+    def load(self, force=False):
+        """매니페스트 {제목: (월, 지점)} - force=True 면 다른 프로세스가 만든 샤드까지 다시 읽음"""
+        with self._lock:
+            if self.manifest is None or force:
+                rows = self._manifest_sheet().get_all_values()[1:]
+                self.manifest = {r[0]: ((r + ["", ""])[1], (r + ["", ""])[2]) for r in rows if r and r[0]}
+            return dict(self.manifest)
+
+    # --- 쓰기 경로 ---
+    def route(self, row):
+        """행 → (샤드 제목, 월, 지점)"""
+        month = month_of(row[0]) if "month" in self.by else ""
+        branch = str(self.branch_of(row) or "") if "branch" in self.by else ""
+        return shard_title(month, branch), month, branch
+
+    def ensure(self, title, month="", branch=""):
+        """샤드 워크시트 핸들 (없으면 탭 생성 + 매니페스트 등록)"""
+        with self._lock:
+            self.conn.get_sheet()
+            self._check_handles()
+            ws = self.handles.get(title)
+            if ws is not None: return ws
+            manifest = self.load()
+            ws = self.conn.worksheet(title)
+            if ws is None:
+                try:
+                    ws = self.conn.spreadsheet.add_worksheet(title, rows=SHARD_ROWS, cols=max(len(self.header), 1))
+                    if self.header: ws.append_row(self.header)
+                except Exception:
+                    # 다른 프로세스가 방금 같은 탭을 만든 경우
+                    ws = self.conn.worksheet(title)
+                    if ws is None: raise
+            if title not in manifest:
+                self._manifest_sheet().append_row([title, month, branch, korea_now().strftime("%Y-%m-%d %H:%M:%S")])
+                self.manifest[title] = (month, branch)
+            self.handles[title] = ws
+            return ws
+
+    # --- 읽기 경로 ---
+    def shards(self, start=None, end=None, branch=None, refresh=False, legacy=True):
+        """조회 구간(월/날짜)과 겹치는 샤드 제목 목록 (월 오름차순). legacy=False 면 월 없는 샤드 제외"""
+        start = month_of(start) if start else None
+        end = month_of(end) if end else None
+        out = []
+        for title, (m, b) in self.load(force=refresh).items():
+            if not m and not legacy: continue
+            if m and ((start and m < start) or (end and m > end)): continue
+            if branch and b and b != branch: continue
+            out.append(title)
+        return sorted(out, key=lambda t: (self.manifest[t][0], t))
+
+    def active_start(self):
+        first = korea_now().replace(day=1)
+        for _ in range(ACTIVE_MONTHS - 1):
+            first = (first - timedelta(days=1)).replace(day=1)
+        return month_of(first)
+
+    def active(self, refresh=False):
+        """새 행이 추가될 수 있는 샤드 (최근 ACTIVE_MONTHS 개월, 월 구분이 없으면 전체)"""
+        if "month" not in self.by: return self.shards(refresh=refresh, legacy=False)
+        return self.shards(start=self.active_start(), refresh=refresh, legacy=False)
+
+    def _handle(self, title):
+        """읽기용 샤드 핸들 - 캐시에 없으면 락 밖에서 탭을 열어 캐시 (탭이 없을 때만 ensure)"""
+        with self._lock:
+            self._check_handles()
+            ws = self.handles.get(title)
+        if ws is not None: return ws
+        ws = self.conn.worksheet(title)
+        if ws is None: return self.ensure(title, *(self.manifest or {}).get(title, ("", "")))
+        with self._lock:
+            return self.handles.setdefault(title, ws)
+
+    def fetch(self, fn, titles):
+        """titles 각 샤드에 fn(worksheet, title) 을 병렬 실행 → {title: 결과}
+        핸들 조회도 각 작업 안에서 → 새로 여는 탭이 여러 개여도 락을 잡고 하나씩 열지 않음"""
+        self.conn.get_sheet()
+        futures = [(t, _executor.submit(lambda t=t: fn(self._handle(t), t))) for t in titles]
+        try:
+            return {t: f.result() for t, f in futures}
+        except Exception as e:
+            # 읽기 실패도 쓰기와 같이 처리: 429(한도 초과)가 아니면 연결을 버리고 다음 읽기에서 재연결
+            if status_code_of(e) != 429: self.conn.reset(e)
+            raise
+
+
+def get_router(key, conn, by=("month",), header=None, branch_of=None):
+    return registry.shared("shards", key, lambda: ShardRouter(conn, by, header, branch_of),
+                           by=tuple(by), header=list(header or []))
@@ -0,0 +1,103 @@
+import json
+import os
+import re
+import secrets
+import sqlite3
+import threading
+import time
+
+import registry
+
+# ---------------------------------------------------------
+# [공유 상태] 앱 프로세스(워커) 여러 개가 같은 상태를 보도록 로컬 SQLite(WAL)에 보관
+# - 로그인/세션: 토큰 → 세션 값(JSON), URL 의 ?sid= 로 어느 워커에 붙어도 로그인 유지
+#   토큰은 로그인할 때마다 새로 발급 (기존 토큰 재사용 X), 로그아웃 시 삭제
+# - STATE_DIR: AI 캐시 / KPI 집계 / 스풀 / 로컬 DB 파일을 한 디렉터리에 모음 → 모든 워커가 같은 파일 사용
+# - 워커는 상태를 들고 있지 않으므로 로드밸런서 뒤에 프로세스를 늘리면 처리량이 늘어남
+# ---------------------------------------------------------
+DEFAULT_PATH = "map_state.db"
+SESSION_TTL = 12 * 3600     # 마지막 사용 후 12시간 지나면 만료
+TOKEN_BYTES = 24
+
+
+def scoped_dir(state_dir, scope):
+    """STATE_DIR 아래 지점 등 범위별 하위 디렉터리 (STATE_DIR 미설정이면 '')"""
+    if not state_dir or not scope: return state_dir
+    return os.path.join(state_dir, re.sub(r"[^\w.-]+", "_", scope).strip("_") or "default")
+
+
+def path_in(state_dir, name):
+    """STATE_DIR 설정 시 공유 디렉터리 안의 경로, 아니면 이름 그대로 (현재 디렉터리)"""
+    if not state_dir or name == ":memory:" or os.path.isabs(name): return name
+    os.makedirs(state_dir, exist_ok=True)
+    return os.path.join(state_dir, name)
+
+
+class SessionStore:
+    def __init__(self, path=DEFAULT_PATH, ttl=SESSION_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                token   TEXT PRIMARY KEY,
+                data    TEXT NOT NULL,
+                expires REAL NOT NULL
+            )""")
+
+    def create(self, data):
+        """새 세션 → 토큰"""
+        token = secrets.token_urlsafe(TOKEN_BYTES)
+        with self._lock:
+            self.db.execute("INSERT INTO sessions(token, data, expires) VALUES (?, ?, ?)",
+                            (token, json.dumps(data, ensure_ascii=False), time.time() + self.ttl))
+        return token
+
+    def get(self, token):
+        """토큰 → 세션 값 dict (없거나 만료되면 None). 조회할 때마다 만료 시각 연장"""
+        if not token: return None
+        now = time.time()
+        with self._lock:
+            r = self.db.execute("SELECT data, expires FROM sessions WHERE token=?", (token,)).fetchone()
+            if r is None: return None
+            if r[1] < now:
+                self.db.execute("DELETE FROM sessions WHERE token=?", (token,))
+                return None
+            self.db.execute("UPDATE sessions SET expires=? WHERE token=?", (now + self.ttl, token))
+        return json.loads(r[0])
+
+    def update(self, token, **values):
+        """세션 값 일부 갱신 (다른 워커가 쓴 값과 합침)"""
+        with self._lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                r = self.db.execute("SELECT data FROM sessions WHERE token=?", (token,)).fetchone()
+                if r is not None:
+                    data = dict(json.loads(r[0]), **values)
+                    self.db.execute("UPDATE sessions SET data=?, expires=? WHERE token=?",
+                                    (json.dumps(data, ensure_ascii=False), time.time() + self.ttl, token))
+                self.db.execute("COMMIT")
+            except Exception:
+                self.db.execute("ROLLBACK")
+                raise
+
+    def delete(self, token):
+        with self._lock:
+            self.db.execute("DELETE FROM sessions WHERE token=?", (token,))
+
+    def purge(self):
+        """만료된 세션 삭제 → 삭제 수"""
+        with self._lock:
+            return self.db.execute("DELETE FROM sessions WHERE expires < ?", (time.time(),)).rowcount
+
+
+def _open_session_store(path):
+    s = SessionStore(path)
+    s.purge()
+    return s
+
+
+def get_session_store(path=DEFAULT_PATH):
+    """경로별 공용 SessionStore (처음 열 때 만료 세션 정리)"""
+    return registry.shared("shared_state", path, lambda: _open_session_store(path))
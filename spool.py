@@ -0,0 +1,126 @@
+import json
+import sqlite3
+import threading
+import time
+
+import registry
+
+# ---------------------------------------------------------
+# [로컬 스풀] 모든 기록을 구글 시트보다 먼저 로컬 SQLite(WAL)에 커밋
+# - synchronous=FULL: 커밋마다 WAL 파일 fsync → 프로세스/서버가 죽어도 기록 유지
+# - 시트 전송이 끝난 행은 state='sent' 로 표시 (append-only, 삭제하지 않음)
+# - [업그레이드] 여러 워커가 같은 스풀 파일을 공유: 행마다 담당 워커(owner)를 기록하고
+#   워커는 주기적으로 생존 신호(beat)를 남김 → 신호가 끊긴 워커의 미전송 행만 다른 워커가 넘겨받음 (중복 전송 X)
+# ---------------------------------------------------------
+DEFAULT_PATH = "map_spool.db"
+OWNER_TIMEOUT = 180   # 이 시간(초) 동안 생존 신호가 없는 워커의 행은 넘겨받음
+
+
+class Spool:
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=FULL")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS spool (
+                seq      INTEGER PRIMARY KEY AUTOINCREMENT,
+                row_id   TEXT UNIQUE NOT NULL,
+                created  REAL NOT NULL,
+                payload  TEXT NOT NULL,
+                state    TEXT NOT NULL DEFAULT 'queued',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error    TEXT,
+                sent_at  REAL
+            )""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS idx_spool_state ON spool(state, seq)")
+        if "owner" not in [r[1] for r in self.db.execute("PRAGMA table_info(spool)")]:
+            self.db.execute("ALTER TABLE spool ADD COLUMN owner TEXT")  # 예전 스풀 파일 호환
+        self.db.execute("CREATE TABLE IF NOT EXISTS spool_owner (owner TEXT PRIMARY KEY, beat REAL NOT NULL)")
+
+    def add(self, row_id, row, owner=None):
+        """행 1개를 내구성 있게 저장 (fsync 완료 후 반환)"""
+        self.add_many([(row_id, row)], owner)
+
+    def add_many(self, items, owner=None):
+        """[(row_id, row)] 을 한 트랜잭션으로 저장 (일괄 스크리닝 등). 이미 있는 row_id 는 건너뜀 (재등록해도 멱등)"""
+        now = time.time()
+        with self._lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                self.db.executemany("INSERT OR IGNORE INTO spool(row_id, created, payload, owner) VALUES (?, ?, ?, ?)",
+                                    [(rid, now, json.dumps(row, ensure_ascii=False), owner) for rid, row in items])
+                self.db.execute("COMMIT")
+            except Exception:
+                self.db.execute("ROLLBACK")
+                raise
+
+    def beat(self, owner):
+        """워커 생존 신호"""
+        with self._lock:
+            self.db.execute("INSERT INTO spool_owner(owner, beat) VALUES (?, ?) "
+                            "ON CONFLICT(owner) DO UPDATE SET beat = excluded.beat", (owner, time.time()))
+
+    def adopt(self, owner, timeout=OWNER_TIMEOUT):
+        """담당 워커가 없거나 멈춘 미전송 행을 owner 로 넘겨받음 → [(row_id, row)] (입력 순서)"""
+        alive = time.time() - timeout
+        with self._lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self.db.execute("""
+                    SELECT row_id, payload FROM spool
+                    WHERE state != 'sent' AND (owner IS NULL OR owner NOT IN
+                        (SELECT owner FROM spool_owner WHERE beat >= ?))
+                    ORDER BY seq""", (alive,)).fetchall()
+                self.db.executemany("UPDATE spool SET owner=? WHERE row_id=?", [(owner, rid) for rid, _ in rows])
+                self.db.execute("DELETE FROM spool_owner WHERE beat < ?", (alive,))
+                self.db.execute("COMMIT")
+            except Exception:
+                self.db.execute("ROLLBACK")
+                raise
+        return [(rid, json.loads(p)) for rid, p in rows]
+
+    def pending(self, limit=None):
+        """아직 시트에 전송되지 않은 행 [(row_id, row)] (입력 순서)"""
+        sql = "SELECT row_id, payload FROM spool WHERE state != 'sent' ORDER BY seq"
+        if limit: sql += f" LIMIT {int(limit)}"
+        with self._lock:
+            return [(rid, json.loads(p)) for rid, p in self.db.execute(sql)]
+
+    def mark_sent(self, row_ids):
+        with self._lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                self.db.executemany("UPDATE spool SET state='sent', error=NULL, sent_at=? WHERE row_id=?",
+                                    [(time.time(), rid) for rid in row_ids])
+                self.db.execute("COMMIT")
+            except Exception:
+                self.db.execute("ROLLBACK")
+                raise
+
+    def mark_error(self, row_ids, err):
+        with self._lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                self.db.executemany("UPDATE spool SET attempts=attempts+1, error=? WHERE row_id=?",
+                                    [(str(err)[:500], rid) for rid in row_ids])
+                self.db.execute("COMMIT")
+            except Exception:
+                self.db.execute("ROLLBACK")
+                raise
+
+    def get_status(self, row_id):
+        with self._lock:
+            r = self.db.execute("SELECT state, error FROM spool WHERE row_id=?", (row_id,)).fetchone()
+        return (r[0], r[1]) if r else ("unknown", None)
+
+    def backlog(self):
+        """미전송 행 수"""
+        with self._lock:
+            return self.db.execute("SELECT COUNT(*) FROM spool WHERE state != 'sent'").fetchone()[0]
+
+
+def get_spool(path=DEFAULT_PATH):
+    """경로별 공용 Spool (SQLite 연결 하나)"""
+    return registry.shared("spool", path, lambda: Spool(path))
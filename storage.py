@@ -0,0 +1,249 @@
+import json
+import re
+import sqlite3
+import threading
+from collections import Counter
+
+import registry
+
+# ---------------------------------------------------------
+# [저장소 추상화] 로그 저장/조회를 백엔드 하나로 통일
+# - SQLiteBackend: 로컬 임베디드 DB (기본 원본 저장소, 기록/집계가 ms 단위, 구글 없이 테스트 가능)
+# - SheetsBackend: 기존 구글 시트 (원본 또는 미러)
+# - 두 백엔드 모두 get_sheet() 로 '시트처럼 보이는' 핸들을 제공
+#   → WriteQueue / LogStore / ShardRouter 는 그대로 재사용
+# - 행은 columns 순서의 리스트 (시트 1행 헤더와 같은 순서)
+# - query / aggregate: SQLite 는 (ts, type, branch) 인덱스로 서버 측 필터/집계, 시트는 전체를 받아 거름
+# ---------------------------------------------------------
+DEFAULT_PATH = "map_logs.db"
+AGG_DIMS = ("day", "type", "branch")
+
+
+def _col_index(columns, name, default=None):
+    return columns.index(name) if name in columns else default
+
+
+class Backend:
+    """저장소 인터페이스 - append / append_many / append_items / query / aggregate / get_sheet"""
+    local = False
+
+    def __init__(self, columns, branch=""):
+        self.columns = list(columns)
+        self.branch = branch  # 행에 Branch 열이 없을 때 쓸 지점명 (app.py 처럼 지점별 배포)
+        self.ts_idx = _col_index(self.columns, "Timestamp", 0)
+        self.type_idx = _col_index(self.columns, "Type", 1)
+        self.branch_idx = _col_index(self.columns, "Branch")
+
+    def keys_of(self, row):
+        """행 → (Timestamp, Type, Branch)"""
+        cell = lambda i: str(row[i]) if i is not None and i < len(row) else ""
+        return cell(self.ts_idx), cell(self.type_idx), cell(self.branch_idx) or self.branch
+
+    def append(self, row):
+        self.append_many([row])
+
+    def append_many(self, rows):
+        raise NotImplementedError
+
+    def append_items(self, items):
+        """WriteQueue 에서 호출: [(row_id, row)] - 같은 row_id 는 한 번만 기록 → 새로 기록된 행 수"""
+        raise NotImplementedError
+
+    def query(self, start=None, end=None, types=None, branch=None, text=None, limit=None, offset=0, ascending=True):
+        """조건에 맞는 행 목록 (시간순, ascending=False 면 최신순). start/end 는 'YYYY-MM-DD' (end 는 그 날 포함)"""
+        raise NotImplementedError
+
+    def aggregate(self, by, start=None, end=None, types=None, branch=None, text=None):
+        """by(day/type/branch) 별 건수 dict"""
+        raise NotImplementedError
+
+    def get_sheet(self):
+        """(시트처럼 쓸 수 있는 핸들, 메시지)"""
+        raise NotImplementedError
+
+
+class SheetsBackend(Backend):
+    """구글 시트 - source 는 get_sheet() 를 가진 객체 (SheetConnection / ShardRouter)"""
+
+    def __init__(self, source, columns, branch=""):
+        super().__init__(columns, branch)
+        self.source = source
+
+    def get_sheet(self):
+        return self.source.get_sheet()
+
+    def _sheet(self):
+        sheet, msg = self.get_sheet()
+        if sheet is None: raise RuntimeError(msg)
+        return sheet
+
+    def append_many(self, rows):
+        if rows: self._sheet().append_rows([list(r) for r in rows], value_input_option="USER_ENTERED")
+
+    def append_items(self, items):
+        # 시트는 row_id 중복 확인 없이 전부 추가
+        self.append_many([row for _, row in items])
+        return len(items)
+
+    def query(self, start=None, end=None, types=None, branch=None, text=None, limit=None, offset=0, ascending=True):
+        # 시트는 서버 측 필터가 없으므로 전체를 받아 거름 (대량 조회는 SQLiteBackend 권장)
+        out = []
+        for row in self._sheet().get_all_values()[1:]:
+            ts, t, b = self.keys_of(row)
+            if start and ts[:10] < str(start)[:10]: continue
+            if end and ts[:10] > str(end)[:10]: continue
+            if types and t not in types: continue
+            if branch and b != branch: continue
+            if text and not any(text in str(c) for c in row): continue
+            out.append(row)
+        out.sort(key=lambda r: self.keys_of(r)[0], reverse=not ascending)
+        return out[offset:offset + limit if limit else None]
+
+    def aggregate(self, by, start=None, end=None, types=None, branch=None, text=None):
+        assert by in AGG_DIMS
+        pick = {"day": lambda k: k[0][:10], "type": lambda k: k[1], "branch": lambda k: k[2]}[by]
+        return dict(Counter(pick(self.keys_of(r)) for r in self.query(start, end, types, branch, text)))
+
+
+class LocalSheet:
+    """SQLiteBackend 를 gspread 워크시트처럼 사용 (WriteQueue / LogStore 호환용)"""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def append_rows(self, rows, **kw):
+        self.backend.append_many(rows)
+
+    def append_row(self, row, **kw):
+        self.backend.append_many([row])
+
+    def _read(self, row_number):
+        """시트 행 번호 row_number 부터 끝까지 - 이전 읽기가 끝난 seq 다음부터 조회 (OFFSET 스캔 X)"""
+        after = self.backend.seq_before(row_number)
+        found = self.backend.rows_from(after)
+        self.backend.remember_seq(row_number + len(found), found[-1][0] if found else after)
+        return [cells for _, cells in found]
+
+    def get_all_values(self):
+        return [list(self.backend.columns)] + self._read(2)
+
+    def get_values(self, rng):
+        """'A{n}:X' 범위 → n 행부터 끝까지 (1행 = 헤더)"""
+        return self._read(max(int(re.match(r"A(\d+)", rng).group(1)), 2))
+
+    def col_values(self, col):
+        return [self.backend.columns[col - 1] if col <= len(self.backend.columns) else ""] + \
+               [(r + [""] * col)[col - 1] for r in self._read(2)]
+
+
+class SQLiteBackend(Backend):
+    local = True
+
+    def __init__(self, path=DEFAULT_PATH, table="logs", columns=(), branch=""):
+        super().__init__(columns, branch)
+        assert re.fullmatch(r"\w+", table)
+        self.path = path
+        self.table = table
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                seq    INTEGER PRIMARY KEY AUTOINCREMENT,
+                row_id TEXT UNIQUE,
+                ts     TEXT NOT NULL,
+                type   TEXT NOT NULL,
+                branch TEXT NOT NULL,
+                cells  TEXT NOT NULL
+            )""")
+        self.db.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_ts ON {table}(ts)")
+        self.db.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_type_ts ON {table}(type, ts)")
+        self.db.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_branch_ts ON {table}(branch, ts)")
+        self._seq_at = {}  # 시트 행 번호 → 그 앞 행까지의 마지막 seq (LocalSheet 증분 읽기용)
+
+    def get_sheet(self):
+        return LocalSheet(self), "✅ 로컬 DB 연결됨"
+
+    def _cells(self, cells):
+        # Branch 열이 있는데 비어 있으면 백엔드 지점명으로 채움
+        cells = (cells + [""] * len(self.columns))[:max(len(self.columns), len(cells))]
+        if self.branch_idx is not None and not cells[self.branch_idx]: cells[self.branch_idx] = self.branch
+        return cells
+
+    def append_items(self, items):
+        records = [(row_id, *self.keys_of(row), json.dumps([str(c) for c in row], ensure_ascii=False))
+                   for row_id, row in items]
+        if not records: return 0
+        with self._lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                # 재전송된 행(같은 row_id)은 무시 → 멱등 (rowcount 는 실제로 추가된 행만 셈)
+                stored = self.db.executemany(f"INSERT OR IGNORE INTO {self.table}(row_id, ts, type, branch, cells) "
+                                             "VALUES (?, ?, ?, ?, ?)", records).rowcount
+                self.db.execute("COMMIT")
+            except Exception:
+                self.db.execute("ROLLBACK")
+                raise
+        return stored
+
+    def append_many(self, rows):
+        self.append_items([(None, row) for row in rows])
+
+    def rows_from(self, after_seq=0):
+        """seq 가 after_seq 보다 큰 행들 → [(seq, cells)] (PK 범위 조회)"""
+        with self._lock:
+            rows = self.db.execute(f"SELECT seq, cells FROM {self.table} WHERE seq > ? ORDER BY seq", (after_seq,))
+            return [(seq, self._cells(json.loads(c))) for seq, c in rows]
+
+    def seq_before(self, row_number):
+        """시트 행 번호(2 = 첫 데이터 행) → 그 앞 행의 seq
+        - 롤백된 삽입 등으로 seq 에 빈 번호가 생길 수 있어 행 번호로 계산하지 않고 마지막 읽기 위치를 기억"""
+        if row_number <= 2: return 0
+        seq = self._seq_at.get(row_number)
+        if seq is not None: return seq
+        # 기억에 없는 위치 (다른 프로세스가 읽던 위치 등) → 1회만 순서로 찾음
+        with self._lock:
+            found = self.db.execute(f"SELECT seq FROM {self.table} ORDER BY seq LIMIT 1 OFFSET ?",
+                                    (row_number - 3,)).fetchone()
+            if found is None: found = self.db.execute(f"SELECT COALESCE(MAX(seq), 0) FROM {self.table}").fetchone()
+        return found[0]
+
+    def remember_seq(self, row_number, seq):
+        if len(self._seq_at) >= 64: self._seq_at.pop(next(iter(self._seq_at)))
+        self._seq_at[row_number] = seq
+
+    def _where(self, start, end, types, branch, text):
+        where, args = [], []
+        if start:
+            where.append("ts >= ?"); args.append(str(start)[:10])
+        if end:
+            where.append("ts < ?"); args.append(str(end)[:10] + "\uffff")  # 그 날 23:59:59 까지 포함
+        if types:
+            where.append(f"type IN ({','.join('?' * len(types))})"); args.extend(types)
+        if branch:
+            where.append("branch = ?"); args.append(branch)
+        if text:
+            where.append("instr(cells, ?) > 0"); args.append(json.dumps(text, ensure_ascii=False)[1:-1])
+        return (" WHERE " + " AND ".join(where)) if where else "", args
+
+    def query(self, start=None, end=None, types=None, branch=None, text=None, limit=None, offset=0, ascending=True):
+        cond, args = self._where(start, end, types, branch, text)
+        order = "ASC" if ascending else "DESC"
+        sql = f"SELECT cells FROM {self.table}{cond} ORDER BY ts {order}, seq {order} LIMIT ? OFFSET ?"
+        with self._lock:
+            rows = self.db.execute(sql, args + [-1 if limit is None else limit, offset]).fetchall()
+        return [self._cells(json.loads(c)) for (c,) in rows]
+
+    def aggregate(self, by, start=None, end=None, types=None, branch=None, text=None):
+        assert by in AGG_DIMS
+        dim = "substr(ts, 1, 10)" if by == "day" else by
+        cond, args = self._where(start, end, types, branch, text)
+        with self._lock:
+            return dict(self.db.execute(f"SELECT {dim}, COUNT(*) FROM {self.table}{cond} GROUP BY 1", args))
+
+
+def get_sqlite_backend(path=DEFAULT_PATH, table="logs", columns=(), branch=""):
+    """(경로, 테이블) 별 공용 SQLiteBackend"""
+    return registry.shared("storage", (path, table), lambda: SQLiteBackend(path, table, columns, branch),
+                           columns=list(columns), branch=branch)
@@ -2,6 +2,19 @@ import streamlit as st
 import openai
 import re
 from datetime import datetime
+from oauth2client.service_account import ServiceAccountCredentials
+import ai_cache
+import ai_stream
+import rule_engine
+import storage
+import log_schema
+import map_db
+import prompts
+import report_parser
+import shared_state
+import spool
+import write_queue
+import facility_log
 
 # ---------------------------------------------------------
 # 1. 기본 설정 & UI 스타일링 (글자 크기 축소 등)
@@ -86,19 +99,20 @@ Plan: {Exercise_Input}
 ---
 """
 
+# [업그레이드] 고정 시스템 프롬프트(프롬프트 캐싱) + 요청별 값은 user 메시지 + 섹션별 출력 예산
+LITE_SLOTS = ["Timestamp", "Generated_Name", "Exercise_Input"]
+LITE_BUDGETS = {"1. FSL 현장 리포트": 450, "3. 카카오톡 전송 템플릿": 40}
+LITE_PREFIX = prompts.static_prefix(SYSTEM_PROMPT, LITE_SLOTS, LITE_BUDGETS)
+LITE_MAX_TOKENS = prompts.max_tokens_for(LITE_BUDGETS)
+
 # ---------------------------------------------------------
 # 3. 헬퍼 함수: 카톡 멘트 강화 (Tone Polish)
 # ---------------------------------------------------------
 def enhance_kakao_message(original_text, user_info, symptom, exercise):
     """AI 결과를 기반으로 더 따뜻하고 전문적인 카톡 멘트를 생성합니다."""
-    # 리스크 요인 추출 (간단한 파싱 시도)
-    risk_summary = "컨디션 이슈"
-    if "리스크 요인:" in original_text:
-        try:
-            risk_part = original_text.split("리스크 요인:")[1].split("3. 액션 프로토콜:")[0].strip()
-            risk_summary = risk_part.replace("-", "").strip().split("\n")[0]
-        except:
-            pass
+    # 리스크 요인 추출 (구조화된 리포트 기록의 첫 위험 요인)
+    risks = report_parser.parse(original_text).risks
+    risk_summary = risks[0] if risks else "컨디션 이슈"
 
     return f"""안녕하세요, 회원님.
 **MAP 트레이닝 센터**입니다.
@@ -119,6 +133,43 @@ def enhance_kakao_message(original_text, user_info, symptom, exercise):
 st.title("🛡️ MAP INTEGRATED SYSTEM")
 st.markdown("**Status:** `OPERATIONAL` 🟢 | **Mode:** `ENTERPRISE_LOG` 🏢")
 
+# 워커 여러 개를 띄울 때 STATE_DIR 의 같은 DB / 캐시 파일을 공유
+STATE_DIR = st.secrets.get("STATE_DIR", "")
+
+def get_cache():
+    return ai_cache.get_cache(st.secrets.get("AI_CACHE_PATH", shared_state.path_in(STATE_DIR, ai_cache.DEFAULT_PATH)))
+
+# [업그레이드] STORAGE = "sqlite"(기본) 이면 로컬 DB(hq_logs)가 원본, "sheets" 면 본사 시트(MAP_DATABASE)가 원본
+# 구글 시트는 SHEETS_MIRROR 가 켜져 있을 때만 백그라운드로 복제 (app.py 와 같은 방식)
+STORAGE = st.secrets.get("STORAGE", "sqlite")
+SHEETS_MIRROR = bool(st.secrets.get("SHEETS_MIRROR", "gcp_service_account" in st.secrets))
+HQ_ROW_ID_COLUMN = len(log_schema.HQ_COLUMNS) + 1  # 시트 미러: 마지막 열에 이벤트 id (재전송 시 중복 확인)
+HQ_SPOOL_PATH = "map_hq_spool.db"  # app.py 스풀과 분리 (다른 워커의 PT 행을 넘겨받아 본사 시트로 보내지 않도록)
+
+def load_credentials():
+    return ServiceAccountCredentials.from_json_keyfile_dict(dict(st.secrets["gcp_service_account"]), map_db.SCOPE)
+
+def get_db():
+    return map_db.get_connection("secrets", load_credentials)
+
+def get_storage():
+    if STORAGE == "sqlite":
+        return storage.get_sqlite_backend(st.secrets.get("LOCAL_DB_PATH", shared_state.path_in(STATE_DIR, storage.DEFAULT_PATH)), "hq_logs",
+                                          log_schema.HQ_COLUMNS)
+    return storage.SheetsBackend(get_db(), log_schema.HQ_COLUMNS)
+
+# [업그레이드] 시설 점검 이벤트는 쓰기 큐로 기록 (이벤트 내용 해시 = row_id → 중복 저장 X)
+def get_facility_queue():
+    backend = get_storage()
+    spool_db = spool.get_spool(st.secrets.get("HQ_SPOOL_PATH", shared_state.path_in(STATE_DIR, HQ_SPOOL_PATH)))
+    if backend.local:
+        mirror = storage.SheetsBackend(get_db(), log_schema.HQ_COLUMNS).get_sheet if SHEETS_MIRROR else None
+        return write_queue.get_write_queue("hq_logs", mirror, on_error=get_db().reset if mirror else None,
+                                           spool=spool_db if mirror else None, id_column=HQ_ROW_ID_COLUMN,
+                                           primary=backend)
+    return write_queue.get_write_queue("hq_logs", backend.get_sheet, on_error=get_db().reset,
+                                       spool=spool_db, id_column=HQ_ROW_ID_COLUMN)
+
 tab1, tab2 = st.tabs(["🏋️ PT 컨디션 체크 (회원용)", "🚨 시설 안전 점검 (직원용)"])
 
 # =========================================================
@@ -142,20 +193,37 @@ with tab1:
         if not member_info or not symptom or not exercise:
             st.warning("⚠️ 3가지 항목을 모두 입력해주세요.")
         else:
+            result_area = st.empty()  # 스트리밍 출력 자리
             with st.spinner("MAP 엔진 분석 중..."):
                 try:
-                    user_input = f"1. 회원정보: {member_info}\n2. 현재증상: {symptom}\n3. 예정운동: {exercise}"
-                    response = client.chat.completions.create(
-                        model="gpt-4o",
-                        messages=[{"role": "system", "content": SYSTEM_PROMPT},
-                                  {"role": "user", "content": user_input}],
-                        temperature=0.7
-                    )
-                    ai_result = response.choices[0].message.content
+                    # 동일 조합(정규화 기준)은 캐시된 리포트 재사용
+                    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                    cache = get_cache()
+                    cache_key = ai_cache.make_key(LITE_PREFIX, member_info, symptom, exercise)
+                    # 명확한 GO/STOP/응급은 로컬 규칙 엔진으로 즉시 판정 (AI 호출 없음)
+                    rule = rule_engine.classify(member_info, symptom, exercise)
+                    if rule:
+                        ai_result = rule_engine.render_report(rule, member_info, symptom, exercise, now)
+                    else:
+                        ai_result = cache.get(cache_key, member_info, now)
+                    cached = ai_result is not None
+
+                    if not cached:
+                        messages = prompts.build_messages(LITE_PREFIX, {
+                            "Timestamp": now, "Generated_Name": member_info, "Exercise_Input": exercise,
+                            "회원정보": member_info, "현재증상": symptom, "예정운동": exercise})
+                        # 토큰이 도착하는 대로 바로 표시 (전체 완료까지 기다리지 않음)
+                        ai_result = ai_stream.stream_report(
+                            client, messages, 0.3,
+                            lambda text: result_area.markdown(text + " ▌"),
+                            on_usage=lambda usage, ttft, elapsed: prompts.get_usage_log().record("lite", usage, ttft, elapsed),
+                            max_tokens=LITE_MAX_TOKENS
+                        )
+                        cache.put(cache_key, ai_result, member_info)
                     
                     # 결과 출력
-                    st.success("✅ 분석 완료")
-                    st.markdown(ai_result)
+                    result_area.markdown(ai_result)
+                    st.success("✅ 분석 완료" + (" (⚡ 규칙 엔진)" if rule else " (⚡ 캐시)" if cached else ""))
                     
                     # 카톡 멘트 강화 (파이썬 후처리)
                     final_kakao = enhance_kakao_message(ai_result, member_info, symptom, exercise)
@@ -225,33 +293,19 @@ with tab2:
              st.warning("⚠️ 최소 1개 이상의 항목을 확인해야 합니다.")
         else:
             now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
-            checklist_result = []
-            if "정기 순찰" in task_type:
-                if chk_1: checklist_result.append("MACHINE_STATUS: OK")
-                if chk_2: checklist_result.append("ENV_CLEAR: OK")
-            elif "신규/안전 교육" in task_type:
-                if chk_1: checklist_result.append("USER_WARNING: DONE")
-                if chk_2: checklist_result.append("DEMO_CHECK: DONE")
-            elif "기구 정비" in task_type:
-                if chk_1: checklist_result.append("REPAIR_ACTION: DONE")
-                if chk_2: checklist_result.append("TEST_RUN: OK")
-
-            formatted_check = " / ".join(checklist_result)
-            task_code = task_type.split(' (')[1].replace(')', '')
-
-            # [핵심] 지점명이 포함된 엔터프라이즈 로그
-            log_text = f"""
-            [MAP ENTERPRISE LOG]
-            -----------------------------------------
-            BRANCH     : {branch_name}
-            EVENT      : {task_code}
-            TIMESTAMP  : {now}
-            LOCATION   : {target_zone.split(' (')[0]}
-            ACTION     : {formatted_check}
-            STAFF      : {staff_name}
-            -----------------------------------------
-            """
-            st.success(f"✅ [{branch_name}] 안전 점검 기록이 저장되었습니다.")
+
+            # [업그레이드] 폼 입력 → 구조화된 점검 이벤트 (지점 / 점검 코드 / 구역 / 체크 항목 / 점검자)
+            event = facility_log.FacilityEvent.from_form(now, branch_name, task_type, target_zone,
+                                                         [chk_1, chk_2], staff_name)
+            # [핵심] 지점명이 포함된 엔터프라이즈 로그 (단톡방 공유용 - facility_log 가져오기로 다시 읽을 수 있는 형식)
+            log_text = event.to_log_text()
+            # 원본 저장소(로컬 DB 또는 본사 시트)에 기록 → 본사 대시보드(dashboard.py)가 바로 조회
+            try:
+                q = get_facility_queue()
+                state, err = q.get_status(q.submit(event.to_row(), event.event_id()))
+                if state == "stored": st.warning(f"⚠️ [{branch_name}] 저장됨 (시트 복제 대기 중): {err}")
+                else: st.success(f"✅ [{branch_name}] 안전 점검 기록이 저장되었습니다.")
+            except Exception as e:
+                st.error(f"저장 실패: {e}")
             st.code(log_text, language='yaml')
             st.caption("위 로그를 복사하여 '지점별 단톡방'에 전송하십시오.")
@@ -0,0 +1,133 @@
+import time
+import uuid
+
+import ai_cache
+import ai_stream
+import log_schema
+import pipeline
+import report_parser
+import rollups
+import rule_engine
+import tracing
+
+# ---------------------------------------------------------
+# [PT 제출 파이프라인] 규칙 엔진 → 캐시 → 스트리밍 GPT → 리포트 1회 파싱 → blob 보관 → (저장 ∥ 카톡)
+# - app.py 단건 제출과 bench.py 가 같은 코드를 실행 (화면 출력은 on_step / on_text 콜백으로만)
+# - 저장/알림 함수는 호출자가 넘김: persist(row, row_id, record) / notify(text) → (ok, (id, state, detail))
+# ---------------------------------------------------------
+PERSIST_TIMEOUT = 3
+NOTIFY_TIMEOUT = 6     # 카톡 실제 전송 결과를 이 시간까지 기다려 화면에 표시
+STAGE_LABELS = {"analysis": "분석", "persist": "저장", "notify": "알림"}
+TEMPERATURE = 0.3
+
+
+def cache_key(prefix, member, symptom, exercise):
+    """단건 제출 / 일괄 스크리닝이 같은 캐시 항목을 쓰도록 키는 여기서만 생성
+    (모델 입력과 같은 값만 사용 - 통증 부위 선택은 이미 증상 문장에 포함됨)"""
+    return ai_cache.make_key(prefix, member, symptom, exercise)
+
+
+def pt_row(ts, member, symptom, exercise, report, record, blobs, status="DONE"):
+    """저장할 PT 행 (app.py LOG_COLUMNS 순서) - 원문은 blob 저장소에 전체 보관, RawData 는 판정 + 요약 + 해시만"""
+    return [ts, log_schema.PT_TYPE, member, symptom, exercise, status, blobs.offload(report, record)]
+
+
+def kakao_message(report, record=None):
+    """구조화된 리포트 기록의 카톡 본문 (3번 섹션이 없으면 리포트 끝 200자)"""
+    record = record or report_parser.parse(report)
+    return record.kakao or (report or "")[-200:]
+
+
+def row_verdict(row, record=None):
+    """저장 행의 판정 아이콘 - 파싱된 기록이 있으면 그대로 사용, 없으면 (스풀 대기분 등) RawData 를 파싱"""
+    if row[1] != log_schema.PT_TYPE: return ""
+    if record is not None: return record.icon
+    return rollups.verdict_label(row[6] if len(row) > 6 else "")
+
+
+def rollup_key(ts, row_type, verdict, branch):
+    """KPI 카운터 키 (날짜, 지점, 유형, 판정 아이콘)"""
+    return (str(ts)[:10], branch, row_type, verdict if row_type == log_schema.PT_TYPE else "")
+
+
+def rollup_listener(agg, branch):
+    """WriteQueue 리스너: 저장되는 행마다 KPI 카운터 증가 (제출 때 파싱한 기록을 받아 리포트를 다시 파싱하지 않음)"""
+    def record(items, records=None):
+        agg.record([rollup_key(row[0], row[1], row_verdict(row, rec), branch)
+                    for (_, row), rec in zip(items, records or [None] * len(items))])
+    return record
+
+
+class Submission:
+    def __init__(self, report, record, source, row, row_id, results):
+        self.report = report
+        self.record = record     # report_parser.Report (화면 색상 / 카톡 / 저장 요약이 같은 기록 사용)
+        self.source = source     # rule / cache / ai
+        self.row = row
+        self.row_id = row_id     # 미리 정한 id → 저장 단계가 시간 초과돼도 저장 상태 추적 가능
+        self.results = results   # OrderedDict(단계 이름 → pipeline.StageResult), analysis 가 맨 앞
+
+
+class PTSubmitter:
+    def __init__(self, prefix, messages, cache, client, blobs, persist, notify=None, now=None,
+                 max_tokens=None, on_usage=None, tracer=None, model="gpt-4o"):
+        self.prefix = prefix          # 고정 시스템 프롬프트 (캐시 키에 포함)
+        self.messages = messages      # (member, symptom, exercise) -> OpenAI messages
+        self.cache = cache            # ai_cache.ResponseCache
+        self.client = client          # OpenAI 클라이언트 (None 이면 규칙/캐시로만 판정)
+        self.blobs = blobs            # blobs.BlobStore
+        self.persist = persist
+        self.notify = notify
+        self.now = now or (lambda: time.strftime("%Y-%m-%d %H:%M:%S"))
+        self.max_tokens = max_tokens
+        self.on_usage = on_usage      # ai_stream.stream_report 의 on_usage
+        self.tracer = tracer or tracing.get_tracer()
+        self.model = model
+
+    def analyze(self, member, symptom, exercise, rule=None, on_step=None, on_text=None):
+        """(리포트, 출처) - 규칙 엔진 → 캐시 → 스트리밍 GPT 순서"""
+        step = on_step or (lambda msg: None)
+        rule = rule or rule_engine.classify(member, symptom, exercise)
+        if rule:
+            step(f"⚡ 2단계: 로컬 규칙 엔진 판정 - {rule['reason']} (AI 호출 생략)")
+            return rule_engine.render_report(rule, member, symptom, exercise, self.now()), "rule"
+        key = cache_key(self.prefix, member, symptom, exercise)
+        with self.tracer.span("ai_cache.get") as span:
+            report = self.cache.get(key, member, self.now())
+            span["hit"] = report is not None
+        if report is not None:
+            step("⚡ 2단계: 동일 조건 분석 결과 재사용 (캐시)")
+            return report, "cache"
+        if self.client is None: raise RuntimeError("AI 연결 없음")
+        step("⚖️ 2단계: AI 리포트 실시간 작성 중...")
+        report = ai_stream.stream_report(self.client, self.messages(member, symptom, exercise), TEMPERATURE,
+                                         on_text or (lambda text: None), model=self.model,
+                                         on_usage=self.on_usage, max_tokens=self.max_tokens)
+        self.cache.put(key, report, member)
+        return report, "ai"
+
+    def run(self, member, symptom, exercise, send_kakao=True, rule=None, on_step=None, on_text=None,
+            on_report=None):
+        """분석 → 파싱 → 행 생성 → 저장/알림 병렬 실행 → Submission
+        on_report(리포트, Report) 는 저장 전에 호출 (화면에 최종 결과를 먼저 표시)"""
+        self.tracer.start_trace()
+        start = time.perf_counter()
+        report, source = self.analyze(member, symptom, exercise, rule, on_step, on_text)
+        record = report_parser.parse(report)
+        if on_report: on_report(report, record)
+        analysis_elapsed = time.perf_counter() - start
+        self.tracer.record("analysis", analysis_elapsed, source=source)
+
+        if on_step: on_step("💾 3단계: 안전 데이터베이스 저장 + 카톡 알림 (병렬)")
+        row = pt_row(self.now(), member, symptom, exercise, report, record, self.blobs)
+        row_id = uuid.uuid4().hex
+        stages = [("persist", lambda: self.persist(row, row_id, record), PERSIST_TIMEOUT)]
+        if send_kakao and self.notify:
+            with self.tracer.span("kakao.extract"):
+                kakao_msg = kakao_message(report, record)
+            stages.append(("notify", lambda: self.notify(kakao_msg), NOTIFY_TIMEOUT))
+        results = pipeline.run_stages(stages)
+        results["analysis"] = pipeline.StageResult("analysis", True, elapsed=analysis_elapsed)
+        results.move_to_end("analysis", last=False)
+        self.tracer.record("submit.total", time.perf_counter() - start)
+        return Submission(report, record, source, row, row_id, results)
@@ -0,0 +1,46 @@
+import ai_cache
+
+PROMPT = "system prompt"
+REPORT = "**[분석 일시 : 2026-10-18 09:00]**\n**대상 회원:** 남/50대\n- ✅ 진행 가능"
+
+
+def test_key_ignores_spacing_case_and_exercise_order():
+    a = ai_cache.make_key(PROMPT, "남/50대", "허리 (Lumbar) 통증", "스쿼트, 데드 리프트")
+    b = ai_cache.make_key(PROMPT, "남 / 50대", "허리 lumbar 통증!", "데드리프트/스쿼트")
+    assert a == b
+    assert a != ai_cache.make_key(PROMPT + " v2", "남/50대", "허리 (Lumbar) 통증", "스쿼트, 데드 리프트")
+    assert a != ai_cache.make_key(PROMPT, "남/50대", "무릎 통증", "스쿼트, 데드 리프트")
+
+
+def test_hit_refills_timestamp_and_member():
+    cache = ai_cache.ResponseCache(":memory:")
+    key = ai_cache.make_key(PROMPT, "남/50대", "없음", "스쿼트")
+    assert cache.get(key, "남/50대", "2026-10-19 10:00") is None
+    cache.put(key, REPORT, "남/50대")
+    hit = cache.get(key, "남/50대 (김회원)", "2026-10-19 10:00")
+    assert "2026-10-19 10:00" in hit and "남/50대 (김회원)" in hit and "2026-10-18" not in hit
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "entries": 1}
+
+
+def test_entries_survive_restart_and_expire(tmp_path):
+    path = str(tmp_path / "cache.db")
+    key = ai_cache.make_key(PROMPT, "m", "s", "e")
+    ai_cache.ResponseCache(path).put(key, REPORT, "m")
+    assert ai_cache.ResponseCache(path).get(key, "m", "t") is not None
+    assert ai_cache.ResponseCache(path, ttl=-1).get(key, "m", "t") is None
+
+
+def test_memory_lru_is_bounded():
+    cache = ai_cache.ResponseCache(":memory:", max_entries=2)
+    for k in "abc": cache.put(k, REPORT, "m")
+    assert list(cache.mem) == ["b", "c"]
+    assert cache.get("a", "m", "t") is not None   # 메모리에서 밀려나도 SQLite 에서 다시 읽음
+
+
+def test_disk_table_is_bounded(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = ai_cache.ResponseCache(path, max_entries=1, max_disk_entries=3)
+    for k in "abcde": cache.put(k, REPORT, "m")
+    assert cache.purge() == 2
+    assert [k for (k,) in cache.db.execute("SELECT key FROM ai_cache ORDER BY created")] == ["c", "d", "e"]
+    assert ai_cache.ResponseCache(path, ttl=-1).db.execute("SELECT COUNT(*) FROM ai_cache").fetchone()[0] == 0
@@ -0,0 +1,18 @@
+import batch
+
+
+def test_header_aliases_pick_columns_in_any_order():
+    entries, errors = batch.parse_roster("운동,회원\n스쿼트,50대 남성\n".encode("utf-8-sig"))
+    assert errors == []
+    assert entries == [{"member": "50대 남성", "symptom": "특이사항 없음", "exercise": "스쿼트"}]
+
+
+def test_header_without_exercise_column_is_rejected():
+    entries, errors = batch.parse_roster("회원,증상\n50대 남성,허리 통증\n")
+    assert entries == [] and "운동 열" in errors[0]
+
+
+def test_no_header_means_positional_columns():
+    entries, errors = batch.parse_roster("50대 남성,허리 통증,데드리프트\n\n30대 여성,,\n")
+    assert entries == [{"member": "50대 남성", "symptom": "허리 통증", "exercise": "데드리프트"}]
+    assert errors == ["2행: 운동 항목 누락"]
@@ -0,0 +1,31 @@
+import os
+
+import blobs
+import fakes
+import report_parser
+
+REPORT = fakes.REPORT.format(ts="2026-10-18 09:00:00", member="김회원", verdict=fakes.VERDICTS[0])
+
+
+def test_offload_keeps_a_short_stub_and_the_full_text(tmp_path):
+    store = blobs.BlobStore(str(tmp_path))
+    value = store.offload(REPORT)
+    assert value.startswith("판정: ⛔\n") and len(value) < len(REPORT)
+    assert store.resolve(value) == REPORT
+    assert store.get_record(blobs.ref_of(value)).verdict == "STOP"
+    assert store.offload(REPORT) == value                       # 같은 내용 → 같은 해시, 파일 1개
+    assert sum(len(files) for _, _, files in os.walk(tmp_path)) == 2   # 원문 + 판정 기록
+
+
+def test_resolve_passes_through_plain_and_missing_values(tmp_path):
+    store = blobs.BlobStore(str(tmp_path))
+    assert store.resolve("예전 행 원문") == "예전 행 원문"
+    missing = "판정: ✅\n요약\nblob:" + "0" * 64
+    assert store.resolve(missing) == missing
+    assert store.get_record("0" * 64) is None
+
+
+def test_record_falls_back_to_parsing_old_blobs(tmp_path):
+    store = blobs.BlobStore(str(tmp_path))
+    digest = store.put(REPORT)                                 # 기록 파일 없이 원문만 있는 예전 blob
+    assert store.get_record(digest).to_dict() == report_parser.parse(REPORT).to_dict()
@@ -0,0 +1,29 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+import branch_index  # noqa: E402
+
+
+def chunk(*rows):
+    return pd.DataFrame([{"Timestamp": pd.Timestamp(ts), "Branch": b, "Zone": z} for ts, b, z in rows])
+
+
+def test_keeps_latest_row_per_branch_across_chunks():
+    ix = branch_index.BranchIndex()
+    ix.on_ingest(chunk(("2026-10-18 09:00", "1호점", "A"), ("2026-10-18 10:00", "1호점", "B"),
+                       ("2026-10-18 08:00", "2호점", "A")), True)
+    ix.on_ingest(chunk(("2026-10-18 07:00", "1호점", "C"), ("2026-10-18 11:00", "2호점", "D")), False)
+    assert ix.branches() == ["1호점", "2호점"]
+    assert ix.last("1호점")["Zone"] == "B"       # 늦게 들어온 과거 기록이 최신을 덮지 않음
+    assert ix.last("2호점")["Zone"] == "D"
+
+
+def test_status_and_full_reload():
+    ix = branch_index.BranchIndex()
+    ix.on_ingest(chunk(("2026-10-18 09:00", "1호점", "A")), True)
+    assert ix.status("1호점", "2026-10-18 11:00")[0] == "ok"
+    assert ix.status("1호점", "2026-10-18 12:30")[0] == "overdue"
+    assert ix.status("3호점", "2026-10-18 12:30") == ("missing", None, None)
+    ix.on_ingest(chunk(("2026-10-18 09:00", "2호점", "A")), True)
+    assert ix.branches() == ["2호점"]
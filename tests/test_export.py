@@ -0,0 +1,44 @@
+import gzip
+import os
+import types
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+import export  # noqa: E402
+import storage  # noqa: E402
+
+
+def make_store():
+    df = pd.DataFrame({"Type": ["PT", "FACILITY", "PT"], "Branch": ["1호점", "2호점", "1호점"]})
+    return types.SimpleNamespace(df=df, raw=pd.Series(["r0", "blob:abc", "r2"]))
+
+
+def test_streams_chunks_with_resolved_payload(tmp_path):
+    chunks = export.frame_chunks(make_store(), [[2, 1], [0, 99]], resolve=lambda v: v.replace("blob:", "본문-"))
+    exp = export.Exporter(str(tmp_path))
+    path, rows = exp.export("k1", "csv.gz", chunks)
+    assert rows == 3
+    with gzip.open(path, "rt", encoding="utf-8-sig") as f:
+        assert f.read().splitlines() == ["Type,Branch,RawData", "PT,1호점,r2", "FACILITY,2호점,본문-abc", "PT,1호점,r0"]
+
+
+def test_reuses_artifact_and_evicts_oldest(tmp_path):
+    exp = export.Exporter(str(tmp_path), max_artifacts=2)
+    store = make_store()
+    keys = [export.filter_key("csv", branch=b) for b in ("1호점", "2호점", "3호점")]
+    first, _ = exp.export(keys[0], "csv", export.frame_chunks(store, [[0]]))
+    assert exp.export(keys[0], "csv", iter(())) == (first, 1)    # 같은 조건 → 다시 만들지 않음
+    exp.export(keys[1], "csv", export.frame_chunks(store, [[1]]))
+    exp.export(keys[2], "csv", export.frame_chunks(store, [[2]]))
+    assert exp.get(keys[0]) is None and not os.path.exists(first)
+    assert sorted(os.listdir(tmp_path)) == sorted(f"map_logs_{k}.csv" for k in keys[1:])
+
+
+def test_query_chunks_page_through_the_backend():
+    backend = storage.SQLiteBackend(":memory:", "logs", ["Timestamp", "Type", "Branch"])
+    backend.append_many([[f"2026-10-18 09:0{i}:00", "PT", "1호점"] for i in range(5)])
+    chunks = list(export.query_chunks(backend, 2, types=["PT"]))
+    assert [len(c) for c in chunks] == [2, 2, 1]
+    assert list(chunks[0]["Timestamp"]) == ["2026-10-18 09:04:00", "2026-10-18 09:03:00"]
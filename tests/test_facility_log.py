@@ -0,0 +1,69 @@
+import pytest
+
+pytest.importorskip("pandas")  # log_schema 가 pandas 사용
+
+import facility_log  # noqa: E402
+import log_schema  # noqa: E402
+import storage  # noqa: E402
+
+CHAT = """\
+2026년 10월 18일
+[김코치] [오전 9:04] [MAP ENTERPRISE LOG]
+-----------------------------------------
+BRANCH     : 킹스짐 1호점 (본점)
+EVENT      : Routine Patrol
+TIMESTAMP  : 2026.10.18 09:00
+LOCATION   : ZONE A
+ACTION     : MACHINE_STATUS: OK / ENV_CLEAR: OK
+STAFF      : 김코치
+-----------------------------------------
+[MAP ENTERPRISE LOG]
+BRANCH     : 킹스짐 2호점
+EVENT      : Maintenance
+TIMESTAMP  : 어제 저녁
+-----------------------------------------
+[MAP ENTERPRISE LOG]
+BRANCH     : 킹스짐 2호점
+EVENT      : Maintenance
+TIMESTAMP  : 2026-10-18 10:30:00
+ACTION     : REPAIR_ACTION: DONE
+"""
+
+
+def test_parse_logs_from_chat_export():
+    rejected = []
+    events = list(facility_log.parse_logs(CHAT.splitlines(), rejected))
+    assert [(e.ts, e.branch, e.event) for e in events] == [
+        ("2026-10-18 09:00:00", "킹스짐 1호점 (본점)", "Routine Patrol"),
+        ("2026-10-18 10:30:00", "킹스짐 2호점", "Maintenance"),
+    ]
+    assert events[0].checks == {"MACHINE_STATUS": "OK", "ENV_CLEAR": "OK"}
+    assert [line for line, _ in rejected] == [11]
+
+
+def test_log_text_round_trips():
+    event = facility_log.FacilityEvent.from_form("2026-10-18 09:00:00", "킹스짐 1호점 (본점)", "정기 순찰",
+                                                 "ZONE A (웨이트존)", [True, False], " 김코치 ")
+    (parsed,) = facility_log.parse_logs(event.to_log_text().splitlines())
+    assert parsed.to_row() == event.to_row()
+    assert parsed.event_id() == event.event_id()
+
+
+def test_event_id_includes_checks():
+    a = facility_log.FacilityEvent("2026-10-18 09:00:00", "1호점", "Routine Patrol", "ZONE A", {"MACHINE_STATUS": "OK"})
+    b = facility_log.FacilityEvent("2026-10-18 09:00:00", "1호점", "Routine Patrol", "ZONE A", {"ENV_CLEAR": "OK"})
+    assert a.event_id() != b.event_id()
+
+
+def test_import_logs_stores_each_event_once():
+    backend = storage.SQLiteBackend(":memory:", "hq_logs", log_schema.HQ_COLUMNS)
+    first = facility_log.import_logs(CHAT.splitlines(), backend, batch_size=1)
+    again = facility_log.import_logs(CHAT.splitlines(), backend)
+    assert first == {"events": 2, "stored": 2, "batches": 2}
+    assert again == {"events": 2, "stored": 0, "batches": 1}      # 다시 가져와도 새로 저장되는 행 없음
+    assert [cells[4] for _, cells in backend.rows_from(0)] == ["Routine Patrol", "Maintenance"]
+
+
+def test_import_logs_refuses_sheet_backends():
+    with pytest.raises(ValueError):
+        facility_log.import_logs(CHAT.splitlines(), storage.SheetsBackend(None, log_schema.HQ_COLUMNS))
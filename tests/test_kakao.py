@@ -0,0 +1,44 @@
+import time
+
+import pytest
+
+pytest.importorskip("requests")
+
+import fakes  # noqa: E402
+import kakao  # noqa: E402
+
+
+def test_messages_are_sent_in_background():
+    with fakes.FakeKakaoServer(latency=0.05) as url:
+        d = kakao.KakaoDispatcher(lambda: "token", base_url=url)
+        start = time.perf_counter()
+        ids = [d.send(f"msg {i}")[0] for i in range(3)]
+        assert time.perf_counter() - start < 0.05        # 요청 스레드는 전송을 기다리지 않음
+        assert [d.wait(i, 5) for i in ids] == [("sent", "성공")] * 3
+        assert d.get_status("nope") == ("unknown", None)
+
+
+def test_rate_limit_spaces_out_sends():
+    with fakes.FakeKakaoServer(latency=0) as url:
+        d = kakao.KakaoDispatcher(lambda: "token", base_url=url, rate=20, burst=1)
+        start = time.perf_counter()
+        ids = [d.send("msg")[0] for _ in range(5)]
+        for i in ids: d.wait(i, 5)
+        assert time.perf_counter() - start >= 4 / 20 * 0.9
+
+
+def test_auth_errors_fail_without_retry():
+    server = fakes.FakeKakaoServer(latency=0, status=401)
+    with server as url:
+        d = kakao.KakaoDispatcher(lambda: "expired", base_url=url)
+        msg_id, _ = d.send("msg")
+        state, detail = d.wait(msg_id, 5)
+    assert state == "failed" and "401" in detail
+    assert server.received == 1
+
+
+def test_full_queue_fails_fast():
+    d = kakao.KakaoDispatcher(lambda: "token", base_url="http://127.0.0.1:9", queue_size=1)
+    d._ensure_worker = lambda: None   # 워커를 띄우지 않아 대기열이 비지 않게 함
+    assert d.send("a")[1] is None
+    assert d.send("b") == (None, "전송 대기열 초과")
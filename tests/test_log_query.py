@@ -0,0 +1,54 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+import log_query  # noqa: E402
+
+
+def frame(rows, start=0):
+    df = pd.DataFrame(rows, columns=["Timestamp", "Type", "Branch", "Staff"])
+    df["Timestamp"] = pd.to_datetime(df["Timestamp"])
+    df.index = range(start, start + len(df))
+    return df
+
+
+ROWS = [
+    ("2026-10-17 09:00:00", "FACILITY", "1호점", "김코치"),
+    ("2026-10-18 09:00:00", "PT_SAFETY_LOG", "1호점", "이코치"),
+    ("2026-10-18 10:00:00", "FACILITY", "2호점", "박코치"),
+]
+
+
+def make_index():
+    ix = log_query.LogIndex()
+    df = frame(ROWS)
+    ix.on_ingest(df, True, pd.Series(["누수 없음", "허리 디스크 주의", "조명 고장"], index=df.index))
+    return ix
+
+
+def test_filters_and_newest_first_paging():
+    ix = make_index()
+    assert ix.query() == ([2, 1, 0], 3)
+    assert ix.query(page=2, page_size=2) == ([0], 3)
+    assert ix.query(start="2026-10-18", end="2026-10-18", types=["FACILITY"]) == ([2], 1)
+    assert ix.query(branch="1호점", staff="이") == ([1], 1)
+    assert ix.distinct("branch") == ["1호점", "2호점"]
+
+
+def test_text_search_covers_raw_payload_and_incremental_rows():
+    ix = make_index()
+    assert ix.query(text="디스크") == ([1], 1)
+    assert ix.query(text="고장")[1] == 1                       # 3글자 미만 → instr 경로
+    ix.on_ingest(frame([("2026-10-18 11:00:00", "FACILITY", "1호점", "김코치")], start=3), False,
+                 pd.Series(["조명 고장 재발"], index=[3]))
+    assert ix.query(text="조명 고장")[0] == [3, 2]
+    assert [ids for ids in ix.iter_ids(chunk_size=2)] == [[3, 2], [1, 0]]
+
+
+def test_search_indexes_resolved_blob_text():
+    blobs = {"판정: ⛔\n요약\nblob:abc": "전체 리포트: 요추 추간판 탈출 병력"}
+    ix = log_query.LogIndex(resolve=lambda v: blobs.get(v, v))
+    df = frame(ROWS[:2])
+    ix.on_ingest(df, True, pd.Series(["판정: ⛔\n요약\nblob:abc", "누수 없음"], index=df.index))
+    assert ix.query(text="추간판") == ([0], 1)                  # 시트에는 해시만 있어도 원문으로 검색
+    assert ix.query(text="누수 없음") == ([1], 1)
@@ -0,0 +1,63 @@
+import pytest
+
+pytest.importorskip("pandas")
+
+import fakes  # noqa: E402
+import log_store  # noqa: E402
+
+HEADER = ["Timestamp", "Type", "Branch", "Zone", "Event", "Staff", "RawData"]
+
+
+def row(i, branch="1호점"):
+    return [f"2026-10-18 09:{i:02d}:00", "FACILITY", branch, "ZONE A", "Routine Patrol", "김코치", f"r{i}"]
+
+
+def make_store(rows=(), **kw):
+    sheet = fakes.FakeWorksheet(header=HEADER, rows=rows, latency=0, per_1k_rows=0)
+    return log_store.LogStore(lambda: (sheet, "ok"), **kw), sheet
+
+
+def test_reads_only_new_rows_after_first_load():
+    seen = []
+    store, sheet = make_store([row(0), row(1)], ttl=60,
+                              listeners=[lambda chunk, full, raw: seen.append((len(chunk), full))])
+    assert len(store.get()) == 2
+    calls = sheet.calls
+    assert len(store.get()) == 2 and sheet.calls == calls   # TTL 안 → 네트워크 호출 없음
+    sheet.rows.append(row(2))
+    df = store.get(force=True)
+    assert list(df["RawData"]) == ["r0", "r1", "r2"]
+    assert seen == [(2, True), (1, False)]
+    assert store.next_row == 5
+
+
+def test_typed_frame_keeps_raw_data_separately():
+    store, sheet = make_store([row(0)], typed=True)
+    store.get()
+    sheet.rows.append(row(1, "2호점"))
+    df = store.get(force=True)
+    assert "RawData" not in df.columns
+    assert str(df["Timestamp"].dtype).startswith("datetime64")
+    assert df["Branch"].dtype == "category" and set(df["Branch"].cat.categories) == {"1호점", "2호점"}
+    assert store.get_raw(1) == "r1"
+
+
+def test_read_error_keeps_cache_and_reports():
+    errors = []
+    store, sheet = make_store([row(0)], on_error=errors.append)
+    store.get()
+    sheet.fail_rate = 1.0
+    assert len(store.get(force=True)) == 1
+    assert "503" in store.last_error and len(errors) == 1
+
+
+def test_blank_rows_still_advance_the_read_position():
+    store, sheet = make_store([row(0)], typed=True)
+    store.get()
+    sheet.rows += [[""] * 7, row(1)]
+    assert len(store.get(force=True)) == 2
+    assert store.next_row == 5
+    sheet.rows.append(row(2, "3호점"))
+    df = store.get(force=True)
+    assert [store.get_raw(i) for i in df.index] == ["r0", "r1", "r2"]   # 같은 행을 다시 읽지 않음
+    assert list(df["Branch"].cat.categories) == ["1호점", "3호점"]
@@ -0,0 +1,32 @@
+import time
+
+import pipeline
+
+
+def test_stages_run_concurrently():
+    start = time.perf_counter()
+    results = pipeline.run_stages([("a", lambda: time.sleep(0.2) or "A", 2), ("b", lambda: time.sleep(0.2) or "B", 2)])
+    assert time.perf_counter() - start < 0.35
+    assert [(r.name, r.ok, r.value) for r in results.values()] == [("a", True, "A"), ("b", True, "B")]
+
+
+def test_ok_flag_tuple_and_exceptions():
+    def boom(): raise RuntimeError("sheet down")
+
+    results = pipeline.run_stages([("persist", lambda: (False, "disk full"), 1), ("notify", boom, 1)])
+    assert (results["persist"].ok, results["persist"].value, results["persist"].error) == (False, "disk full", "disk full")
+    assert (results["notify"].ok, results["notify"].error, results["notify"].timed_out) == (False, "sheet down", False)
+
+
+def test_timeout_is_reported_as_unknown_not_failed():
+    done = []
+    results = pipeline.run_stages([("persist", lambda: time.sleep(0.3) or done.append(1), 0.05)])
+    r = results["persist"]
+    assert r.timed_out and not r.ok and r.elapsed == 0.05
+    time.sleep(0.4)
+    assert done == [1]   # 기다리기만 멈췄을 뿐 작업은 끝까지 실행됨
+
+
+def test_timing_summary():
+    results = pipeline.run_stages([("persist", lambda: None, 1)])
+    assert pipeline.timing_summary(results, {"persist": "저장"}).startswith("저장 ")
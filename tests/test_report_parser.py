@@ -0,0 +1,43 @@
+import pytest
+
+import ai_stream
+import fakes
+import report_parser
+import rule_engine
+
+
+@pytest.mark.parametrize("verdict, expected, css", [
+    (fakes.VERDICTS[0], "STOP", "res-stop"),
+    (fakes.VERDICTS[1], "MODIFY", "res-mod"),
+    (fakes.VERDICTS[2], "GO", "res-go"),
+])
+def test_parse_ai_report(verdict, expected, css):
+    rep = report_parser.parse(fakes.REPORT.format(ts="2026-10-18 09:00", member="남/50대", verdict=verdict))
+    assert (rep.verdict, rep.css) == (expected, css)
+    assert rep.risks == ["통증 부위와 운동 관절이 겹쳐 부상 위험이 있습니다."]
+    assert rep.limits == ["고중량 반복"]
+    assert rep.alternatives == ["머신 위주 저강도 운동"]
+    assert rep.cues == ["통증 발생 시 즉시 중단"]
+    assert rep.kakao.startswith("안녕하세요, 남/50대님!")
+    assert rep.summary.startswith("종합 판정:")
+
+
+def test_parse_rule_engine_report_round_trips():
+    result = rule_engine.classify("남/40대", "무릎 통증", "스쿼트")
+    text = rule_engine.render_report(result, "남/40대", "무릎 통증", "스쿼트", "2026-10-18 09:00")
+    rep = report_parser.parse(text)
+    assert rep.verdict == "STOP"
+    assert report_parser.Report.from_dict(rep.to_dict()).to_dict() == rep.to_dict()
+
+
+def test_parse_free_text_without_verdict():
+    rep = report_parser.parse("잠시 후 다시 시도해 주세요.")
+    assert (rep.verdict, rep.css, rep.summary) == ("", "", "잠시 후 다시 시도해 주세요.")
+
+
+def test_streaming_verdict_uses_parser_tables():
+    text = fakes.REPORT.format(ts="2026-10-18 09:00", member="남/50대", verdict=fakes.VERDICTS[1])
+    line_end = text.index("\n", text.index(fakes.VERDICTS[1]))
+    assert ai_stream.verdict_css(text[:line_end]) is None            # 판정 줄이 끝나기 전에는 미확정
+    assert ai_stream.verdict_css(text) == report_parser.parse(text).css == "res-mod"
+    assert ai_stream.verdict_css("") is None
@@ -0,0 +1,31 @@
+import sqlite3
+
+import pytest
+
+import rollups
+
+
+def test_counters_from_saves_do_not_count_as_built():
+    agg = rollups.Rollups(":memory:")
+    agg.record([("2026-10-18", "1호점", "PT_SAFETY_LOG", "⛔")])
+    assert agg.total() == 1 and not agg.is_built()   # 저장 카운터만 있음 → 재집계 필요
+
+
+def test_rebuild_replaces_counts_and_marks_built():
+    agg = rollups.Rollups(":memory:")
+    agg.record([("2026-10-18", "1호점", "FACILITY", "")] * 3)
+    agg.rebuild([("2026-10-17", "1호점", "PT_SAFETY_LOG", "✅"), ("2026-10-18", "1호점", "PT_SAFETY_LOG", "⛔"),
+                 ("2026-10-18", "2호점", "FACILITY", "")])
+    assert agg.is_built()
+    assert agg.total() == 3 and agg.total(day="2026-10-18") == 2
+    assert agg.by("verdict", type="PT_SAFETY_LOG") == {"✅": 1, "⛔": 1}
+    agg.record([("2026-10-18", "2호점", "FACILITY", "")])
+    assert agg.by("branch", type="FACILITY") == {"2호점": 2}
+
+
+def test_failed_rebuild_keeps_previous_counts():
+    agg = rollups.Rollups(":memory:")
+    agg.record([("2026-10-18", "1호점", "FACILITY", "")])
+    with pytest.raises(sqlite3.Error):
+        agg.rebuild([("2026-10-18", "1호점", "FACILITY")])   # 열 개수 오류 → 트랜잭션 실패
+    assert agg.total() == 1 and not agg.is_built()
@@ -0,0 +1,36 @@
+import pytest
+
+import rule_engine
+
+
+def verdict(member, symptom, exercise):
+    result = rule_engine.classify(member, symptom, exercise)
+    return result and result["verdict"]
+
+
+@pytest.mark.parametrize("member, symptom, exercise, expected", [
+    ("남/40대", "무릎 통증", "스쿼트", "STOP"),
+    ("남/40대", "무릎 통증", "벤치프레스", "GO"),
+    ("여/30대", "특이사항 없음", "데드리프트", "GO"),
+    ("남/60대", "가슴 통증, 식은땀", "런닝", "EMERGENCY"),
+    ("남/40대", "무릎 통증", "케틀벨 스윙", None),        # 모르는 운동
+    ("남/40대", "어깨 통증", "푸시업", "STOP"),
+    ("남/40대", "손목 통증", "벤치프레스", None),        # 간접 부하 → AI
+    ("남/40대", "허리가 뻐근함", "벤치프레스", None),      # 코어 → AI
+])
+def test_classify(member, symptom, exercise, expected):
+    assert verdict(member, symptom, exercise) == expected
+
+
+def test_neck_disc_history_is_not_lumbar():
+    # '목디스크' 병력만으로 허리 STOP 을 내면 안 됨
+    assert verdict("50대 남성, 목디스크", "특이사항 없음", "스쿼트") is None
+    assert rule_engine.find_parts("목디스크") == {"neck"}
+
+
+def test_history_without_body_part_goes_to_ai():
+    assert verdict("남/50대/디스크", "특이사항 없음", "데드리프트") is None
+
+
+def test_history_confirmed_by_symptom():
+    assert verdict("허리디스크", "허리 통증", "데드리프트") == "STOP"
@@ -0,0 +1,65 @@
+import time
+
+import pytest
+
+import fakes
+import shards
+
+HEADER = ["Timestamp", "Type", "Branch"]
+
+
+def make_router(latency=0, rows=None, **kw):
+    sheet1 = fakes.FakeWorksheet(header=HEADER, rows=rows, latency=latency, per_1k_rows=0)
+    conn = fakes.FakeConnection(fakes.FakeSpreadsheet(sheet1, latency=latency))
+    return shards.ShardRouter(conn, header=HEADER, **kw), conn
+
+
+def test_rows_are_split_by_month_and_branch():
+    router, conn = make_router(by=("month", "branch"), branch_of=lambda row: row[2])
+    router.get_sheet()[0].append_rows([
+        ["2026-09-30 23:59:00", "PT", "1호점"],
+        ["2026-10-01 00:00:00", "PT", "1호점"],
+        ["2026-10-02 09:00:00", "PT", "2호점"],
+    ])
+    tabs = conn.spreadsheet.tabs
+    assert tabs["logs_2026-09_1호점"].rows[1:] == [["2026-09-30 23:59:00", "PT", "1호점"]]
+    assert len(tabs["logs_2026-10_1호점"].rows) == 2
+    assert router.shards(start="2026-10-01", branch="2호점", legacy=False) == ["logs_2026-10_2호점"]
+
+
+def test_sheet1_is_registered_as_legacy_shard():
+    router, _ = make_router(rows=[["2025-01-05 10:00:00", "PT", "1호점"]])
+    router.get_sheet()[0].append_rows([["2026-10-18 09:00:00", "PT", "1호점"]])
+    assert router.shards() == ["sheet1", "logs_2026-10"]
+    assert router.shards(start="2026-10") == ["sheet1", "logs_2026-10"]  # 레거시는 모든 조회에 포함
+    assert "sheet1" not in router.active()                                 # 새 행은 기록하지 않음
+    rows = router.fetch(lambda ws, title: ws.get_all_values()[1:], router.shards())
+    assert rows["sheet1"] == [["2025-01-05 10:00:00", "PT", "1호점"]]
+
+
+def test_fetch_reads_shards_in_parallel():
+    writer, conn = make_router()
+    writer.get_sheet()[0].append_rows([[f"2026-{m:02d}-01 00:00:00", "PT", ""] for m in range(1, 7)])
+    for ws in conn.spreadsheet.tabs.values(): ws.latency = 0.2
+    reader = shards.ShardRouter(conn)  # 다른 워커: 핸들 캐시 없음
+    titles = reader.shards(legacy=False)
+    start = time.perf_counter()
+    counts = reader.fetch(lambda ws, title: len(ws.get_all_values()), titles)
+    assert counts == {t: 2 for t in titles}
+    assert time.perf_counter() - start < 0.2 * len(titles) / 2
+
+
+def test_failed_read_resets_connection_except_on_429():
+    router, conn = make_router()
+    resets = []
+    conn.reset = resets.append
+
+    def fail(code):
+        def fn(ws, title):
+            raise RuntimeError(f"fake sheet error ({code})")
+        return fn
+
+    for code in (503, 429):
+        with pytest.raises(RuntimeError):
+            router.fetch(fail(code), router.shards())
+    assert [str(e) for e in resets] == ["fake sheet error (503)"]
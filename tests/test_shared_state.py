@@ -0,0 +1,32 @@
+import sqlite3
+
+import shared_state
+
+
+def test_sessions_merge_updates_and_expire(tmp_path):
+    path = str(tmp_path / "state.db")
+    store = shared_state.SessionStore(path)
+    token = store.create({"admin": True})
+    store.update(token, my_writes=[["r1", "PT", "t"]])
+    other = shared_state.SessionStore(path)          # 다른 워커
+    assert other.get(token) == {"admin": True, "my_writes": [["r1", "PT", "t"]]}
+    other.delete(token)
+    assert store.get(token) is None and store.get("") is None
+
+
+def test_shared_store_is_one_per_path_and_purges_on_open(tmp_path):
+    path = str(tmp_path / "state.db")
+    old = shared_state.SessionStore(path, ttl=-1)
+    old.create({"admin": True})                      # 이미 만료된 세션
+    store = shared_state.get_session_store(path)
+    assert shared_state.get_session_store(path) is store
+    assert sqlite3.connect(path).execute("SELECT COUNT(*) FROM sessions").fetchone()[0] == 0
+
+
+def test_state_paths_are_scoped_per_branch(tmp_path):
+    root = str(tmp_path)
+    assert shared_state.scoped_dir("", "1호점") == ""
+    branch_dir = shared_state.scoped_dir(root, "1호점 / 강남")
+    assert branch_dir != shared_state.scoped_dir(root, "2호점")
+    assert shared_state.path_in(branch_dir, "map_spool.db").startswith(branch_dir)
+    assert shared_state.path_in(branch_dir, ":memory:") == ":memory:"
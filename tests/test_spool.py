@@ -0,0 +1,99 @@
+import pytest
+
+import fakes
+import spool
+import storage
+import write_queue
+
+
+def test_failed_batch_rolls_back_and_spool_stays_usable():
+    sp = spool.Spool(":memory:")
+    sp.add("a", ["1"])
+    with pytest.raises(TypeError):
+        sp.add_many([("b", ["2"]), ("x", [object()])])   # JSON 직렬화 실패 → 트랜잭션 중간 실패
+    # 실패한 트랜잭션이 열린 채 남으면 다음 BEGIN 이 'within a transaction' 으로 실패함
+    sp.add("c", ["3"])
+    sp.mark_sent(["a"])
+    sp.mark_error(["c"], "boom")
+    assert [rid for rid, _ in sp.pending()] == ["c"]
+    assert sp.get_status("b") == ("unknown", None)
+    assert sp.get_status("c") == ("queued", "boom")
+
+
+def test_re_adding_the_same_row_id_is_a_no_op():
+    sp = spool.Spool(":memory:")
+    sp.add_many([("a", ["1"]), ("b", ["2"])])
+    sp.add_many([("b", ["2"]), ("c", ["3"])])
+    assert [rid for rid, _ in sp.pending()] == ["a", "b", "c"]
+
+
+def test_adopts_rows_of_dead_owner_only():
+    sp = spool.Spool(":memory:")
+    sp.beat("alive")
+    sp.add("mine", ["1"], owner="alive")
+    sp.add("orphan", ["2"], owner="dead")
+    sp.beat("new")
+    assert [rid for rid, _ in sp.adopt("new")] == ["orphan"]
+    assert sp.adopt("other") == []          # 'new' 가 살아 있으므로 넘겨받지 않음
+
+
+def make_queue(sheet, sp, **kw):
+    return write_queue.WriteQueue(lambda: (sheet, "ok"), flush_delay=0, spool=sp, id_column=4, **kw)
+
+
+def test_queue_resends_unsent_spool_rows_on_start_without_duplicates():
+    sp = spool.Spool(":memory:")
+    sheet = fakes.FakeWorksheet(latency=0, per_1k_rows=0, rows=[["t", "PT", "a", "done"]])
+    sp.add("done", ["t", "PT", "a", "done"])   # 이전 실행이 시트에 기록했지만 sent 표시 전에 종료
+    sp.add("left", ["t", "PT", "b", "left"])
+    q = make_queue(sheet, sp)
+    assert q.wait("left", 5) == ("sent", None)
+    assert [r[3] for r in sheet.rows] == ["done", "left"]
+    assert sp.backlog() == 0
+
+
+def test_queue_accepts_resubmitted_fixed_row_ids():
+    sheet = fakes.FakeWorksheet(latency=0, per_1k_rows=0)
+    q = make_queue(sheet, spool.Spool(":memory:"))
+    first = q.submit_many([["t", "FACILITY", "a"]], ["event-1"])
+    assert q.wait(first[0], 5) == ("sent", None)
+    assert q.submit_many([["t", "FACILITY", "a"]], ["event-1"]) == ["event-1"]
+
+
+def test_primary_write_is_not_reported_failed_when_spool_fails():
+    class BrokenSpool(spool.Spool):
+        def add_many(self, items, owner=None):
+            raise OSError("disk full")
+
+    primary = storage.SQLiteBackend(":memory:", "logs", ["Timestamp", "Type", "Branch"])
+    sheet = fakes.FakeWorksheet(latency=0, per_1k_rows=0)
+    q = make_queue(sheet, BrokenSpool(":memory:"), primary=primary)
+    rid = q.submit(["2026-10-18 09:00:00", "PT", "a"])
+    state, err = q.get_status(rid)
+    assert state in ("stored", "sent") and (state == "sent" or "disk full" in err)
+    assert q.wait(rid, 5) == ("sent", None)
+    assert len(primary.query()) == 1
+
+
+def test_spool_errors_do_not_kill_the_sender(monkeypatch):
+    monkeypatch.setattr(write_queue, "backoff_delay", lambda attempt, e=None: 0)
+
+    class LockedSpool(spool.Spool):
+        def mark_error(self, row_ids, err):
+            raise RuntimeError("database is locked")
+
+    class FailOnce(fakes.FakeWorksheet):
+        failed = False
+
+        def append_rows(self, rows, **kw):
+            if not self.failed:
+                self.failed = True
+                raise RuntimeError("fake sheet error (503)")
+            super().append_rows(rows, **kw)
+
+    sheet = FailOnce(latency=0, per_1k_rows=0)
+    q = make_queue(sheet, LockedSpool(":memory:"))
+    first = q.submit(["t", "PT", "a"])
+    assert q.wait(first, 5) == ("sent", None)
+    second = q.submit(["t", "PT", "b"])
+    assert q.wait(second, 5) == ("sent", None)
@@ -0,0 +1,54 @@
+import fakes
+import storage
+
+COLUMNS = ["Timestamp", "Type", "Branch", "RawData"]
+ROWS = [
+    ["2026-10-17 09:00:00", "FACILITY", "1호점", "누수 없음"],
+    ["2026-10-18 09:00:00", "PT_SAFETY_LOG", "1호점", '판정: "중단"'],
+    ["2026-10-18 23:59:59", "FACILITY", "2호점", "조명 고장"],
+]
+
+
+def make_backend(branch=""):
+    backend = storage.SQLiteBackend(":memory:", "logs", COLUMNS, branch)
+    backend.append_many(ROWS)
+    return backend
+
+
+def test_repeated_row_id_is_stored_once():
+    backend = storage.SQLiteBackend(":memory:", "logs", ["Timestamp", "Type", "Branch"], "본점")
+    backend.append_items([("x", ["2026-10-18 09:00:00", "PT", "1호점"])])
+    backend.append_items([("x", ["2026-10-18 09:00:00", "PT", "1호점"]), ("y", ["2026-10-18 09:01:00", "PT", ""])])
+    assert backend.query() == [["2026-10-18 09:00:00", "PT", "1호점"], ["2026-10-18 09:01:00", "PT", "본점"]]
+
+
+def test_query_and_aggregate_filter_in_the_database():
+    backend = make_backend()
+    assert backend.query(start="2026-10-18", end="2026-10-18", ascending=False) == ROWS[:0:-1]
+    assert backend.query(types=["FACILITY"], branch="2호점") == [ROWS[2]]
+    assert backend.query(text='"중단"') == [ROWS[1]]                   # JSON 이스케이프된 셀도 검색
+    assert backend.query(limit=1, offset=1) == [ROWS[1]]
+    assert backend.aggregate("day") == {"2026-10-17": 1, "2026-10-18": 2}
+    assert backend.aggregate("type", branch="1호점") == {"FACILITY": 1, "PT_SAFETY_LOG": 1}
+    plan = " ".join(r[-1] for r in backend.db.execute(
+        "EXPLAIN QUERY PLAN SELECT COUNT(*) FROM logs WHERE type IN (?) AND ts >= ?", ("PT", "2026")))
+    assert "idx_logs_type_ts" in plan
+
+
+def test_sheets_backend_filters_the_same_way():
+    sheet = fakes.FakeWorksheet(header=COLUMNS, rows=[list(r) for r in ROWS], latency=0, per_1k_rows=0)
+    backend = storage.SheetsBackend(fakes.FakeConnection(fakes.FakeSpreadsheet(sheet, latency=0)), COLUMNS)
+    assert backend.query(start="2026-10-18", ascending=False) == ROWS[:0:-1]
+    assert backend.aggregate("branch", types=["FACILITY"]) == {"1호점": 1, "2호점": 1}
+
+
+def test_local_sheet_reads_new_rows_after_seq_gaps():
+    backend = make_backend()
+    sheet, _ = backend.get_sheet()
+    assert len(sheet.get_all_values()) == 4
+    backend.db.execute("UPDATE sqlite_sequence SET seq = seq + 5 WHERE name = 'logs'")   # 롤백된 삽입 등으로 빈 번호
+    backend.append_many([["2026-10-19 10:00:00", "FACILITY", "3호점", "ok"]])
+    assert sheet.get_values("A5:D") == [["2026-10-19 10:00:00", "FACILITY", "3호점", "ok"]]
+    assert backend.seq_before(6) == 9
+    backend._seq_at.clear()                                            # 기억이 없어도 같은 위치부터
+    assert sheet.get_values("A4:D") == [ROWS[2], ["2026-10-19 10:00:00", "FACILITY", "3호점", "ok"]]
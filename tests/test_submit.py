@@ -0,0 +1,63 @@
+import pytest
+
+import ai_cache
+import blobs
+import fakes
+import prompts
+import report_parser
+import rollups
+import submit
+import write_queue
+
+PREFIX = "# TEST PROMPT"
+CASE = ("남/50대/디스크", "특이사항 없음", "데드리프트")   # 규칙 엔진이 판단하지 않는 조합 → AI
+
+
+def make_submitter(tmp_path, client=None, notify=None):
+    sheet = fakes.FakeWorksheet(latency=0, per_1k_rows=0)
+    agg = rollups.Rollups(":memory:")
+    queue = write_queue.WriteQueue(lambda: (sheet, "ok"), flush_delay=0, id_column=8,
+                                   listeners=[submit.rollup_listener(agg, "1호점")])
+
+    def persist(row, row_id, record=None):
+        queue.submit(row, row_id, record)
+        state, err = queue.wait(row_id, 5)
+        return state != "failed", (row_id, state, err)
+
+    messages = lambda member, symptom, exercise: prompts.build_messages(PREFIX, {"Client_Tag": member})
+    s = submit.PTSubmitter(PREFIX, messages, ai_cache.ResponseCache(str(tmp_path / "cache.db")), client,
+                           blobs.BlobStore(str(tmp_path / "blobs")), persist, notify,
+                           now=lambda: "2026-10-18 09:00:00")
+    return s, sheet, agg
+
+
+def test_ai_report_is_parsed_offloaded_stored_and_counted(tmp_path):
+    sent = []
+    client = fakes.FakeOpenAI(ttft=0, token_delay=0, tokens=20)
+    s, sheet, agg = make_submitter(tmp_path, client, lambda text: (sent.append(text) or True, ("m1", "sent", None)))
+    steps = []
+    sub = s.run(*CASE, on_step=steps.append)
+    assert sub.source == "ai" and client.calls == 1
+    assert list(sub.results) == ["analysis", "persist", "notify"] and all(r.ok for r in sub.results.values())
+    row = sheet.rows[0]
+    assert row[:6] == ["2026-10-18 09:00:00", "PT_SAFETY_LOG", *CASE, "DONE"] and row[7] == sub.row_id
+    assert s.blobs.resolve(row[6]) == sub.report                      # 시트에는 요약 + 해시, 원문은 blob
+    assert sent == [sub.record.kakao] and agg.total(verdict=sub.record.icon) == 1
+    assert s.run(*CASE, on_step=steps.append).source == "cache" and client.calls == 1   # 같은 입력 → 캐시
+    assert "캐시" in steps[-2] and len(sheet.rows) == 2
+
+
+def test_rule_engine_needs_no_client_and_kakao_is_optional(tmp_path):
+    s, sheet, agg = make_submitter(tmp_path)
+    sub = s.run("남/50대", "허리 디스크 통증", "데드리프트")
+    assert sub.source == "rule" and list(sub.results) == ["analysis", "persist"]
+    assert agg.by("verdict") == {sub.record.icon: 1} and sub.record.icon
+
+
+def test_listener_uses_the_submitted_record_instead_of_reparsing(monkeypatch):
+    agg = rollups.Rollups(":memory:")
+    queue = write_queue.WriteQueue(None, flush_delay=0, listeners=[submit.rollup_listener(agg, "1호점")])
+    monkeypatch.setattr(rollups, "verdict_label", lambda report: pytest.fail("리포트 재파싱"))
+    record = report_parser.Report(verdict="GO")
+    queue.submit(["2026-10-18 09:00:00", "PT_SAFETY_LOG", "a", "", "", "DONE", "요약"], record=record)
+    assert agg.by("verdict") == {"✅": 1}
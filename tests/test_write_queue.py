@@ -0,0 +1,59 @@
+import fakes
+import write_queue
+
+
+def make_queue(sheet, **kw):
+    return write_queue.WriteQueue(lambda: (sheet, "ok"), flush_delay=0, id_column=4, **kw)
+
+
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(write_queue, "backoff_delay", lambda attempt, e=None: 0)
+
+
+def test_rows_submitted_together_go_out_in_one_append():
+    sheet = fakes.FakeWorksheet(latency=0, per_1k_rows=0)
+    q = make_queue(sheet)
+    ids = q.submit_many([["2026-10-18 09:00:00", "PT", "a"], ["2026-10-18 09:00:01", "PT", "b"]])
+    assert [q.wait(rid, 5) for rid in ids] == [("sent", None)] * 2
+    assert [r[3] for r in sheet.rows] == ids     # UUID 열
+    assert q.api_calls == 1
+
+
+def test_resend_after_uncertain_failure_skips_rows_already_written(monkeypatch):
+    no_backoff(monkeypatch)
+
+    class TimeoutAfterWrite(fakes.FakeWorksheet):
+        # 첫 요청은 실제로 기록되었지만 응답이 실패한 경우 (타임아웃 등)
+        failed = False
+
+        def append_rows(self, rows, **kw):
+            super().append_rows(rows, **kw)
+            if not self.failed:
+                self.failed = True
+                raise RuntimeError("read timeout (503)")
+
+    sheet = TimeoutAfterWrite(latency=0, per_1k_rows=0)
+    errors = []
+    q = make_queue(sheet, on_error=errors.append)
+    rid = q.submit(["2026-10-18 09:00:00", "PT", "a"])
+    assert q.wait(rid, 5) == ("sent", None)
+    assert [r[3] for r in sheet.rows] == [rid]
+    assert len(errors) == 1
+
+
+def test_gives_up_after_max_attempts_without_spool(monkeypatch):
+    no_backoff(monkeypatch)
+    sheet = fakes.FakeWorksheet(latency=0, per_1k_rows=0, fail_rate=1.0)
+    q = make_queue(sheet)
+    rid = q.submit(["2026-10-18 09:00:00", "PT", "a"])
+    state, err = q.wait(rid, 5)
+    assert state == "failed" and "503" in err
+    assert sheet.calls >= write_queue.MAX_ATTEMPTS
+
+
+def test_backoff_honours_retry_after_on_429():
+    class RateLimited(Exception):
+        response = type("R", (), {"status_code": 429, "headers": {"Retry-After": "7"}})()
+
+    assert write_queue.status_code_of(RateLimited()) == 429
+    assert write_queue.backoff_delay(1, RateLimited()) >= 7
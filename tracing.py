@@ -0,0 +1,113 @@
+import contextvars
+import json
+import math
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+# ---------------------------------------------------------
+# [성능 추적] 제출 1건의 단계별 소요시간(span)을 기록
+# - 시트 연결/읽기/쓰기, OpenAI 호출, 카톡 전송 등 단계마다 소요시간 + 재시도 수 + 토큰 수
+# - 최근 KEEP 건은 메모리 링 버퍼, path 지정 시 JSON Lines 파일에도 한 줄씩 추가
+# - 관리자 '성능' 패널: 단계별 p50 / p95 / p99 → 시트 / OpenAI / 카톡 중 병목 확인
+# ---------------------------------------------------------
+KEEP = 5000
+TRACE_PATH = "map_traces.jsonl"
+
+_current = contextvars.ContextVar("map_trace", default=None)
+
+
+def korea_now():
+    return datetime.utcnow() + timedelta(hours=9)
+
+
+def percentile(values, q):
+    """정렬된 값 목록의 q 분위수 (최근접 순위)"""
+    if not values: return None
+    idx = min(len(values) - 1, max(0, math.ceil(q / 100 * len(values)) - 1))
+    return values[idx]
+
+
+class Tracer:
+    def __init__(self, keep=KEEP, path=None):
+        self.spans = deque(maxlen=keep)
+        self.path = path
+        self._lock = threading.Lock()
+
+    def start_trace(self):
+        """새 제출 1건 시작 → 이후 같은 흐름(파이프라인 스레드 포함)의 span 에 같은 trace id"""
+        trace_id = uuid.uuid4().hex[:12]
+        _current.set(trace_id)
+        return trace_id
+
+    def record(self, name, seconds, ok=True, error=None, **attrs):
+        """이미 잰 소요시간을 span 으로 기록 (attrs: retries / rows / prompt / completion 등)"""
+        rec = {"at": korea_now().strftime("%Y-%m-%d %H:%M:%S"), "trace": _current.get(), "name": name,
+               "ms": round(seconds * 1000, 1), "ok": ok}
+        if error is not None: rec["error"] = str(error)[:300]
+        rec.update({k: v for k, v in attrs.items() if v is not None})
+        with self._lock:
+            self.spans.append(rec)
+            if self.path:
+                try:
+                    with open(self.path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+                except OSError:
+                    self.path = None  # 파일 기록 불가(읽기 전용 배포 등) → 메모리만 사용
+        return rec
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """with tracer.span("sheets.read_all") as s: ... s["rows"] = n"""
+        start = time.perf_counter()
+        try:
+            yield attrs
+        except Exception as e:
+            self.record(name, time.perf_counter() - start, ok=False, error=e, **attrs)
+            raise
+        self.record(name, time.perf_counter() - start, **attrs)
+
+    def recent(self, day=None):
+        with self._lock:
+            spans = list(self.spans)
+        if day: spans = [s for s in spans if s["at"].startswith(str(day))]
+        return spans
+
+    def stats(self, day=None):
+        """단계별 {count, errors, p50, p95, p99} (ms)"""
+        groups = {}
+        for s in self.recent(day):
+            groups.setdefault(s["name"], []).append(s)
+        out = {}
+        for name, spans in sorted(groups.items()):
+            ms = sorted(s["ms"] for s in spans)
+            out[name] = {
+                "count": len(spans),
+                "errors": sum(1 for s in spans if not s["ok"]),
+                "p50": percentile(ms, 50), "p95": percentile(ms, 95), "p99": percentile(ms, 99),
+            }
+        return out
+
+    def export(self, day=None):
+        """JSON Lines 문자열"""
+        return "".join(json.dumps(s, ensure_ascii=False) + "\n" for s in self.recent(day))
+
+
+_tracer = Tracer()
+_registry_lock = threading.Lock()
+
+
+def get_tracer(path=None):
+    """프로세스 전체에서 하나의 Tracer 를 공유합니다. path 를 주면 JSON Lines 파일 기록을 켭니다."""
+    with _registry_lock:
+        if path and _tracer.path is None: _tracer.path = path
+        return _tracer
+
+
+def run_in_context(fn):
+    """다른 스레드에서 실행할 함수에 현재 trace id 를 이어 붙임 (ThreadPoolExecutor.submit 용)"""
+    ctx = contextvars.copy_context()
+    return lambda *a, **kw: ctx.run(fn, *a, **kw)
@@ -0,0 +1,244 @@
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import registry
+import tracing
+
+# ---------------------------------------------------------
+# [쓰기 지연 큐] 요청 스레드는 행을 큐에 넣고 즉시 반환
+# - 백그라운드 워커가 모아서 append_rows 1회로 일괄 저장 (API 호출 수 절감)
+# - 실패 시 지수 백오프 + 지터, 429(쿼터 초과)는 Retry-After 를 존중
+# - 행마다 전송 상태(queued / sent / failed)를 UI 에서 조회 가능
+#   stored = 원본 저장소(primary)에는 기록됐지만 스풀 기록이 실패 → 시트 미러는 이 프로세스의 메모리 큐로만 전송
+# - [업그레이드] spool 지정 시: 로컬 SQLite 에 먼저 커밋 → 재시작/장애에도 유실 없음
+#   행마다 UUID 열(id_column)을 붙여, 애매한 실패 후 재전송 시 이미 들어간 행은 건너뜀 (멱등)
+# - [업그레이드] 여러 워커 프로세스가 스풀을 공유: 각자 자기가 받은 행만 전송하고,
+#   생존 신호가 끊긴 워커(종료/장애)의 미전송 행은 살아 있는 워커가 넘겨받아 이어서 전송
+# ---------------------------------------------------------
+BATCH_SIZE = 500       # 한 번에 보낼 최대 행 수 (일괄 스크리닝 결과도 1회 호출로)
+FLUSH_DELAY = 1.0      # 첫 행이 들어온 뒤 더 모으기 위해 기다리는 시간 (초)
+MAX_ATTEMPTS = 6
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+STATUS_KEEP = 2000     # 상태 조회용으로 기억할 최근 행 수
+HEARTBEAT = 15         # 스풀 생존 신호 / 멈춘 워커 행 확인 주기 (초)
+
+
+def worker_id():
+    """스풀 행 담당자 표시용 워커 id (호스트:PID:난수)"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+def status_code_of(e):
+    """gspread APIError / requests HTTPError 에서 HTTP 상태코드 추출"""
+    res = getattr(e, "response", None)
+    code = getattr(res, "status_code", None)
+    if code is None and "429" in str(e): code = 429
+    return code
+
+
+def retry_after_of(e):
+    res = getattr(e, "response", None)
+    try: return float(res.headers.get("Retry-After"))
+    except Exception: return None
+
+
+def backoff_delay(attempt, e=None):
+    """full jitter 지수 백오프. 429 응답이면 Retry-After 보다 짧게 기다리지 않음"""
+    delay = random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+    if e is not None and status_code_of(e) == 429:
+        delay = max(delay, retry_after_of(e) or BACKOFF_BASE * (2 ** attempt))
+    return delay
+
+
+class WriteQueue:
+    def __init__(self, sheet_getter, on_error=None, batch_size=BATCH_SIZE, flush_delay=FLUSH_DELAY,
+                 spool=None, id_column=None, listeners=None, primary=None):
+        self.sheet_getter = sheet_getter  # () -> (sheet, msg), None 이면 시트 미러 없이 primary 에만 기록
+        self.primary = primary            # 원본 저장소 (storage.SQLiteBackend 등) - 등록 시 동기 기록
+        self.on_error = on_error          # 429 이외 오류 시 호출 (예: 연결 재생성)
+        self.batch_size = batch_size
+        self.flush_delay = flush_delay
+        self.spool = spool                # Spool 인스턴스 (없으면 메모리 큐만 사용)
+        self.id_column = id_column        # 행 UUID 를 기록할 시트 열 번호 (1부터)
+        self.listeners = list(listeners or [])  # 등록 직후 호출: fn([(row_id, row)], records) - 예: KPI 집계
+        self.pending = []                 # [(row_id, row)]
+        self.status = OrderedDict()       # row_id -> (state, err)
+        self.api_calls = 0
+        self.verify = False               # True 면 다음 전송 전에 시트의 UUID 열로 중복 확인
+        self.owner = worker_id()
+        self._cond = threading.Condition()
+        self._worker = None
+        if spool is not None and sheet_getter is not None:
+            # 재시작 시: 스풀에 남은 (담당 워커가 없는) 미전송 행부터 이어서 전송 (직전 전송 성공 여부는 확인 필요)
+            spool.beat(self.owner)
+            self._adopt()
+            self._ensure_worker()  # 행이 없어도 생존 신호 / 멈춘 워커 행 확인을 위해 실행
+
+    # --- 요청 스레드 쪽 ---
+    def _prepare(self, row, row_id=None):
+        row_id = row_id or uuid.uuid4().hex
+        row = list(row)
+        if self.id_column:
+            row = (row + [""] * self.id_column)[:self.id_column - 1] + [row_id]
+        return row_id, row
+
+    def submit(self, row, row_id=None, record=None):
+        return self.submit_many([row], None if row_id is None else [row_id],
+                                None if record is None else [record])[0]
+
+    def submit_many(self, rows, row_ids=None, records=None):
+        """여러 행을 한 번에 등록 (스풀 1 트랜잭션, 시트 append_rows 1회 대상) → row_id 목록
+        row_ids: 내용으로 만든 고정 id (같은 기록을 다시 넣어도 원본 저장소에 한 번만 기록)
+        records: 행마다 이미 파싱된 기록 (report_parser.Report 등) - 리스너에 그대로 전달, 없으면 None"""
+        items = [self._prepare(r, rid) for r, rid in zip(rows, row_ids or [None] * len(rows))]
+        if self.primary is not None:
+            self.primary.append_items(items)  # 원본 저장 실패 → 예외 → 호출자가 저장 실패 처리
+        spool_err = None
+        if self.spool is not None:
+            try:
+                self.spool.add_many(items, self.owner)
+            except Exception as e:
+                # 원본 저장소가 없으면 스풀이 유일한 보관처 → 저장 실패
+                if self.primary is None: raise
+                # 원본에는 이미 기록됨 → 실패가 아니라 'stored' (시트 미러는 메모리 큐로만 전송, 재시작 시 유실 가능)
+                spool_err = f"로컬 스풀 기록 실패: {e}"
+        for fn in self.listeners:
+            try: fn(items, records or [None] * len(items))
+            except Exception: pass  # 집계 실패가 기록 저장을 막으면 안 됨
+        with self._cond:
+            if self.sheet_getter is None:
+                # 미러 없음: 원본 저장소 기록으로 저장 완료
+                for row_id, _ in items: self._set_status(row_id, "sent", None)
+            else:
+                self.pending.extend(items)
+                for row_id, _ in items: self._set_status(row_id, "stored" if spool_err else "queued", spool_err)
+                self._ensure_worker()
+            self._cond.notify_all()
+        return [row_id for row_id, _ in items]
+
+    def get_status(self, row_id):
+        with self._cond:
+            if row_id in self.status: return self.status[row_id]
+        if self.spool is not None: return self.spool.get_status(row_id)
+        return ("unknown", None)
+
+    def backlog(self):
+        with self._cond:
+            return len(self.pending)
+
+    def wait(self, row_id, timeout):
+        """최대 timeout 초 동안 전송 결과를 기다림 → (state, err)"""
+        deadline = time.time() + timeout
+        with self._cond:
+            while True:
+                state, err = self.status.get(row_id, ("unknown", None))
+                remaining = deadline - time.time()
+                if state in ("sent", "failed") or remaining <= 0:
+                    return state, err
+                self._cond.wait(remaining)
+
+    def _set_status(self, row_id, state, err):
+        self.status[row_id] = (state, err)
+        self.status.move_to_end(row_id)
+        while len(self.status) > STATUS_KEEP:
+            self.status.popitem(last=False)
+
+    # --- 백그라운드 워커 ---
+    def _ensure_worker(self):
+        if self._worker and self._worker.is_alive(): return
+        self._worker = threading.Thread(target=self._run, name="map-write-queue", daemon=True)
+        self._worker.start()
+
+    def _adopt(self):
+        """멈춘 워커(또는 이전 실행)의 미전송 행을 넘겨받아 전송 대상에 추가"""
+        adopted = self.spool.adopt(self.owner)
+        if not adopted: return
+        with self._cond:
+            self.pending.extend(adopted)
+            for row_id, _ in adopted: self._set_status(row_id, "queued", None)
+            self.verify = True
+            self._cond.notify_all()
+
+    def _next_batch(self):
+        while True:
+            with self._cond:
+                if not self.pending: self._cond.wait(None if self.spool is None else HEARTBEAT)
+                if self.pending: break
+            if self.spool is None: continue
+            try:
+                self.spool.beat(self.owner)
+                self._adopt()
+            except Exception:
+                pass  # 스풀 파일 잠금 등 일시 오류 → 다음 주기에 다시
+        # 짧게 더 기다려 동시에 들어오는 행을 한 번에 모음
+        time.sleep(self.flush_delay)
+        with self._cond:
+            batch = self.pending[:self.batch_size]
+            del self.pending[:self.batch_size]
+            return batch
+
+    def _send(self, batch):
+        sheet, msg = self.sheet_getter()
+        if sheet is None: raise RuntimeError(msg)
+        if self.verify and self.id_column:
+            # 이전 시도가 타임아웃 등으로 실제로는 저장됐을 수 있음 → 이미 있는 UUID 는 제외
+            self.api_calls += 1
+            existing = set(sheet.col_values(self.id_column))
+            batch = [(rid, row) for rid, row in batch if rid not in existing]
+            self.verify = False
+        if batch:
+            self.api_calls += 1
+            sheet.append_rows([row for _, row in batch], value_input_option="USER_ENTERED")
+
+    def _spool_safe(self, fn):
+        # 스풀 기록 실패(파일 잠금 등)로 전송 스레드가 죽으면 이후 행이 영영 전송되지 않음 → 삼키고 계속
+        if self.spool is None: return
+        try: fn()
+        except Exception: pass
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            last_err = None
+            attempt = 0
+            start = time.perf_counter()
+            while True:
+                try:
+                    if self.spool is not None: self.spool.beat(self.owner)  # 재시도가 길어져도 담당 유지
+                    self._send(batch)
+                    last_err = None
+                    break
+                except Exception as e:
+                    last_err = e
+                    # 429 는 요청이 거절된 것이 확실하지만, 그 외 오류는 실제 저장 여부가 불확실
+                    if status_code_of(e) != 429:
+                        self.verify = True
+                        if self.on_error: self.on_error(e)
+                    self._spool_safe(lambda: self.spool.mark_error([rid for rid, _ in batch], e))
+                    attempt += 1
+                    # 스풀이 없으면 MAX_ATTEMPTS 후 포기, 스풀이 있으면 최대 간격으로 계속 재시도
+                    if self.spool is None and attempt >= MAX_ATTEMPTS: break
+                    time.sleep(backoff_delay(min(attempt, MAX_ATTEMPTS), e))
+            tracing.get_tracer().record("sheets.append", time.perf_counter() - start, ok=last_err is None,
+                                        error=last_err, rows=len(batch), retries=attempt)
+            if last_err is None:
+                self._spool_safe(lambda: self.spool.mark_sent([rid for rid, _ in batch]))
+            with self._cond:
+                for row_id, _ in batch:
+                    if last_err is None: self._set_status(row_id, "sent", None)
+                    else: self._set_status(row_id, "failed", str(last_err))
+                self._cond.notify_all()
+
+
+def get_write_queue(key, sheet_getter, on_error=None, spool=None, id_column=None, listeners=None, primary=None):
+    """key 별 공용 WriteQueue (sheet_getter/on_error/listeners 는 처음 호출 때 것을 계속 사용)"""
+    return registry.shared("write_queue", key,
+                           lambda: WriteQueue(sheet_getter, on_error, spool=spool, id_column=id_column,
+                                              listeners=listeners, primary=primary),
+                           id_column=id_column, mirrored=sheet_getter is not None)